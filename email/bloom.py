@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Small Bloom filter used as a fast negative pre-check in front of the sent
+ledger's on-disk digest index.
+"""
+
+import hashlib
+import math
+
+
+def optimal_size(capacity, error_rate):
+    """Return (num_bits, num_hashes) for a capacity and false-positive rate"""
+    capacity = max(1, capacity)
+    num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+    num_hashes = max(1, int(round(num_bits / capacity * math.log(2))))
+    return num_bits, num_hashes
+
+
+def _hash_pair(key):
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+
+
+class BloomFilter:
+    """Bloom filter over a bytearray using double hashing (Kirsch-Mitzenmacher)"""
+
+    def __init__(self, capacity=10000, error_rate=0.001, num_bits=None, num_hashes=None, bits=None):
+        if num_bits is None or num_hashes is None:
+            num_bits, num_hashes = optimal_size(capacity, error_rate)
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+
+    def _positions(self, key):
+        h1, h2 = _hash_pair(key)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key):
+        """Add a key to the filter"""
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        bits = self.bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    @classmethod
+    def from_keys(cls, keys, error_rate=0.001):
+        """Build a filter sized for a collection of keys"""
+        keys = list(keys)
+        bloom = cls(capacity=len(keys), error_rate=error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
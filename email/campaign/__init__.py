@@ -0,0 +1,54 @@
+"""
+Campaign engine shared by the email scripts
+
+A campaign is a Campaign definition (source, renderer, delivery backend,
+ledgers and rate policy) run by ``run_campaign``. The scripts in this
+directory only define their campaign and any campaign-specific options;
+campaigns/*.toml definitions are compiled into one by ``compile_plan``.
+"""
+
+from .backends import (
+    DeliveryBackend,
+    OutboxBackend,
+    ResendBackend,
+    SMTPBackend,
+    build_message,
+    send_smtp_message,
+)
+from .cli import build_parser
+from .engine import Campaign, CampaignRun, run_campaign, send_test_email
+from .outbox import Outbox, TemplateOutbox, expand_outbox
+from .plan import CampaignPlan, PlanError, compile_plan, load_definition
+from .renderers import SplitTemplate, compile_mjml
+from .sources import NotionSource, StaticSource, rich_text
+from .storage import append_failures, failure_record, load_json_file, save_json_file
+
+__all__ = [
+    "Campaign",
+    "CampaignPlan",
+    "CampaignRun",
+    "DeliveryBackend",
+    "NotionSource",
+    "Outbox",
+    "OutboxBackend",
+    "PlanError",
+    "ResendBackend",
+    "SMTPBackend",
+    "SplitTemplate",
+    "StaticSource",
+    "TemplateOutbox",
+    "append_failures",
+    "build_message",
+    "build_parser",
+    "compile_mjml",
+    "compile_plan",
+    "expand_outbox",
+    "failure_record",
+    "load_definition",
+    "load_json_file",
+    "rich_text",
+    "run_campaign",
+    "save_json_file",
+    "send_smtp_message",
+    "send_test_email",
+]
@@ -0,0 +1,57 @@
+"""
+Run a campaign from a TOML definition
+
+Usage (from the email/ directory):
+  python -m campaign campaigns/news-philip-eades-2024.toml --check
+  python -m campaign campaigns/news-philip-eades-2024.toml --dry-run
+  python -m campaign campaigns/news-philip-eades-2024.toml --fast
+"""
+
+import sys
+
+from .cli import build_parser
+from .engine import run_campaign
+from .plan import PlanError, compile_plan
+
+
+def parse_arguments(argv=None):
+    parser = build_parser("Run an email campaign from a TOML definition", epilog=__doc__)
+    parser.add_argument("definition", help="Campaign definition (.toml)")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Validate and compile the definition, then exit without fetching recipients",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()
+
+    try:
+        plan = compile_plan(args.definition, dry_run=args.dry_run or args.check)
+    except PlanError as e:
+        print(f"❌ {e}")
+        return 2
+
+    try:
+        if args.check:
+            print("✅ Campaign definition is valid")
+            for line in plan.describe():
+                print(f"   {line}")
+            return 0
+        run_campaign(plan.to_campaign(), args)
+        return 0
+    finally:
+        plan.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
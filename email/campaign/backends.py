@@ -0,0 +1,246 @@
+"""
+Delivery backends
+
+A backend connects once per run, sends one rendered message at a time or a
+whole batch, and is closed at the end. Backends without a native batch API
+send a batch over the single open connection.
+
+Transport modules (smtplib, the MIME classes, resend) are imported when a
+backend first uses them, so dry runs and ``--help`` never load them.
+"""
+
+import os
+
+RESEND_SENDER = "North Swanage Traffic Concern Group <engineering@nstcg.org>"
+
+
+class DeliveryBackend:
+    """Base class for delivery backends"""
+
+    # Mode shown in the campaign header and summary
+    label = "LIVE"
+    # Verb for the per-recipient progress line
+    action = "Sending to"
+    # Whether the engine must render HTML before calling send()
+    needs_html = True
+    # Whether the campaign rate limit applies between sends
+    rate_limited = True
+    # Whether a successful send() delivers the message, so the recipient goes
+    # in the sent ledger and the checkpoint (False for backends that spool)
+    records_sent = True
+    # Largest batch the provider accepts (None for no limit)
+    max_batch = None
+    # Provider name recorded in the event log (defaults to the class name)
+    provider = None
+    # Provider message IDs for the last send()/send_batch() call, in order
+    # (None where the provider did not return one)
+    message_ids = ()
+
+    def describe(self):
+        return self.__class__.__name__
+
+    def connect(self):
+        """Prepare for sending. Returns False if the backend is unusable."""
+        return True
+
+    def send(self, user, html):
+        """Send one message. Returns (success, error)."""
+        raise NotImplementedError
+
+    def send_batch(self, items):
+        """
+        Send a batch of (user, html) pairs
+
+        Returns:
+            List of (success, error) tuples in the same order as items
+        """
+        results = []
+        message_ids = []
+        for user, html in items:
+            self.message_ids = ()
+            results.append(self.send(user, html))
+            message_ids.append(self.message_ids[0] if self.message_ids else None)
+        self.message_ids = message_ids
+        return results
+
+    def close(self):
+        pass
+
+
+def build_message(sender, to_email, subject, html_content, message_id=None):
+    """MIME message with a single HTML part"""
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart("alternative")
+    msg["From"] = sender
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    if message_id:
+        msg["Message-ID"] = message_id
+    msg.attach(MIMEText(html_content, "html"))
+    return msg
+
+
+def send_smtp_message(smtp_server, sender, to_email, subject, html_content, message_id=None):
+    """Send one HTML email over an open SMTP connection"""
+    try:
+        smtp_server.send_message(
+            build_message(sender, to_email, subject, html_content, message_id)
+        )
+        return True, None
+    except Exception as e:
+        return False, str(e)
+
+
+class SMTPBackend(DeliveryBackend):
+    """Gmail SMTP with an app password (GMAIL_APP_PASSWORD or prompted)"""
+
+    provider = "smtp"
+
+    def __init__(self, sender, subject, host="smtp.gmail.com", port=587):
+        self.sender = sender
+        self.subject = subject
+        self.host = host
+        self.port = port
+        self.server = None
+
+    def describe(self):
+        return f"SMTP {self.host}:{self.port} as {self.sender}"
+
+    def connect(self):
+        import getpass
+        import smtplib
+
+        password = os.getenv("GMAIL_APP_PASSWORD")
+        if not password:
+            password = getpass.getpass("Enter your Gmail App Password (16 characters): ")
+
+        print("🔧 Connecting to Gmail SMTP...")
+        try:
+            self.server = smtplib.SMTP(self.host, self.port)
+            self.server.starttls()
+            self.server.login(self.sender, password)
+            print("✅ Connected to Gmail SMTP\n")
+            return True
+        except Exception as e:
+            print(f"❌ Failed to connect to Gmail: {e}")
+            print("\nMake sure you have:")
+            print("1. Enabled 2-factor authentication")
+            print("2. Generated an App Password (not your regular password)")
+            print("3. Used the correct Gmail address")
+            return False
+
+    def send(self, user, html):
+        from email.utils import make_msgid
+
+        # Set our own Message-ID so the event log can reference the message
+        message_id = make_msgid(domain=self.sender.rpartition("@")[2] or None)
+        self.message_ids = [message_id]
+        return send_smtp_message(
+            self.server, self.sender, user["email"], self.subject, html, message_id
+        )
+
+    def close(self):
+        if self.server:
+            self.server.quit()
+            self.server = None
+
+
+def _resend():
+    """The resend module, configured from RESEND_API_KEY if not already"""
+    import resend
+
+    if not resend.api_key:
+        resend.api_key = os.getenv("RESEND_API_KEY")
+    return resend
+
+
+def _response_id(response):
+    return response.get("id") if isinstance(response, dict) else None
+
+
+class ResendBackend(DeliveryBackend):
+    """Resend API (RESEND_API_KEY), using the batch endpoint for batches"""
+
+    max_batch = 100
+    provider = "resend"
+
+    def __init__(self, subject, sender=RESEND_SENDER):
+        self.subject = subject
+        self.sender = sender
+
+    def describe(self):
+        return "Resend API"
+
+    def _params(self, to_email, html_content):
+        return {
+            "from": self.sender,
+            "to": [to_email],
+            "subject": self.subject,
+            "html": html_content,
+        }
+
+    def connect(self):
+        print("🔧 Using Resend API for email delivery")
+        if not _resend().api_key:
+            print("❌ RESEND_API_KEY not found in environment")
+            return False
+        print("✅ Resend API configured\n")
+        return True
+
+    def deliver(self, to_email, html_content):
+        """Send one message to an address. Returns (success, error)."""
+        resend = _resend()
+        self.message_ids = [None]
+        try:
+            response = resend.Emails.send(self._params(to_email, html_content))
+            self.message_ids = [_response_id(response)]
+            return True, None
+        except Exception as e:
+            return False, str(e)
+
+    def send(self, user, html):
+        return self.deliver(user["email"], html)
+
+    def send_batch(self, items):
+        resend = _resend()
+        self.message_ids = [None] * len(items)
+        try:
+            response = resend.Batch.send(
+                [self._params(user["email"], html) for user, html in items]
+            )
+            data = response.get("data") if isinstance(response, dict) else None
+            if isinstance(data, list) and len(data) == len(items):
+                self.message_ids = [_response_id(entry) for entry in data]
+            # The batch endpoint accepts or rejects the request as a whole
+            return [(True, None)] * len(items)
+        except Exception as e:
+            return [(False, str(e))] * len(items)
+
+
+class OutboxBackend(DeliveryBackend):
+    """Spool messages for later delivery instead of sending them
+
+    Args:
+        spool: Object with ``add(user)`` that stores the message and
+            ``outbox_dir`` for display
+    """
+
+    label = "OUTBOX"
+    action = "Spooling"
+    provider = "outbox"
+    needs_html = False
+    rate_limited = False
+    # Spooled messages have not been delivered yet
+    records_sent = False
+
+    def __init__(self, spool):
+        self.spool = spool
+
+    def describe(self):
+        return f"Outbox {self.spool.outbox_dir}"
+
+    def send(self, user, html):
+        self.spool.add(user)
+        return True, None
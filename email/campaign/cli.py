@@ -0,0 +1,153 @@
+"""
+Command line options shared by every campaign script
+"""
+
+import argparse
+
+
+def _deadline(text):
+    from .schedule import parse_deadline
+
+    try:
+        return parse_deadline(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _domain_limit(text):
+    domain, _, per_minute = text.rpartition("=")
+    try:
+        per_minute = float(per_minute)
+    except ValueError:
+        per_minute = 0
+    if not domain or per_minute <= 0:
+        raise argparse.ArgumentTypeError(
+            f"expected DOMAIN=EMAILS_PER_MINUTE (e.g. gmail.com=20), got {text!r}"
+        )
+    return domain, per_minute
+
+
+def build_parser(description, epilog=""):
+    """Argument parser with the options every campaign understands"""
+    parser = argparse.ArgumentParser(
+        description=description,
+        epilog=epilog,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Preview mode without sending emails"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume from the last checkpoint without refetching Notion (refetches if none)",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="With --resume, also fetch users added to Notion since the checkpoint",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=50,
+        help="Number of emails to process per batch (default: 50)",
+    )
+    parser.add_argument("--gmail-user", type=str, help="Gmail address to send from")
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="store_true",
+        help="Print a line per recipient instead of the refreshing progress line",
+    )
+    parser.add_argument(
+        "--log-file",
+        metavar="PATH",
+        help="Per-recipient JSON-lines event log (default: events-<campaign>.jsonl "
+        "next to the sent ledger)",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        metavar="PATH",
+        help="Write per-stage timings, counters and stats to a JSON file",
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="Serve Prometheus metrics at http://127.0.0.1:PORT/metrics during the run",
+    )
+
+    # Deadline planning
+    parser.add_argument(
+        "--deadline",
+        type=_deadline,
+        metavar="WHEN",
+        help="Finish sending by WHEN (HH:MM today or ISO datetime); overrides the campaign deadline",
+    )
+    parser.add_argument(
+        "--deadline-policy",
+        choices=("warn", "fast"),
+        help="When the deadline would be missed: warn, or switch to fast mode "
+        "(default: the campaign's policy, usually warn)",
+    )
+
+    # Per-recipient-domain limits (TOML campaigns can also set [rate.domains])
+    parser.add_argument(
+        "--domain-limit",
+        type=_domain_limit,
+        action="append",
+        metavar="DOMAIN=N",
+        help="Send at most N emails per minute to DOMAIN (repeatable; '*=N' for every "
+        "other domain); adds to or overrides the campaign's domain limits",
+    )
+    parser.add_argument(
+        "--domain-burst",
+        type=int,
+        metavar="N",
+        help="Emails a domain may receive back to back before its limit applies (default: 1)",
+    )
+
+    # Profiling
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=True,
+        metavar="PREFIX",
+        help="Profile the run with cProfile; writes PREFIX.pstats and PREFIX.txt "
+        "(default prefix: profile-<campaign>-<timestamp>)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=25,
+        metavar="N",
+        help="Functions listed in the --profile text summary (default: 25)",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="With --profile, take tracemalloc snapshots after fetch, filter and every N sends",
+    )
+    parser.add_argument(
+        "--profile-memory-every",
+        type=int,
+        default=100,
+        metavar="N",
+        help="Sends between --profile-memory snapshots (default: 100)",
+    )
+
+    # Speed mode arguments (mutually exclusive)
+    speed_group = parser.add_mutually_exclusive_group()
+    speed_group.add_argument(
+        "--fast",
+        action="store_true",
+        help="Fast mode: render in parallel and send in batches without per-email delay",
+    )
+    speed_group.add_argument(
+        "--slow",
+        action="store_true",
+        help="Slow mode: sequential sending with the campaign rate limit (default)",
+    )
+    return parser
@@ -0,0 +1,804 @@
+"""
+Campaign engine: fetch, filter, render, send and persist for any campaign
+
+Every campaign runs the same pipeline:
+
+  fetch    recipients from the source (or the checkpoint snapshot on --resume)
+  filter   collapse duplicates, drop suppressed and already-sent addresses,
+           then order by the campaign's priority (and round-robin across
+           recipient domains with a domain throttle) and check its deadline
+  render   build each recipient's HTML with the campaign renderer
+  send     through the delivery backend, sequentially with the rate limit
+           (slow mode) or in batches rendered ahead on a thread pool (fast)
+  persist  sent ledger, failed-emails ledger and checkpoint
+
+Live runs show a single refreshing progress line and log every send attempt
+(recipient hash, provider, per-stage timings, message ID, error) to a
+JSON-lines event log written on a background thread (see events.py);
+--verbose prints a line per recipient instead.
+Each stage (and rate-limit waiting) is timed into RunMetrics; the breakdown
+is printed with the summary and written by --metrics-json, and
+--metrics-port serves them live in Prometheus format (see exporter.py).
+--profile wraps the run in cProfile with optional tracemalloc snapshots
+(see profiling.py).
+"""
+
+import sys
+import time
+
+from checkpoint import CampaignCheckpoint, checkpoint_path, describe_checkpoint, utc_now_iso
+from recipients import dedupe_users, filter_unsent
+from sent_ledger import SentLedger
+from suppression import SUPPRESSION_FILE, SuppressionList, filter_suppressed
+
+from .events import EventLog, event_log_path, recipient_hash
+from .exporter import MetricsServer
+from .metrics import RunMetrics
+from .profiling import RunProfiler
+from .progress import ProgressReporter
+from .schedule import DeadlineSchedule
+from .storage import append_failures, failure_record
+from .throttle import DomainThrottle
+
+
+class Campaign:
+    """Definition of one email campaign
+
+    Args:
+        campaign_id: Identifier used for checkpoints and tracking
+        title: Name shown in the "Starting ..." banner
+        source: Callable ``fetch(since=None)`` returning user dicts
+        render: Callable ``render(user)`` returning the HTML body
+        backend: DeliveryBackend used for live runs
+        sent_file: Sent-emails ledger path
+        failed_file: Failed-emails ledger path
+        suppression_file: Suppression list path
+        rate_limit_seconds: Delay between sends in slow mode
+        batch_size: Batch size for fast mode (defaults to --batch-size)
+        batch_delay_seconds: Delay between batches in fast mode
+        max_workers: Render threads in fast mode
+        completed_message: Line printed after the summary
+        sent_ledger: Already opened SentLedger for sent_file (opened by the
+            engine if not given)
+        deadline: Time the sends must finish by (datetime, or a callable
+            returning one when the run starts); see schedule.py
+        deadline_policy: "warn" or "fast" (switch to fast mode) when the
+            deadline would be missed in slow mode
+        prioritize: Callable ``prioritize(users)`` returning the recipients
+            in send order, most valuable first
+        domain_throttle: DomainThrottle with per-recipient-domain limits
+            (see throttle.py)
+    """
+
+    def __init__(
+        self,
+        campaign_id,
+        title,
+        source,
+        render,
+        backend,
+        sent_file,
+        failed_file,
+        suppression_file=SUPPRESSION_FILE,
+        rate_limit_seconds=0,
+        batch_size=None,
+        batch_delay_seconds=0,
+        max_workers=10,
+        completed_message="🎉 Email campaign completed!",
+        sent_ledger=None,
+        deadline=None,
+        deadline_policy="warn",
+        prioritize=None,
+        domain_throttle=None,
+    ):
+        self.campaign_id = campaign_id
+        self.title = title
+        self.source = source
+        self.render = render
+        self.backend = backend
+        self.sent_file = sent_file
+        self.failed_file = failed_file
+        self.suppression_file = suppression_file
+        self.rate_limit_seconds = rate_limit_seconds
+        self.batch_size = batch_size
+        self.batch_delay_seconds = batch_delay_seconds
+        self.max_workers = max_workers
+        self.completed_message = completed_message
+        self.sent_ledger = sent_ledger
+        self.deadline = deadline
+        self.deadline_policy = deadline_policy
+        self.prioritize = prioritize
+        self.domain_throttle = domain_throttle
+
+
+def _render_user(render, user, metrics):
+    """Render one recipient on a worker thread: (html, error, seconds)"""
+    with metrics.time("render") as timer:
+        try:
+            html, error = render(user), None
+        except Exception as e:
+            html, error = None, str(e)
+    if error:
+        metrics.count("render_errors")
+    return html, error, timer.seconds
+
+
+class CampaignRun:
+    """State of a single campaign run"""
+
+    def __init__(self, campaign, args):
+        self.campaign = campaign
+        self.backend = campaign.backend
+        self.args = args
+        self.dry_run = args.dry_run
+        self.fast = getattr(args, "fast", False)
+        self.batch_size = campaign.batch_size or args.batch_size
+        self.domain_throttle = _domain_throttle(campaign, args)
+        if self.backend.max_batch:
+            self.batch_size = min(self.batch_size, self.backend.max_batch)
+        self.label = "DRY RUN" if self.dry_run else self.backend.label
+        self.stats = {
+            "total": 0,
+            "sent": 0,
+            "failed": 0,
+            "skipped": 0,
+            "duplicates": 0,
+            "suppressed": 0,
+        }
+        self.sent_ledger = None
+        self.checkpoint = None
+        self.interrupted = False
+        self.metrics = RunMetrics()
+        self.metrics_file = getattr(args, "metrics_json", None)
+        self.profiler = RunProfiler.from_args(args, campaign.campaign_id)
+        # Dry runs list every recipient; live runs show a progress line
+        self.verbose = self.dry_run or getattr(args, "verbose", False)
+        self.progress = None
+        self.events = None
+        self.provider = self.backend.provider or type(self.backend).__name__
+        self.metrics_port = getattr(args, "metrics_port", None)
+        self.metrics_server = None
+        # Live state for the metrics endpoint
+        self.to_send = 0
+        self.in_flight = 0
+        self.render_ahead = 0
+        self.send_started = None
+        self.event_log_file = getattr(args, "log_file", None) or event_log_path(
+            campaign.sent_file, campaign.campaign_id
+        )
+
+    @property
+    def pauses(self):
+        """Whether the run waits between sends"""
+        return not self.dry_run and self.backend.rate_limited
+
+    # -- stages -----------------------------------------------------------
+
+    def print_header(self):
+        campaign = self.campaign
+        print(f"🚀 Starting {campaign.title}...")
+        print(f"Mode: {self.label}{' - FAST mode' if self.fast else ''}")
+        if not self.dry_run:
+            print(f"Delivery: {self.backend.describe()}")
+        if self.fast:
+            print(f"Batch Size: {self.batch_size} (fast mode)")
+        elif self.pauses:
+            print(f"Rate Limit: {campaign.rate_limit_seconds:g} seconds between emails")
+        if self.domain_throttle and self.pauses:
+            print(f"Domain Limits: {self.domain_throttle.describe()}")
+        print(f"Resume: {'Yes' if self.args.resume else 'No'}\n")
+
+    def fetch(self):
+        """Recipients from the checkpoint snapshot or the source"""
+        campaign = self.campaign
+        self.checkpoint = CampaignCheckpoint(
+            checkpoint_path(campaign.sent_file, campaign.campaign_id),
+            campaign.campaign_id,
+            # Spooling is not delivery: a later real run must still send
+            enabled=not self.dry_run and self.backend.records_sent,
+        )
+        self.resume_state = self.checkpoint.load() if self.args.resume else None
+
+        if self.resume_state:
+            # Restart from the checkpoint snapshot instead of refetching Notion
+            print(f"♻️ Resuming from checkpoint: {describe_checkpoint(self.resume_state)}")
+            users = self.resume_state["remaining"]
+            self.fetched_at = self.resume_state["fetched_at"]
+            if getattr(self.args, "delta", False):
+                self.fetched_at = utc_now_iso()
+                new_users = campaign.source(since=self.resume_state["fetched_at"])
+                print(f"➕ Delta fetch: {len(new_users)} users added since checkpoint")
+                users = users + new_users
+        else:
+            self.fetched_at = utc_now_iso()
+            users = campaign.source()
+        self.stats["total"] = len(users)
+        return users
+
+    def filter(self, users):
+        """Drop duplicate, suppressed and already-sent recipients"""
+        stats = self.stats
+
+        # Collapse duplicate rows for the same mailbox
+        users, stats["duplicates"] = dedupe_users(users)
+        if stats["duplicates"]:
+            print(
+                f"🧹 Collapsed {stats['duplicates']} duplicate rows, {len(users)} unique recipients"
+            )
+
+        # Drop bounced, complained and unsubscribed addresses
+        users, stats["suppressed"] = filter_suppressed(
+            users, SuppressionList.load(self.campaign.suppression_file)
+        )
+        if stats["suppressed"]:
+            print(f"🚫 Excluded {stats['suppressed']} suppressed addresses")
+
+        # Open the sent ledger index (the ledger is only parsed if the index is stale)
+        self.sent_ledger = self.campaign.sent_ledger
+        if self.sent_ledger is None:
+            self.sent_ledger = SentLedger(self.campaign.sent_file)
+        if len(self.sent_ledger):
+            print(f"📌 Found {len(self.sent_ledger)} previously sent emails")
+
+        filtered_users = filter_unsent(users, self.sent_ledger)
+        stats["skipped"] = len(users) - len(filtered_users)
+
+        print(
+            f"📊 Filtering: {stats['skipped']} already sent, {len(filtered_users)} to process\n"
+        )
+        if self.campaign.prioritize and filtered_users:
+            filtered_users = self.campaign.prioritize(filtered_users)
+        if self.domain_throttle and filtered_users:
+            filtered_users = self.domain_throttle.order(filtered_users)
+        return filtered_users
+
+    def plan_deadline(self, users):
+        """Check the campaign deadline and switch to fast mode if its policy says so"""
+        campaign = self.campaign
+        deadline = getattr(self.args, "deadline", None) or campaign.deadline
+        if callable(deadline):
+            deadline = deadline()
+        if deadline is None:
+            return None
+        schedule = DeadlineSchedule(
+            deadline,
+            len(users),
+            rate_limit_seconds=campaign.rate_limit_seconds if self.pauses else 0,
+            batch_size=self.batch_size,
+            batch_delay_seconds=campaign.batch_delay_seconds if self.pauses else 0,
+        )
+        policy = getattr(self.args, "deadline_policy", None) or campaign.deadline_policy
+        # An explicit --slow is respected; the plan still warns
+        if getattr(self.args, "slow", False):
+            policy = "warn"
+        fast, messages = schedule.choose(self.fast, policy)
+        for line in messages:
+            print(line)
+        print()
+        if fast and not self.fast:
+            self.fast = True
+            self.metrics.count("deadline_fast_switch")
+        return schedule
+
+    def record_success(self, user, position=None, timings=None, **fields):
+        self.stats["sent"] += 1
+        with self.metrics.time("persist") as persist:
+            if self.backend.records_sent:
+                self.sent_ledger.record(user["email"])
+            if position is not None:
+                self.checkpoint.advance(position, sent=True)
+        self.log_event("sent", user, position, timings, persist=persist.seconds, **fields)
+        if self.progress:
+            self.progress.update(sent=1)
+
+    def record_failure(self, user, error, position=None, timings=None, event="failed", **fields):
+        self.stats["failed"] += 1
+        with self.metrics.time("persist") as persist:
+            self.checkpoint.add_retry(user, error)
+            if position is not None:
+                self.checkpoint.advance(position)
+        self.log_event(event, user, position, timings, persist=persist.seconds, error=error, **fields)
+        if self.progress:
+            self.progress.update(failed=1)
+            self.progress.message(f"❌ {user['email']} - {error}")
+
+    def log_event(self, event, user, position=None, timings=None, persist=None, **fields):
+        """Per-recipient entry in the event log (live runs only)"""
+        if self.events is None:
+            return
+        if position is not None:
+            fields["position"] = position
+        timings = dict(timings or {})
+        if persist is not None:
+            timings["persist"] = persist
+        if timings:
+            fields["timings"] = {stage: round(s, 6) for stage, s in timings.items()}
+        if fields.get("message_id") is None:
+            fields.pop("message_id", None)
+        self.events.record(
+            event, recipient=recipient_hash(user["email"]), provider=self.provider, **fields
+        )
+
+    def last_message_id(self, index=0):
+        """Provider message ID of an item in the backend's last send call"""
+        message_ids = self.backend.message_ids
+        return message_ids[index] if index < len(message_ids) else None
+
+    def live_snapshot(self):
+        """Counters and gauges read by the metrics endpoint thread"""
+        sent, failed = self.stats["sent"], self.stats["failed"]
+        rate = 0.0
+        if self.send_started is not None:
+            elapsed = time.monotonic() - self.send_started
+            rate = (sent + failed) * 60 / elapsed if elapsed > 0 else 0.0
+        events = self.events
+        return {
+            "sent": sent,
+            "failed": failed,
+            "in_flight": self.in_flight,
+            "rate_per_minute": round(rate, 2),
+            "queues": {
+                "recipients": max(0, self.to_send - sent - failed),
+                "rendered": self.render_ahead,
+                "event_log": events.backlog if events is not None else 0,
+            },
+            "pages_fetched": getattr(self.campaign.source, "pages_fetched", 0),
+        }
+
+    def start_metrics_server(self):
+        if self.metrics_port is None:
+            return
+        server = MetricsServer(self, self.metrics_port)
+        try:
+            server.start()
+        except OSError as e:
+            # Monitoring is optional; never abort a send over it
+            print(f"⚠️ Metrics endpoint not started on port {self.metrics_port}: {e}")
+            return
+        self.metrics_server = server
+
+    def stop_metrics_server(self):
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+    def start_progress(self, total):
+        """Status line for the send stage, unless printing per recipient"""
+        if not self.verbose:
+            # "Sending to" / "Spooling" -> "Sending" / "Spooling"
+            action = self.backend.action.removesuffix(" to")
+            self.progress = ProgressReporter(total, action=action)
+
+    def stop_progress(self):
+        if self.progress:
+            self.progress.finish()
+            self.progress = None
+
+    def mark(self, label):
+        """Stage boundary: memory snapshot when profiling with --profile-memory"""
+        if self.profiler:
+            self.profiler.snapshot(label)
+
+    def count_sends(self, count=1):
+        if self.profiler:
+            self.profiler.sent(count)
+
+    def wait(self, seconds):
+        with self.metrics.time("wait"):
+            time.sleep(seconds)
+
+    def throttle(self, users):
+        """Wait until every recipient's domain has a send slot (domain throttle)"""
+        throttle = self.domain_throttle
+        if throttle is None or not self.pauses:
+            return
+        self.wait_for_domains(max(throttle.reserve(user["email"]) for user in users))
+
+    def wait_for_domains(self, delay):
+        if delay > 0:
+            self.metrics.count("domain_waits")
+            if self.progress:
+                self.progress.waiting(delay)
+            self.wait(delay)
+
+    def throttled_waves(self, items):
+        """
+        The parts of a batch to send in turn, each once its recipients'
+        domains have send slots (the whole batch without a domain throttle)
+        """
+        throttle = self.domain_throttle
+        if throttle is None or not self.pauses:
+            yield items
+            return
+        waited = 0.0
+        for delay, wave in throttle.schedule(items, email=lambda item: item[0]["email"]):
+            # Slots are relative to the reservation; time spent sending only
+            # makes each wave later than its tokens, never earlier
+            self.wait_for_domains(delay - waited)
+            waited = max(waited, delay)
+            yield wave
+
+    def send_sequential(self, users):
+        """Slow mode: one recipient at a time with the rate limit between sends"""
+        campaign = self.campaign
+        backend = self.backend
+        metrics = self.metrics
+        verbose = self.verbose
+        total = len(users)
+
+        for i, user in enumerate(users):
+            counter = f"[{i+1}/{total}]"
+
+            try:
+                if self.dry_run:
+                    print(f"📧 {counter} Would send to: {user['email']}")
+                    self.stats["sent"] += 1
+                else:
+                    html_content = None
+                    timings = {}
+                    if backend.needs_html:
+                        with metrics.time("render") as timer:
+                            html_content = campaign.render(user)
+                        timings["render"] = timer.seconds
+
+                    self.throttle([user])
+                    if verbose:
+                        print(f"📧 {counter} {backend.action} {user['email']}...", end=" ", flush=True)
+                    backend.message_ids = ()
+                    self.in_flight = 1
+                    try:
+                        with metrics.time("send") as timer:
+                            success, error = backend.send(user, html_content)
+                    finally:
+                        self.in_flight = 0
+                    timings["send"] = timer.seconds
+                    metrics.count("send_calls")
+
+                    if success:
+                        if verbose:
+                            print("✅")
+                        self.record_success(
+                            user, i + 1, timings, message_id=self.last_message_id()
+                        )
+                    else:
+                        if verbose:
+                            print(f"❌ ({error})")
+                        with metrics.time("persist"):
+                            append_failures(campaign.failed_file, [failure_record(user, error)])
+                        self.record_failure(user, error, i + 1, timings)
+
+                # Rate limiting
+                if i < total - 1 and self.pauses and campaign.rate_limit_seconds:
+                    if self.progress:
+                        self.progress.waiting(campaign.rate_limit_seconds)
+                    elif campaign.rate_limit_seconds >= 10:
+                        print(f"⏳ Waiting {campaign.rate_limit_seconds:g} seconds before next email...")
+                    self.wait(campaign.rate_limit_seconds)
+
+            except KeyboardInterrupt:
+                self.interrupt()
+                break
+            except Exception as e:
+                if verbose:
+                    print(f"❌ Error processing {user['email']}: {e}")
+                self.record_failure(user, str(e), i + 1)
+            self.count_sends()
+
+    def send_batched(self, users):
+        """
+        Fast mode: render batches on a thread pool and send them in batches
+
+        The next batch is rendered while the current one is being sent, so
+        render time overlaps provider latency.
+        """
+        campaign = self.campaign
+        backend = self.backend
+        total = len(users)
+        batch_size = max(1, self.batch_size)
+        batches = [users[i:i + batch_size] for i in range(0, total, batch_size)]
+        render = campaign.render if backend.needs_html and not self.dry_run else None
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        print("🚀 Fast mode: parallel rendering and batched delivery")
+        print(f"📊 Processing {total} emails in batches of {batch_size}\n")
+
+        try:
+            with ThreadPoolExecutor(max_workers=campaign.max_workers) as executor:
+
+                def submit(batch):
+                    if render is None:
+                        return None
+                    return [
+                        executor.submit(_render_user, render, user, self.metrics) for user in batch
+                    ]
+
+                pending = submit(batches[0]) if batches else None
+                position = 0
+                for batch_num, batch_users in enumerate(batches, 1):
+                    rendered = [f.result() for f in pending] if pending else None
+                    # Render the next batch while this one is sent
+                    pending = submit(batches[batch_num]) if batch_num < len(batches) else None
+                    self.render_ahead = len(rendered or ()) + len(pending or ())
+
+                    if self.verbose:
+                        print(
+                            f"📦 Processing batch {batch_num}/{len(batches)} "
+                            f"({len(batch_users)} emails)..."
+                        )
+                    position += len(batch_users)
+
+                    if self.dry_run:
+                        for user in batch_users:
+                            print(f"   📧 Would send to: {user['email']}")
+                        self.stats["sent"] += len(batch_users)
+                        self.count_sends(len(batch_users))
+                        continue
+
+                    self.send_batch(batch_users, rendered)
+                    self.count_sends(len(batch_users))
+                    with self.metrics.time("persist"):
+                        self.checkpoint.advance(position, sent=True)
+                        self.checkpoint.save()
+
+                    # Delay between batches (except for last batch)
+                    if batch_num < len(batches) and self.pauses and campaign.batch_delay_seconds:
+                        self.wait(campaign.batch_delay_seconds)
+        except KeyboardInterrupt:
+            self.interrupt()
+
+    def send_batch(self, batch_users, rendered):
+        """Send one rendered batch and persist its results"""
+        verbose = self.verbose
+        failures = []
+        items = []
+        for i, user in enumerate(batch_users):
+            html_content, error, seconds = rendered[i] if rendered else (None, None, None)
+            if error:
+                if verbose:
+                    print(f"   ⚠️ Failed to generate HTML for {user['email']}: {error}")
+                failures.append(failure_record(user, "HTML generation failed"))
+                self.record_failure(
+                    user,
+                    "HTML generation failed",
+                    timings={"render": seconds},
+                    event="render_failed",
+                    detail=error,
+                )
+            else:
+                items.append((user, html_content, seconds))
+
+        self.render_ahead -= len(batch_users)
+        try:
+            if items and verbose:
+                print(f"   📤 Sending {len(items)} emails...")
+            # A domain throttle may split the batch, waiting between the parts
+            for wave in self.throttled_waves(items) if items else ():
+                failures.extend(self.send_wave(wave))
+        finally:
+            with self.metrics.time("persist"):
+                append_failures(self.campaign.failed_file, failures)
+
+    def send_wave(self, items):
+        """Send ``(user, html, render seconds)`` items in one call; returns the failures"""
+        verbose = self.verbose
+        failures = []
+        self.backend.message_ids = ()
+        self.in_flight = len(items)
+        try:
+            with self.metrics.time("send") as timer:
+                results = self.backend.send_batch([(user, html) for user, html, _ in items])
+        finally:
+            self.in_flight = 0
+        self.metrics.count("batches")
+        for i, ((user, _, render_seconds), (success, error)) in enumerate(zip(items, results)):
+            # The send time is the whole batch call, shared by its items
+            timings = {"send": timer.seconds}
+            if render_seconds is not None:
+                timings["render"] = render_seconds
+            if success:
+                self.record_success(
+                    user, timings=timings, batch=len(items), message_id=self.last_message_id(i)
+                )
+                if verbose:
+                    print(f"   ✅ {user['email']}")
+            else:
+                error = error or "Unknown error"
+                failures.append(failure_record(user, error))
+                self.record_failure(user, error, timings=timings, batch=len(items))
+                if verbose:
+                    print(f"   ❌ {user['email']} - {error}")
+        return failures
+
+    def interrupt(self):
+        self.checkpoint.save()
+        self.interrupted = True
+        self.stop_progress()
+        print("\n\n⚠️ Campaign interrupted by user")
+        print("💡 Use --resume flag to continue from where you left off")
+
+    def print_summary(self, duration):
+        stats = self.stats
+        print(f"\n{'='*50}")
+        print("📊 Campaign Summary")
+        print(f"{'='*50}")
+        print(f"Mode: {self.label}{' - FAST' if self.fast else ''}")
+        print(f"Total Users: {stats['total']}")
+        print(f"Duplicates Removed: {stats['duplicates']}")
+        print(f"Suppressed: {stats['suppressed']}")
+        print(f"Already Sent: {stats['skipped']}")
+        print(f"Processed: {stats['sent'] + stats['failed']}")
+        print(f"Successful: {stats['sent']}")
+        print(f"Failed: {stats['failed']}")
+        print(f"Duration: {duration/60:.1f} minutes")
+        breakdown = self.metrics.summary_lines()
+        if breakdown:
+            print("\n⏱️  Stage breakdown:")
+            for line in breakdown:
+                print(f"   {line}")
+        print(f"{'='*50}")
+        print(f"\n{self.campaign.completed_message}")
+
+    # -- driver -----------------------------------------------------------
+
+    def run(self):
+        campaign = self.campaign
+        self.print_header()
+        start_time = time.time()
+        metrics = self.metrics
+        if self.profiler:
+            self.profiler.start()
+        self.start_metrics_server()
+
+        try:
+            with metrics.time("fetch"):
+                users = self.fetch()
+            self.mark("after fetch")
+            if not users:
+                print("❌ No users found to process")
+                return self.stats
+
+            with metrics.time("filter"):
+                filtered_users = self.filter(users)
+            self.mark("after filter")
+            if not filtered_users:
+                print("✅ All users have already received emails!")
+                return self.stats
+            self.plan_deadline(filtered_users)
+
+            if not self.dry_run and not self.backend.connect():
+                return self.stats
+
+            # Snapshot recipients so an interrupted run can resume without Notion
+            interval = campaign.batch_delay_seconds if self.fast else campaign.rate_limit_seconds
+            with metrics.time("persist"):
+                self.checkpoint.begin(filtered_users, self.fetched_at, interval, self.resume_state)
+            if not self.dry_run:
+                with metrics.time("wait"):
+                    self.checkpoint.wait_for_rate_limit()
+                self.open_event_log(len(filtered_users))
+
+            self.to_send = len(filtered_users)
+            self.send_started = time.monotonic()
+            self.start_progress(len(filtered_users))
+            if self.fast:
+                self.send_batched(filtered_users)
+            else:
+                self.send_sequential(filtered_users)
+            self.stop_progress()
+
+            with metrics.time("persist"):
+                if not self.interrupted:
+                    self.checkpoint.finish()
+                self.close_ledger()
+
+            if not self.dry_run:
+                self.backend.close()
+
+            self.print_summary(time.time() - start_time)
+            return self.stats
+
+        except Exception as e:
+            print(f"\n❌ Campaign failed: {e}")
+            sys.exit(1)
+        finally:
+            self.stop_progress()
+            self.close_event_log()
+            self.close_ledger()
+            self.stop_metrics_server()
+            if self.profiler:
+                self.profiler.stop()
+            if self.metrics_file:
+                self.write_metrics(time.time() - start_time)
+
+    def open_event_log(self, total):
+        self.events = EventLog(self.event_log_file, self.campaign.campaign_id)
+        self.events.record("run_started", total=total, mode=self.label, fast=self.fast)
+        print(f"📝 Per-recipient log: {self.events.path}\n")
+
+    def close_event_log(self):
+        if self.events is not None:
+            self.events.record(
+                "run_finished",
+                interrupted=self.interrupted,
+                dropped=self.events.dropped,
+                **self.stats,
+            )
+            self.events.close()
+            self.events = None
+
+    def close_ledger(self):
+        if self.sent_ledger is not None:
+            self.sent_ledger.close()
+            self.sent_ledger = None
+
+    def write_metrics(self, duration):
+        """Write stage timings and stats to --metrics-json"""
+        self.metrics.write_json(
+            self.metrics_file,
+            campaign=self.campaign.campaign_id,
+            mode=self.label,
+            fast=self.fast,
+            interrupted=self.interrupted,
+            duration_seconds=round(duration, 3),
+            stats=self.stats,
+        )
+        print(f"📈 Metrics written to {self.metrics_file}")
+
+
+def _domain_throttle(campaign, args):
+    """The campaign's domain throttle with --domain-limit/--domain-burst applied"""
+    throttle = campaign.domain_throttle
+    limits = getattr(args, "domain_limit", None)
+    burst = getattr(args, "domain_burst", None)
+    if not limits and not burst:
+        return throttle
+    if throttle is None and not limits:
+        return None
+    base = throttle.limits if throttle else {}
+    return DomainThrottle(
+        {**base, **dict(limits or ())},
+        burst=burst or (throttle.burst if throttle else 1),
+    )
+
+
+def run_campaign(campaign, args):
+    """Run a campaign with parsed command line arguments; returns the stats"""
+    return CampaignRun(campaign, args).run()
+
+
+def send_test_email(campaign, user, sender):
+    """Render and send a single test email through the campaign backend"""
+    start_time = time.time()
+    test_email = user["email"]
+    backend = campaign.backend
+
+    try:
+        print(f"📧 Sending test email to: {test_email}")
+        if not backend.connect():
+            return
+
+        html_content = campaign.render(user) if backend.needs_html else None
+
+        print(f"📧 Sending to {test_email}...", end=" ", flush=True)
+        success, error = backend.send(user, html_content)
+
+        if success:
+            print("✅")
+            print("✅ Test email sent successfully!")
+            print(f"   To: {test_email}")
+            print(f"   From: {sender}")
+            print(f"   Subject: {getattr(backend, 'subject', '')}")
+        else:
+            print(f"❌ ({error})")
+            print(f"❌ Failed to send test email: {error}")
+
+        backend.close()
+
+        duration = time.time() - start_time
+        print(f"\n⏱️  Duration: {duration:.1f} seconds")
+        print("\n🎉 Test completed!")
+
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,267 @@
+"""
+Structured per-recipient event log
+
+Live runs append one JSON object per line to ``events-<campaign>.jsonl``
+next to the sent ledger (or ``--log-file PATH``). Every send attempt is
+recorded with:
+
+  event      sent, failed or render_failed
+  recipient  hash of the address (the log holds no email addresses)
+  provider   backend that handled it (smtp, resend, outbox, ...)
+  position   place in the run's recipient list (slow mode)
+  timings    seconds spent rendering, sending and persisting
+  message_id provider message ID, when the provider returns one
+  error      failure reason
+
+Each run is framed by ``run_started`` and ``run_finished`` events.
+
+``record()`` only puts the event on a bounded queue; a background thread
+serialises and writes it through a large file buffer, flushing whenever the
+queue drains. Logging therefore never blocks the send loop: if the writer
+falls ``queue_size`` events behind, new events are dropped and counted, and
+the count is reported in ``run_finished`` and on close.
+
+``python -m campaign.events LOG`` aggregates a log into throughput-over-time
+and error-rate tables (see ``summarize``).
+"""
+
+import argparse
+import hashlib
+import json
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+BUFFER_SIZE = 64 * 1024
+QUEUE_SIZE = 10000
+# Events that count as a send attempt in summaries
+ATTEMPTS = ("sent", "failed", "render_failed")
+# Empty throughput buckets are only filled in up to this many rows
+MAX_BUCKETS = 10000
+
+_STOP = object()
+
+
+def event_log_path(ledger_file, campaign):
+    """Event log for a campaign, stored next to its sent ledger"""
+    return Path(ledger_file).with_name(f"events-{campaign}.jsonl")
+
+
+def recipient_hash(email):
+    """Stable short hash of an address, for correlating events without the address"""
+    return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:16]
+
+
+class EventLog:
+    """JSON-lines event writer with a background thread and bounded queue
+
+    Args:
+        path: Log file (appended to)
+        campaign_id: Stamped on every event; None for logs that record the
+            campaign per event (the tracking pixel server)
+        queue_size: Events that may wait for the writer before new ones are
+            dropped
+    """
+
+    def __init__(self, path, campaign_id=None, queue_size=QUEUE_SIZE):
+        self.path = Path(path)
+        self.campaign_id = campaign_id
+        self.dropped = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8", buffering=BUFFER_SIZE)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._writer, name="event-log", daemon=True)
+        self._thread.start()
+
+    def record(self, event, **fields):
+        """Queue an event; never blocks (drops and counts if the queue is full)"""
+        record = {"ts": round(time.time(), 3), "event": event}
+        if self.campaign_id is not None:
+            record["campaign"] = self.campaign_id
+        record.update(fields)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    @property
+    def backlog(self):
+        """Events queued but not yet written"""
+        return self._queue.qsize()
+
+    def _writer(self):
+        while True:
+            item = self._queue.get()
+            lines = []
+            # Drain whatever else is waiting and write it in one go
+            while item is not _STOP:
+                lines.append(json.dumps(item) + "\n")
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if lines:
+                self._write(lines)
+            if item is _STOP:
+                return
+
+    def _write(self, lines):
+        self._file.writelines(lines)
+        self._file.flush()
+
+    def close(self):
+        """Write everything queued, then stop the writer and close the file"""
+        if self._file is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._file.close()
+        self._file = None
+        if self.dropped:
+            print(f"⚠️ Event log fell behind: {self.dropped} events dropped")
+
+
+# -- reading --------------------------------------------------------------
+
+
+def read_events(path):
+    """Yield the events in a JSON-lines log, skipping partial lines"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A crashed run can leave a truncated last line
+                continue
+
+
+def summarize(events, bucket_seconds=60, run="last"):
+    """
+    Aggregate send attempts into throughput and error tables
+
+    Args:
+        events: Iterable of event dicts (from read_events)
+        bucket_seconds: Width of each throughput bucket
+        run: "last" for the most recent run in the log, "all" for every run
+
+    Returns:
+        Dict with ``throughput`` rows (bucket start, sent, failed, per
+        minute), ``errors`` rows (error, count, share of attempts) and
+        totals, error rate and per-provider counts
+
+    Raises:
+        ValueError: If bucket_seconds is not positive
+    """
+    if bucket_seconds <= 0:
+        raise ValueError(f"bucket_seconds must be positive, got {bucket_seconds}")
+    attempts = []
+    for event in events:
+        if event.get("event") == "run_started" and run == "last":
+            attempts = []
+        elif event.get("event") in ATTEMPTS:
+            attempts.append(event)
+
+    buckets = {}
+    errors = Counter()
+    providers = Counter()
+    sent = failed = 0
+    for event in attempts:
+        start = int(event["ts"] // bucket_seconds * bucket_seconds)
+        row = buckets.setdefault(start, [0, 0])
+        providers[event.get("provider") or "unknown"] += 1
+        if event["event"] == "sent":
+            sent += 1
+            row[0] += 1
+        else:
+            failed += 1
+            row[1] += 1
+            errors[event.get("error") or "Unknown error"] += 1
+
+    total = sent + failed
+    starts = sorted(buckets)
+    if starts and (starts[-1] - starts[0]) // bucket_seconds < MAX_BUCKETS:
+        # Include empty buckets so stalls show up as zero rows
+        starts = range(starts[0], starts[-1] + bucket_seconds, bucket_seconds)
+    throughput = []
+    for start in starts:
+        bucket_sent, bucket_failed = buckets.get(start, (0, 0))
+        throughput.append(
+            {
+                "start": start,
+                "sent": bucket_sent,
+                "failed": bucket_failed,
+                "per_minute": round((bucket_sent + bucket_failed) * 60 / bucket_seconds, 1),
+            }
+        )
+    return {
+        "attempts": total,
+        "sent": sent,
+        "failed": failed,
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        "providers": dict(providers),
+        "throughput": throughput,
+        "errors": [
+            {"error": error, "count": count, "share": round(count / total, 4)}
+            for error, count in errors.most_common()
+        ],
+    }
+
+
+def format_summary(summary):
+    """Printable tables for a summarize() result"""
+    lines = [
+        f"📊 {summary['attempts']} attempts: {summary['sent']} sent, {summary['failed']} failed "
+        f"({summary['error_rate']:.1%} error rate)",
+    ]
+    if summary["providers"]:
+        lines.append("   " + ", ".join(f"{p}={n}" for p, n in sorted(summary["providers"].items())))
+    if summary["throughput"]:
+        lines += ["", "Throughput", f"{'time (UTC)':<20} {'sent':>6} {'failed':>6} {'/min':>8}"]
+        for row in summary["throughput"]:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(row["start"]))
+            lines.append(f"{stamp:<20} {row['sent']:>6} {row['failed']:>6} {row['per_minute']:>8}")
+    if summary["errors"]:
+        lines += ["", "Errors", f"{'count':>6} {'share':>7}  error"]
+        for row in summary["errors"]:
+            lines.append(f"{row['count']:>6} {row['share']:>7.1%}  {row['error']}")
+    return "\n".join(lines)
+
+
+def _bucket(text):
+    try:
+        seconds = int(text)
+    except ValueError:
+        seconds = 0
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError(f"expected a positive number of seconds, got {text!r}")
+    return seconds
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Summarise a campaign event log")
+    parser.add_argument("log", help="Event log (events-<campaign>.jsonl)")
+    parser.add_argument("--bucket", type=_bucket, default=60, help="Throughput bucket in seconds (default: 60)")
+    parser.add_argument("--all-runs", action="store_true", help="Aggregate every run in the log, not just the last")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    summary = summarize(
+        read_events(args.log),
+        bucket_seconds=args.bucket,
+        run="all" if args.all_runs else "last",
+    )
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_summary(summary))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
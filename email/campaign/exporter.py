@@ -0,0 +1,168 @@
+"""
+Prometheus-format metrics endpoint for long campaign runs
+
+With ``--metrics-port PORT`` the run serves ``http://127.0.0.1:PORT/metrics``
+from a stdlib ``http.server`` on a daemon thread, so a slow-mode campaign
+that runs for hours can be scraped or simply curled:
+
+  campaign_emails_sent_total          counter
+  campaign_emails_failed_total        counter
+  campaign_in_flight                  gauge, messages inside a provider call
+  campaign_send_rate_per_minute       gauge, attempts per minute so far
+  campaign_queue_depth{queue=...}     gauge: recipients still to send,
+                                      rendered messages waiting for the
+                                      sender, event_log lines not yet written
+  campaign_source_pages_fetched_total counter, Notion pages read
+  campaign_stage_seconds{stage=...}   histogram per stage; stage="send" is
+                                      the provider latency
+
+Each scrape reads the live CampaignRun, so the send loop does no extra work.
+"""
+
+import threading
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _bound(bound):
+    return f"{bound:g}"
+
+
+class PrometheusText:
+    """Builder for the Prometheus text exposition format"""
+
+    def __init__(self, **common):
+        self.common = common
+        self.lines = []
+
+    def metric(self, name, kind, help_text, samples):
+        """Add a metric; samples are (labels dict, value) pairs"""
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(**self.common, **labels)} {value:g}")
+
+    def histogram(self, name, help_text, histograms):
+        """Add histograms keyed by label value dicts (metrics.Histogram objects)"""
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in histograms:
+            labels = {**self.common, **labels}
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                self.lines.append(
+                    f"{name}_bucket{_labels(**labels, le=_bound(bound))} {cumulative}"
+                )
+            self.lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {histogram.count}')
+            self.lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum:g}")
+            self.lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+
+    def render(self):
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(run):
+    """Prometheus text for the current state of a CampaignRun"""
+    snapshot = run.live_snapshot()
+    text = PrometheusText(campaign=run.campaign.campaign_id)
+    text.metric(
+        "campaign_emails_sent_total", "counter", "Emails sent", [({}, snapshot["sent"])]
+    )
+    text.metric(
+        "campaign_emails_failed_total", "counter", "Emails that failed", [({}, snapshot["failed"])]
+    )
+    text.metric(
+        "campaign_in_flight",
+        "gauge",
+        "Messages currently inside a provider call",
+        [({}, snapshot["in_flight"])],
+    )
+    text.metric(
+        "campaign_send_rate_per_minute",
+        "gauge",
+        "Send attempts per minute since sending started",
+        [({}, snapshot["rate_per_minute"])],
+    )
+    text.metric(
+        "campaign_queue_depth",
+        "gauge",
+        "Items waiting in each queue",
+        [({"queue": name}, depth) for name, depth in snapshot["queues"].items()],
+    )
+    text.metric(
+        "campaign_source_pages_fetched_total",
+        "counter",
+        "Pages read from the recipient source (Notion)",
+        [({}, snapshot["pages_fetched"])],
+    )
+    text.histogram(
+        "campaign_stage_seconds",
+        "Time per pipeline stage; stage=send is provider latency",
+        [({"stage": stage}, histogram) for stage, histogram in run.metrics.histograms()],
+    )
+    return text.render()
+
+
+class MetricsServer:
+    """Background HTTP server exposing /metrics for one run"""
+
+    def __init__(self, run, port, host="127.0.0.1"):
+        self.run = run
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
+
+    def start(self):
+        # Imported here so runs without --metrics-port never load http.server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        run = self.run
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = render_metrics(run).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes would otherwise interleave with the progress line
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        # Port 0 picks a free port
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        )
+        self._thread.start()
+        print(f"📡 Metrics at {self.url}")
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
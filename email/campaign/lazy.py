@@ -0,0 +1,49 @@
+"""
+Deferred imports for provider and client libraries
+
+``resend``, ``notion_client`` and ``requests`` together cost ~250ms to
+import, which every script used to pay before parsing ``--help``. The
+helpers here locate the package up front (so a missing dependency is still
+reported at startup) but only execute it on first attribute access or call.
+Module-level names stay patchable: ``mocker.patch.object(auto_resend_news.resend,
+"api_key", ...)`` loads the real module and patches it as before.
+"""
+
+import importlib
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Return ``name`` as a module that is executed on first attribute access"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class LazyAttribute:
+    """Callable stand-in for ``module.attr``, imported on first call"""
+
+    def __init__(self, module_name, attr):
+        if importlib.util.find_spec(module_name) is None:
+            raise ModuleNotFoundError(f"No module named {module_name!r}", name=module_name)
+        self.module_name = module_name
+        self.attr = attr
+
+    def resolve(self):
+        return getattr(importlib.import_module(self.module_name), self.attr)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<lazy {self.module_name}.{self.attr}>"
@@ -0,0 +1,172 @@
+"""
+Per-stage timing for campaign runs
+
+The engine times every fetch, filter, render, send, persist and rate-limit
+wait into a fixed-bucket latency histogram, and counts batches, renders and
+provider calls. ``summary_lines()`` is printed with the campaign summary and
+``--metrics-json PATH`` writes ``to_dict()`` so runs can be compared.
+
+Buckets are cumulative-friendly upper bounds in seconds, so a histogram can
+be exported as-is to a Prometheus-style text format (see exporter.py). Observations may come
+from the fast-mode render threads, hence the lock.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from .storage import save_json_file
+
+STAGES = ("fetch", "filter", "render", "send", "persist", "wait")
+
+# Upper bounds in seconds; the final bucket is +Inf
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class Histogram:
+    """Latency histogram with fixed bucket bounds"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def observe(self, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (capped at max)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def copy(self):
+        other = Histogram(self.buckets)
+        other.counts = list(self.counts)
+        other.count = self.count
+        other.sum = self.sum
+        other.min = self.min
+        other.max = self.max
+        return other
+
+    def to_dict(self):
+        bounds = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "min": round(self.min or 0.0, 6),
+            "max": round(self.max, 6),
+            "p50": round(self.quantile(0.5), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "buckets": dict(zip(bounds, self.counts)),
+        }
+
+
+def format_seconds(seconds):
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+class StageTimer:
+    """Elapsed time of one ``RunMetrics.time()`` block"""
+
+    seconds = 0.0
+
+
+class RunMetrics:
+    """Stage histograms and counters for one campaign run"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.stages = {stage: Histogram(buckets) for stage in STAGES}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        """
+        Time the enclosed block into ``stage`` (also when it raises)
+
+        Yields a StageTimer whose ``seconds`` is set when the block exits.
+        """
+        timer = StageTimer()
+        start = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            timer.seconds = time.perf_counter() - start
+            self.observe(stage, timer.seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def histograms(self):
+        """Consistent copies of the stage histograms that have observations"""
+        with self._lock:
+            return [
+                (stage, histogram.copy())
+                for stage, histogram in self.stages.items()
+                if histogram.count
+            ]
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "stages": {
+                    stage: histogram.to_dict()
+                    for stage, histogram in self.stages.items()
+                    if histogram.count
+                },
+                "counters": dict(self.counters),
+            }
+
+    def summary_lines(self):
+        """Breakdown lines for the campaign summary"""
+        lines = []
+        for stage, histogram in self.stages.items():
+            if not histogram.count:
+                continue
+            line = f"{stage:<8} {histogram.count:>6} × {format_seconds(histogram.sum):>8} total"
+            if histogram.count > 1:
+                line += (
+                    f"  p50 {format_seconds(histogram.quantile(0.5))}"
+                    f"  p95 {format_seconds(histogram.quantile(0.95))}"
+                    f"  max {format_seconds(histogram.max)}"
+                )
+            lines.append(line)
+        if self.counters:
+            lines.append(", ".join(f"{k}={v}" for k, v in sorted(self.counters.items())))
+        return lines
+
+    def write_json(self, path, **info):
+        """Write the metrics (plus run info such as stats) to a JSON file"""
+        save_json_file(path, {**info, **self.to_dict()})
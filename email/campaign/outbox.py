@@ -0,0 +1,83 @@
+"""
+Outbox spool: messages stored as one shared body plus per-recipient refs
+
+Layout of the outbox directory:
+  bodies/<body_id>.json  - template chunks and slots, written once
+  messages.jsonl         - one line per recipient: to, subject, body ref, vars
+
+A 300-recipient run therefore stores the ~15KB template once rather than
+300 full copies. ``expand_outbox`` rebuilds the full HTML for delivery.
+"""
+
+import json
+from pathlib import Path
+
+from .storage import load_json_file, save_json_file
+
+
+class Outbox:
+    """Append-only spool of messages referencing shared template bodies"""
+
+    def __init__(self, outbox_dir):
+        self.outbox_dir = Path(outbox_dir)
+        self.bodies_dir = self.outbox_dir / "bodies"
+        self.messages_file = self.outbox_dir / "messages.jsonl"
+        self.bodies_dir.mkdir(parents=True, exist_ok=True)
+        self._written_bodies = set()
+
+    def _write_body(self, template):
+        if template.body_id in self._written_bodies:
+            return
+        body_file = self.bodies_dir / f"{template.body_id}.json"
+        if not body_file.exists():
+            save_json_file(
+                body_file, {"chunks": list(template.chunks), "slots": list(template.slots)}
+            )
+        self._written_bodies.add(template.body_id)
+
+    def add_message(self, to_email, subject, template, values):
+        """Spool one message as a reference to the shared template body"""
+        self._write_body(template)
+        record = {
+            "to": to_email,
+            "subject": subject,
+            "body": template.body_id,
+            "vars": values,
+        }
+        with open(self.messages_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        return record
+
+
+class TemplateOutbox(Outbox):
+    """Outbox for a campaign renderer exposing ``template`` and ``values(user)``"""
+
+    def __init__(self, outbox_dir, renderer, subject):
+        super().__init__(outbox_dir)
+        self.renderer = renderer
+        self.subject = subject
+
+    def add(self, user):
+        return self.add_message(
+            user["email"], self.subject, self.renderer.template, self.renderer.values(user)
+        )
+
+
+def expand_outbox(outbox_dir):
+    """Yield (to, subject, html) for every spooled message in an outbox"""
+    outbox_dir = Path(outbox_dir)
+    bodies = {}
+    with open(outbox_dir / "messages.jsonl", "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            body = bodies.get(record["body"])
+            if body is None:
+                body = load_json_file(outbox_dir / "bodies" / f"{record['body']}.json")
+                bodies[record["body"]] = body
+            out = [body["chunks"][0]]
+            for slot, chunk in zip(body["slots"], body["chunks"][1:]):
+                out.append(record["vars"].get(slot, ""))
+                out.append(chunk)
+            yield record["to"], record["subject"], "".join(out)
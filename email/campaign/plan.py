@@ -0,0 +1,493 @@
+"""
+Declarative campaign definitions
+
+A campaign can be described in a TOML file instead of a script::
+
+    [campaign]
+    id = "news-philip-eades-2024"
+    subject = "Important Update: ..."
+    sender = "North Swanage Traffic Concern Group <engineering@nstcg.org>"
+
+    [template]
+    path = "../news-email-template.html"
+
+    [delivery]
+    backend = "resend"
+
+    [rate]
+    interval_seconds = 30
+
+    [rate.domains]          # optional per-recipient-domain limits (per minute)
+    "gmail.com" = 20
+    "*" = 60
+
+    [files]
+    sent = "../../scripts/sent-news-emails.json"
+    failed = "../../scripts/failed-news-emails.json"
+
+``compile_plan`` validates the whole definition, loads and pre-splits the
+template (compiling MJML once), checks every placeholder has a value,
+resolves the rate policy and opens the sent ledger, all before any
+recipient is fetched. Relative paths are resolved against the TOML file.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from sent_ledger import SentLedger
+from suppression import SUPPRESSION_FILE
+
+from .backends import OutboxBackend, ResendBackend, SMTPBackend
+from .engine import Campaign
+from .lazy import LazyAttribute
+from .outbox import TemplateOutbox
+from .renderers import SplitTemplate, compile_mjml
+from .sources import NotionSource, StaticSource, rich_text
+from .throttle import DomainThrottle
+from .tracking import (
+    DEFAULT_SITE_URL,
+    TrackingTokens,
+    signed_pixel_url,
+    tracking_pixel_tag,
+    tracking_pixel_url,
+)
+
+# Placeholders filled from the recipient for every campaign
+RECIPIENT_VARIABLES = {
+    "name": lambda user: user["name"],
+    "first_name": lambda user: user["firstName"],
+    "last_name": lambda user: user["lastName"],
+    "email": lambda user: user["email"],
+    "user_email": lambda user: user["email"],
+    "referral_code": lambda user: user.get("referralCode", ""),
+}
+
+SOURCE_TYPES = ("notion", "json")
+TEMPLATE_TYPES = ("html", "mjml")
+BACKENDS = ("resend", "smtp", "outbox")
+
+NUMBER = (int, float)
+
+# section -> key -> (type, required)
+SCHEMA = {
+    "campaign": {
+        "id": (str, True),
+        "subject": (str, True),
+        "sender": (str, True),
+        "title": (str, False),
+        "site_url": (str, False),
+    },
+    "source": {
+        "type": (str, False),
+        "path": (str, False),
+        "referral_codes": (bool, False),
+    },
+    "template": {
+        "path": (str, True),
+        "type": (str, False),
+        "vars": (dict, False),
+    },
+    "delivery": {
+        "backend": (str, True),
+        "outbox": (str, False),
+        "host": (str, False),
+        "port": (int, False),
+    },
+    "rate": {
+        "interval_seconds": (NUMBER, False),
+        "per_minute": (NUMBER, False),
+        "batch_size": (int, False),
+        "batch_delay_seconds": (NUMBER, False),
+        "max_workers": (int, False),
+        "domains": (dict, False),
+        "domain_burst": (int, False),
+    },
+    "files": {
+        "sent": (str, True),
+        "failed": (str, True),
+        "suppression": (str, False),
+    },
+}
+REQUIRED_SECTIONS = ("campaign", "template", "delivery", "files")
+
+
+class PlanError(ValueError):
+    """A campaign definition failed validation"""
+
+    def __init__(self, errors, path=None):
+        self.errors = list(errors)
+        where = f" in {path}" if path else ""
+        super().__init__(
+            f"Invalid campaign definition{where}:\n" + "\n".join(f"  - {e}" for e in self.errors)
+        )
+
+
+def load_definition(path):
+    """Parse a TOML campaign definition"""
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        import tomli as tomllib
+
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except tomllib.TOMLDecodeError as e:
+        raise PlanError([f"TOML syntax error: {e}"], path) from e
+
+
+def validate_definition(definition):
+    """Check sections, keys and types. Returns a list of error messages."""
+    errors = []
+    for section in REQUIRED_SECTIONS:
+        if section not in definition:
+            errors.append(f"missing [{section}] section")
+
+    for section, values in definition.items():
+        schema = SCHEMA.get(section)
+        if schema is None:
+            errors.append(f"unknown section [{section}]")
+            continue
+        if not isinstance(values, dict):
+            errors.append(f"[{section}] must be a table")
+            continue
+        for key, value in values.items():
+            if key not in schema:
+                errors.append(f"unknown key {section}.{key}")
+            elif isinstance(value, bool) and schema[key][0] is not bool:
+                errors.append(f"{section}.{key} has the wrong type")
+            elif not isinstance(value, schema[key][0]):
+                errors.append(f"{section}.{key} has the wrong type")
+        for key, (_, required) in schema.items():
+            if required and key not in values:
+                errors.append(f"missing {section}.{key}")
+
+    def table(values):
+        # A section or table of the wrong type is reported above; the
+        # cross-field checks below treat it as empty
+        return values if isinstance(values, dict) else {}
+
+    source = table(definition.get("source"))
+    template = table(definition.get("template"))
+    delivery = table(definition.get("delivery"))
+    rate = table(definition.get("rate"))
+
+    source_type = source.get("type", "notion")
+    if source_type not in SOURCE_TYPES:
+        errors.append(f"source.type must be one of {', '.join(SOURCE_TYPES)}")
+    elif source_type == "json" and "path" not in source:
+        errors.append("source.path is required for a json source")
+
+    for key, value in table(template.get("vars")).items():
+        if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+            errors.append(f"template.vars.{key} must be a string or number")
+
+    template_type = template.get("type")
+    if template_type is not None and template_type not in TEMPLATE_TYPES:
+        errors.append(f"template.type must be one of {', '.join(TEMPLATE_TYPES)}")
+
+    backend = delivery.get("backend")
+    if backend is not None and backend not in BACKENDS:
+        errors.append(f"delivery.backend must be one of {', '.join(BACKENDS)}")
+    if backend == "outbox" and "outbox" not in delivery:
+        errors.append("delivery.outbox is required for the outbox backend")
+
+    if "interval_seconds" in rate and "per_minute" in rate:
+        errors.append("set only one of rate.interval_seconds and rate.per_minute")
+    for key in ("interval_seconds", "batch_delay_seconds"):
+        if isinstance(rate.get(key), NUMBER) and rate[key] < 0:
+            errors.append(f"rate.{key} must not be negative")
+    for key in ("per_minute", "batch_size", "max_workers", "domain_burst"):
+        if isinstance(rate.get(key), NUMBER) and rate[key] <= 0:
+            errors.append(f"rate.{key} must be positive")
+    domains = rate.get("domains")
+    if isinstance(domains, dict):
+        for domain, per_minute in domains.items():
+            if isinstance(per_minute, bool) or not isinstance(per_minute, NUMBER) or per_minute <= 0:
+                errors.append(f"rate.domains.{domain} must be a positive number of emails per minute")
+
+    return errors
+
+
+class RatePolicy:
+    """Resolved pacing for a campaign"""
+
+    def __init__(
+        self,
+        interval_seconds=0,
+        batch_size=None,
+        batch_delay_seconds=0,
+        max_workers=10,
+        domain_throttle=None,
+    ):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.batch_delay_seconds = batch_delay_seconds
+        self.max_workers = max_workers
+        self.domain_throttle = domain_throttle
+
+    @classmethod
+    def from_definition(cls, rate):
+        interval = rate.get("interval_seconds")
+        if interval is None and "per_minute" in rate:
+            interval = 60.0 / rate["per_minute"]
+        domain_throttle = None
+        if rate.get("domains"):
+            domain_throttle = DomainThrottle(rate["domains"], burst=rate.get("domain_burst", 1))
+        return cls(
+            interval_seconds=interval or 0,
+            batch_size=rate.get("batch_size"),
+            batch_delay_seconds=rate.get("batch_delay_seconds", 0),
+            max_workers=rate.get("max_workers", 10),
+            domain_throttle=domain_throttle,
+        )
+
+    def describe(self):
+        if not self.interval_seconds:
+            text = "no delay between emails"
+        else:
+            text = f"{self.interval_seconds:g}s between emails ({60 / self.interval_seconds:.1f}/min)"
+        if self.domain_throttle:
+            text += f"; {self.domain_throttle.describe()}"
+        return text
+
+
+class TemplateRenderer:
+    """Renders a pre-split template with recipient, tracking and static values
+
+    With ``tokens`` (TrackingTokens) the pixel URL is a signed token; the
+    campaign is registered and its token function built once, up front.
+    """
+
+    def __init__(self, template, campaign_id, site_url=DEFAULT_SITE_URL, static_vars=None, tokens=None):
+        self.template = template
+        self.campaign_id = campaign_id
+        self.site_url = site_url
+        self.static_values = {f"{{{{{k}}}}}": str(v) for k, v in (static_vars or {}).items()}
+        self.slots = set(template.slots)
+        self.tokens = tokens
+        self._token = None
+        if tokens is not None and "{{tracking_pixel}}" in self.slots:
+            self._token = tokens.encoder(campaign_id)
+
+    def values(self, user):
+        """Placeholder values for one recipient"""
+        values = dict(self.static_values)
+        for slot in self.slots:
+            name = slot[2:-2]
+            if name in RECIPIENT_VARIABLES:
+                values[slot] = RECIPIENT_VARIABLES[name](user)
+        if self._token is not None:
+            values["{{tracking_pixel}}"] = tracking_pixel_tag(
+                signed_pixel_url(self._token(user["email"]), self.site_url)
+            )
+        elif "{{tracking_pixel}}" in self.slots:
+            values["{{tracking_pixel}}"] = tracking_pixel_tag(
+                tracking_pixel_url(user["email"], self.campaign_id, self.site_url)
+            )
+        return values
+
+    def __call__(self, user):
+        return self.template.render_values(self.values(user))
+
+
+def _referral_code(props, user):
+    return {"referralCode": rich_text(props, "Referral Code")}
+
+
+class CampaignPlan:
+    """A validated, compiled campaign ready to run"""
+
+    def __init__(self, path, campaign_id, title, subject, sender, source, renderer,
+                 backend, rate, sent_file, failed_file, suppression_file, sent_ledger):
+        self.path = path
+        self.campaign_id = campaign_id
+        self.title = title
+        self.subject = subject
+        self.sender = sender
+        self.source = source
+        self.renderer = renderer
+        self.backend = backend
+        self.rate = rate
+        self.sent_file = sent_file
+        self.failed_file = failed_file
+        self.suppression_file = suppression_file
+        self.sent_ledger = sent_ledger
+
+    def describe(self):
+        """Lines summarising the plan for --check output"""
+        slots = sorted(set(self.renderer.template.slots))
+        return [
+            f"Campaign: {self.campaign_id} ({self.title})",
+            f"Subject: {self.subject}",
+            f"Sender: {self.sender}",
+            f"Delivery: {self.backend.describe()}",
+            f"Rate: {self.rate.describe()}",
+            f"Placeholders: {', '.join(slots) or 'none'}",
+            f"Sent ledger: {self.sent_file} ({len(self.sent_ledger)} sent)",
+        ]
+
+    def to_campaign(self):
+        return Campaign(
+            campaign_id=self.campaign_id,
+            title=self.title,
+            source=self.source,
+            render=self.renderer,
+            backend=self.backend,
+            sent_file=self.sent_file,
+            failed_file=self.failed_file,
+            suppression_file=self.suppression_file,
+            rate_limit_seconds=self.rate.interval_seconds,
+            batch_size=self.rate.batch_size,
+            batch_delay_seconds=self.rate.batch_delay_seconds,
+            max_workers=self.rate.max_workers,
+            sent_ledger=self.sent_ledger,
+            domain_throttle=self.rate.domain_throttle,
+        )
+
+    def close(self):
+        self.sent_ledger.close()
+
+
+def _load_template(template_path, template_type):
+    if template_type == "mjml":
+        # Compile once with the placeholders left in, then split the HTML
+        return SplitTemplate(compile_mjml(template_path))
+    with open(template_path, "r", encoding="utf-8") as f:
+        return SplitTemplate(f.read())
+
+
+def _check_environment(definition, dry_run):
+    errors = []
+    source_type = definition.get("source", {}).get("type", "notion")
+    if source_type == "notion" and not (os.getenv("NOTION_TOKEN") and os.getenv("NOTION_DATABASE_ID")):
+        errors.append("NOTION_TOKEN and NOTION_DATABASE_ID must be set for a notion source")
+    if not dry_run and definition["delivery"]["backend"] == "resend" and not os.getenv("RESEND_API_KEY"):
+        import resend
+
+        if not resend.api_key:
+            errors.append("RESEND_API_KEY must be set for the resend backend")
+    return errors
+
+
+def compile_plan(definition, base_dir=".", dry_run=False, path=None):
+    """
+    Validate and compile a campaign definition
+
+    Args:
+        definition: Parsed definition dict, or a path to a TOML file
+        base_dir: Directory relative paths are resolved against (the TOML
+            file's directory when a path is given)
+        dry_run: Skip delivery credential checks
+
+    Raises:
+        PlanError listing every problem found
+    """
+    if isinstance(definition, (str, Path)):
+        path = Path(definition)
+        base_dir = path.parent
+        definition = load_definition(path)
+    base_dir = Path(base_dir)
+
+    errors = validate_definition(definition)
+    if errors:
+        raise PlanError(errors, path)
+
+    def resolve(value):
+        return (base_dir / value).resolve()
+
+    meta = definition["campaign"]
+    campaign_id = meta["id"]
+    template_def = definition["template"]
+    template_path = resolve(template_def["path"])
+    template_type = template_def.get("type") or (
+        "mjml" if template_path.suffix == ".mjml" else "html"
+    )
+    static_vars = template_def.get("vars", {})
+
+    errors = _check_environment(definition, dry_run)
+    if not template_path.exists():
+        errors.append(f"template not found: {template_path}")
+    source_def = definition.get("source", {})
+    if source_def.get("type") == "json" and not resolve(source_def["path"]).exists():
+        errors.append(f"recipient file not found: {resolve(source_def['path'])}")
+    for key in ("sent", "failed"):
+        # The ledgers are written as the campaign runs, into an existing directory
+        directory = resolve(definition["files"][key]).parent
+        if not directory.is_dir():
+            errors.append(f"files.{key} directory not found: {directory}")
+    if errors:
+        raise PlanError(errors, path)
+
+    try:
+        template = _load_template(template_path, template_type)
+    except Exception as e:
+        raise PlanError([f"template failed to compile: {e}"], path) from e
+
+    known = set(RECIPIENT_VARIABLES) | {"tracking_pixel"} | set(static_vars)
+    unknown = sorted({slot for slot in template.slots if slot[2:-2] not in known})
+    if unknown:
+        raise PlanError([f"template placeholder {slot} has no value" for slot in unknown], path)
+
+    try:
+        # Signed pixel URLs only when the pixel endpoint verifies them
+        tokens = TrackingTokens.for_pixels()
+    except ValueError as e:
+        raise PlanError([str(e)], path) from e
+
+    renderer = TemplateRenderer(
+        template,
+        campaign_id,
+        meta.get("site_url", DEFAULT_SITE_URL),
+        static_vars,
+        tokens=tokens,
+    )
+
+    if source_def.get("type") == "json":
+        with open(resolve(source_def["path"]), "r") as f:
+            source = StaticSource(json.load(f))
+    else:
+        source = NotionSource(
+            LazyAttribute("notion_client", "Client"),
+            extra_fields=_referral_code if source_def.get("referral_codes") else None,
+        )
+
+    delivery = definition["delivery"]
+    if delivery["backend"] == "outbox":
+        backend = OutboxBackend(TemplateOutbox(resolve(delivery["outbox"]), renderer, meta["subject"]))
+    elif delivery["backend"] == "smtp":
+        from email.utils import parseaddr
+
+        backend = SMTPBackend(
+            parseaddr(meta["sender"])[1] or meta["sender"],
+            meta["subject"],
+            host=delivery.get("host", "smtp.gmail.com"),
+            port=delivery.get("port", 587),
+        )
+    else:
+        backend = ResendBackend(meta["subject"], sender=meta["sender"])
+
+    files = definition["files"]
+    sent_file = resolve(files["sent"])
+    suppression_file = resolve(files["suppression"]) if "suppression" in files else SUPPRESSION_FILE
+    try:
+        sent_ledger = SentLedger(sent_file)
+    except OSError as e:
+        raise PlanError([f"sent ledger could not be opened: {e}"], path) from e
+
+    return CampaignPlan(
+        path=path,
+        campaign_id=campaign_id,
+        title=meta.get("title", campaign_id),
+        subject=meta["subject"],
+        sender=meta["sender"],
+        source=source,
+        renderer=renderer,
+        backend=backend,
+        rate=RatePolicy.from_definition(definition.get("rate", {})),
+        sent_file=sent_file,
+        failed_file=resolve(files["failed"]),
+        suppression_file=suppression_file,
+        sent_ledger=sent_ledger,
+    )
@@ -0,0 +1,154 @@
+"""
+--profile support: cProfile for the whole run, tracemalloc at stage boundaries
+
+``RunProfiler`` wraps a campaign run in cProfile and, with --profile-memory,
+takes tracemalloc snapshots after fetch, after filter, every N sends and at
+the end. On stop it writes:
+
+  <prefix>.pstats  raw profile, for ``python -m pstats`` or snakeviz
+  <prefix>.txt     top-N functions by cumulative time, plus memory per
+                   snapshot and the allocation sites that grew the most
+
+cProfile only sees the main thread, so fast-mode renders on the thread pool
+show up as time waiting on futures; the stage breakdown covers those.
+"""
+
+import time
+from pathlib import Path
+
+DEFAULT_TOP = 25
+DEFAULT_MEMORY_EVERY = 100
+# Allocation sites listed per memory snapshot
+MEMORY_TOP = 10
+
+
+def default_prefix(campaign_id):
+    return f"profile-{campaign_id}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+
+def format_bytes(size):
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+class RunProfiler:
+    """cProfile plus optional tracemalloc snapshots for one run"""
+
+    def __init__(self, prefix, top=DEFAULT_TOP, memory=False, memory_every=DEFAULT_MEMORY_EVERY):
+        self.prefix = Path(prefix)
+        self.top = top
+        self.memory = memory
+        self.memory_every = memory_every
+        self.profile = None
+        self.snapshots = []
+        self.sends = 0
+        self._baseline = None
+
+    @classmethod
+    def from_args(cls, args, campaign_id):
+        """Profiler configured by --profile options, or None when not profiling"""
+        prefix = getattr(args, "profile", None)
+        if not prefix:
+            return None
+        if prefix is True:
+            prefix = default_prefix(campaign_id)
+        return cls(
+            prefix,
+            top=getattr(args, "profile_top", DEFAULT_TOP),
+            memory=getattr(args, "profile_memory", False),
+            memory_every=getattr(args, "profile_memory_every", DEFAULT_MEMORY_EVERY),
+        )
+
+    @property
+    def stats_file(self):
+        return self.prefix.with_name(self.prefix.name + ".pstats")
+
+    @property
+    def report_file(self):
+        return self.prefix.with_name(self.prefix.name + ".txt")
+
+    def start(self):
+        import cProfile
+
+        if self.memory:
+            import tracemalloc
+
+            tracemalloc.start()
+            self.snapshot("start")
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def snapshot(self, label):
+        """Record traced memory and the allocation sites grown since start"""
+        if not self.memory:
+            return
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            return
+        # Keep snapshot cost out of the CPU profile
+        if self.profile is not None:
+            self.profile.disable()
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        if self._baseline is None:
+            self._baseline = snapshot
+            growth = []
+        else:
+            growth = [
+                str(stat)
+                for stat in snapshot.compare_to(self._baseline, "lineno")[:MEMORY_TOP]
+                if stat.size_diff > 0
+            ]
+        self.snapshots.append(
+            {"label": label, "current": current, "peak": peak, "growth": growth}
+        )
+        print(f"🧠 {label}: {format_bytes(current)} traced (peak {format_bytes(peak)})")
+        if self.profile is not None:
+            self.profile.enable()
+
+    def sent(self, count=1):
+        """Count sends and snapshot each time another memory_every go out"""
+        before = self.sends
+        self.sends += count
+        if self.memory and self.memory_every:
+            if self.sends // self.memory_every > before // self.memory_every:
+                self.snapshot(f"after {self.sends} sends")
+
+    def stop(self):
+        """Stop profiling and write the pstats dump and text report"""
+        if self.profile is None:
+            return
+        if self.memory:
+            import tracemalloc
+
+            self.snapshot("end")
+            tracemalloc.stop()
+        self.profile.disable()
+
+        self.prefix.parent.mkdir(parents=True, exist_ok=True)
+        self.profile.dump_stats(self.stats_file)
+        self.report_file.write_text(self.report(), encoding="utf-8")
+        self.profile = None
+        print(f"🔬 Profile written to {self.stats_file} and {self.report_file}")
+
+    def report(self):
+        import io
+        import pstats
+
+        out = io.StringIO()
+        out.write(f"Top {self.top} functions by cumulative time\n\n")
+        stats = pstats.Stats(self.profile, stream=out)
+        stats.sort_stats("cumulative").print_stats(self.top)
+
+        if self.snapshots:
+            out.write("\nMemory (tracemalloc)\n\n")
+            for snap in self.snapshots:
+                out.write(
+                    f"{snap['label']}: {format_bytes(snap['current'])}"
+                    f" (peak {format_bytes(snap['peak'])})\n"
+                )
+                for line in snap["growth"]:
+                    out.write(f"    {line}\n")
+        return out.getvalue()
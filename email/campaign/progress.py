@@ -0,0 +1,120 @@
+"""
+Rate-limited progress reporting
+
+Printing a line per recipient makes the terminal the bottleneck at
+thousands of sends a minute. ``ProgressReporter`` keeps the counts and
+redraws one status line (progress, rate, ETA, successes and failures) at
+most every ``interval`` seconds. On a terminal the line is rewritten in
+place. When output is piped or logged, a full line is printed every 10
+seconds instead. Failures and other notices are printed above the status
+line as they happen. Per-recipient detail goes to the event log.
+"""
+
+import sys
+import time
+
+TTY_INTERVAL = 0.5
+PIPE_INTERVAL = 10.0
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class ProgressReporter:
+    """Single refreshing status line for a campaign run"""
+
+    def __init__(self, total, action="Sending", stream=None, interval=None):
+        self.total = total
+        self.action = action
+        self._stream = stream
+        self.tty = self.stream.isatty()
+        self.interval = interval if interval is not None else (
+            TTY_INTERVAL if self.tty else PIPE_INTERVAL
+        )
+        self.sent = 0
+        self.failed = 0
+        self.note = ""
+        self.started = time.monotonic()
+        self._last_render = self.started
+        self._line_open = False
+
+    @property
+    def stream(self):
+        # Resolved on use so redirected/captured stdout is honoured
+        return self._stream or sys.stdout
+
+    @property
+    def done(self):
+        return self.sent + self.failed
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def status(self):
+        """The status line text"""
+        percent = self.done / self.total * 100 if self.total else 100.0
+        rate = self.rate()
+        parts = [
+            f"📤 {self.action} {self.done}/{self.total} ({percent:.0f}%)",
+            f"✅ {self.sent}",
+            f"❌ {self.failed}",
+            f"{rate * 60:.0f}/min",
+        ]
+        remaining = self.total - self.done
+        if remaining and rate > 0:
+            parts.append(f"ETA {format_duration(remaining / rate)}")
+        if self.note:
+            parts.append(self.note)
+        return " | ".join(parts)
+
+    def update(self, sent=0, failed=0):
+        """Count results and redraw if the refresh interval has passed"""
+        self.sent += sent
+        self.failed += failed
+        self.note = ""
+        self.render()
+
+    def waiting(self, seconds):
+        """Show an upcoming rate-limit pause in the status line"""
+        self.note = f"⏳ next in {seconds:g}s"
+        self.render(force=self.tty)
+
+    def render(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_render < self.interval:
+            return
+        self._last_render = now
+        if self.tty:
+            self.stream.write(f"\r{self.status()}\x1b[K")
+            self._line_open = True
+        else:
+            self.stream.write(self.status() + "\n")
+        self.stream.flush()
+
+    def message(self, text):
+        """Print a line above the status line (failures, notices)"""
+        if self._line_open:
+            self.stream.write("\r\x1b[K")
+            self._line_open = False
+        self.stream.write(text + "\n")
+        if self.tty:
+            self.render(force=True)
+        else:
+            self.stream.flush()
+
+    def finish(self):
+        """Print the final status line"""
+        self.note = ""
+        if self._line_open:
+            self.stream.write(f"\r{self.status()}\x1b[K\n")
+        else:
+            self.stream.write(self.status() + "\n")
+        self._line_open = False
+        self.stream.flush()
@@ -0,0 +1,63 @@
+"""
+Renderers turn a user dict into the HTML body for that recipient
+
+A renderer is any callable ``render(user) -> html``. This module holds the
+building blocks the campaigns share: MJML compilation and templates that
+are pre-split around their placeholders once and rendered with a join.
+"""
+
+import hashlib
+import re
+import subprocess
+
+PLACEHOLDER_RE = re.compile(r"(\{\{\w+\}\})")
+
+
+def compile_mjml(template_file, replacements=None):
+    """Compile an MJML template to HTML after substituting placeholders"""
+    try:
+        with open(template_file, "r") as f:
+            mjml_content = f.read()
+
+        for placeholder, value in (replacements or {}).items():
+            mjml_content = mjml_content.replace(placeholder, value)
+
+        result = subprocess.run(
+            ["npx", "mjml", "-i", "-s"],
+            input=mjml_content,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        return result.stdout
+
+    except subprocess.CalledProcessError as e:
+        print(f"❌ MJML compilation failed: {e.stderr}")
+        raise
+    except FileNotFoundError:
+        print("❌ MJML template file not found or npx/mjml not installed")
+        raise
+
+
+class SplitTemplate:
+    """HTML template pre-split around its per-recipient placeholders.
+
+    The template is split once into static chunks and the placeholder slots
+    between them, so rendering a recipient is a single join over precomputed
+    strings instead of a ``str.replace`` pass per variable.
+    """
+
+    def __init__(self, html, pattern=PLACEHOLDER_RE):
+        parts = pattern.split(html)
+        self.chunks = tuple(parts[0::2])
+        self.slots = tuple(parts[1::2])
+        self.body_id = hashlib.sha256(html.encode("utf-8")).hexdigest()[:16]
+
+    def render_values(self, values):
+        """Render with a mapping of placeholder (e.g. ``{{name}}``) to value"""
+        out = [self.chunks[0]]
+        for slot, chunk in zip(self.slots, self.chunks[1:]):
+            out.append(values[slot])
+            out.append(chunk)
+        return "".join(out)
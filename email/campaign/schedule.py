@@ -0,0 +1,181 @@
+"""
+Deadline-aware send planning
+
+A campaign with a deadline (the encourage campaign's survey closes at
+midnight) should not discover at 23:40 that the rate limit leaves 300
+emails unsent. Before sending, ``DeadlineSchedule`` estimates how long the
+remaining recipients take in slow mode (rate limit plus provider latency per
+email) and in fast mode (one provider call per batch plus the batch delay),
+and compares that with the time left:
+
+  fits in slow mode    send as configured
+  only fits in fast    warn, or switch to fast mode with policy "fast"
+  fits in neither      warn (and switch to fast with policy "fast", which
+                       gets the most recipients out before the deadline)
+
+Because a run that misses its deadline only reaches the front of the list,
+``prefer_new_recipients`` orders recipients who have never received any of
+our campaigns ahead of those already emailed by another one.
+"""
+
+import math
+from datetime import datetime, time as clock_time
+from pathlib import Path
+
+from sent_ledger import SentLedger
+
+from .progress import format_duration
+
+POLICIES = ("warn", "fast")
+# Provider latency assumed per email/batch before anything has been measured
+SEND_SECONDS = 0.5
+BATCH_SECONDS = 2.0
+
+
+def end_of_day(now=None):
+    """23:59:59 today (local time)"""
+    now = now or datetime.now()
+    return now.replace(hour=23, minute=59, second=59, microsecond=0)
+
+
+def parse_deadline(text, now=None):
+    """
+    Deadline from the command line: ``HH:MM`` today or an ISO datetime
+
+    Aware datetimes are converted to naive local time.
+    """
+    now = now or datetime.now()
+    try:
+        return datetime.combine(now.date(), clock_time.fromisoformat(text))
+    except ValueError:
+        pass
+    try:
+        deadline = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Invalid deadline {text!r}: use HH:MM or an ISO datetime")
+    if deadline.tzinfo is not None:
+        deadline = deadline.astimezone().replace(tzinfo=None)
+    return deadline
+
+
+class DeadlineSchedule:
+    """Time needed to send ``count`` emails against the time left"""
+
+    def __init__(
+        self,
+        deadline,
+        count,
+        rate_limit_seconds=0,
+        batch_size=1,
+        batch_delay_seconds=0,
+        send_seconds=SEND_SECONDS,
+        batch_seconds=BATCH_SECONDS,
+        now=None,
+    ):
+        self.deadline = deadline
+        self.count = count
+        self.rate_limit_seconds = rate_limit_seconds
+        self.batch_size = max(1, batch_size)
+        self.batch_delay_seconds = batch_delay_seconds
+        self.send_seconds = send_seconds
+        self.batch_seconds = batch_seconds
+        self.seconds_left = (deadline - (now or datetime.now())).total_seconds()
+
+    @property
+    def slow_seconds(self):
+        """Sequential sending with the rate limit between emails"""
+        if not self.count:
+            return 0.0
+        return self.count * self.send_seconds + (self.count - 1) * self.rate_limit_seconds
+
+    @property
+    def fast_seconds(self):
+        """Batched sending with the batch delay between batches"""
+        batches = math.ceil(self.count / self.batch_size)
+        if not batches:
+            return 0.0
+        return batches * self.batch_seconds + (batches - 1) * self.batch_delay_seconds
+
+    @property
+    def required_per_minute(self):
+        """Send rate needed to finish by the deadline"""
+        if self.seconds_left <= 0:
+            return math.inf
+        return self.count * 60 / self.seconds_left
+
+    def fits(self, fast=False):
+        return (self.fast_seconds if fast else self.slow_seconds) <= self.seconds_left
+
+    def choose(self, fast=False, policy="warn"):
+        """
+        Decide the send mode
+
+        Returns:
+            (fast, messages) - whether to send in fast mode and the lines to
+            print about the decision
+        """
+        left = format_duration(max(0, self.seconds_left))
+        messages = [
+            f"⏰ Deadline {self.deadline:%Y-%m-%d %H:%M} ({left} left): "
+            f"{self.count} emails need {self.required_per_minute:.1f}/min"
+        ]
+        if self.seconds_left <= 0:
+            messages.append("⚠️ The deadline has already passed")
+            return fast, messages
+
+        mode_seconds = self.fast_seconds if fast else self.slow_seconds
+        eta = f"ETA {format_duration(mode_seconds)} in {'fast' if fast else 'slow'} mode"
+        if self.fits(fast):
+            messages.append(f"✅ {eta}, within the deadline")
+            return fast, messages
+
+        messages.append(f"⚠️ {eta} exceeds the deadline")
+        fast_eta = format_duration(self.fast_seconds)
+        if policy == "fast":
+            if self.fits(fast=True):
+                messages.append(f"⚡ Switching to fast mode (ETA {fast_eta})")
+            else:
+                messages.append(
+                    f"⚡ Switching to fast mode (ETA {fast_eta}, still past the deadline; "
+                    "highest-priority recipients go first)"
+                )
+            return True, messages
+        if self.fits(fast=True):
+            messages.append(f"💡 Fast mode would finish in {fast_eta}: rerun with --fast")
+        return fast, messages
+
+
+def prefer_new_recipients(*ledger_files):
+    """
+    Recipient ordering that puts never-emailed addresses first
+
+    Args:
+        ledger_files: Sent ledgers of other campaigns; a recipient found in
+            any of them counts as previously emailed. Missing ledgers are
+            ignored.
+
+    Returns:
+        Callable ``prioritize(users)`` returning the users reordered (stable
+        within each group)
+    """
+
+    def prioritize(users):
+        ledgers = [SentLedger(path) for path in ledger_files if Path(path).exists()]
+        try:
+            new, emailed = [], []
+            for user in users:
+                if any(user["email"] in ledger for ledger in ledgers):
+                    emailed.append(user)
+                else:
+                    new.append(user)
+        finally:
+            for ledger in ledgers:
+                ledger.close()
+        if new and emailed:
+            print(
+                f"🎯 Sending {len(new)} never-emailed recipients before "
+                f"{len(emailed)} previously emailed"
+            )
+        return new + emailed
+
+    return prioritize
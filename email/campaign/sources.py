@@ -0,0 +1,128 @@
+"""
+Recipient sources
+
+A source is any callable ``fetch(since=None)`` returning a list of user
+dicts (id, email, firstName, lastName, name, plus campaign fields). With
+``since`` it should return only users created at or after that ISO time.
+"""
+
+import os
+
+
+def rich_text(props, name):
+    """Plain text of a Notion rich_text property (empty if missing)"""
+    data = props.get(name, {}).get("rich_text", [])
+    return data[0]["text"]["content"] if data else ""
+
+
+def _title(props, name):
+    data = props.get(name, {}).get("title", [])
+    return data[0]["text"]["content"] if data else ""
+
+
+class NotionSource:
+    """Registered users from the Notion database
+
+    Args:
+        client_factory: Notion client class (called with ``auth=token``)
+        extra_fields: Optional ``(props, user) -> dict`` adding campaign
+            specific fields to each user
+    """
+
+    def __init__(self, client_factory, extra_fields=None, page_size=100):
+        self.client_factory = client_factory
+        self.extra_fields = extra_fields
+        self.page_size = page_size
+        # Database pages read so far (exported with --metrics-port)
+        self.pages_fetched = 0
+
+    def parse_page(self, page):
+        """Build a user dict from a database page, or None without an email"""
+        props = page["properties"]
+        email = props.get("Email", {}).get("email")
+        if not email:
+            return None
+
+        first_name = rich_text(props, "First Name")
+        last_name = rich_text(props, "Last Name")
+        name = _title(props, "Name")
+
+        user = {
+            "id": page["id"],
+            "email": email.lower(),
+            "firstName": (
+                first_name or name.split()[0]
+                if name
+                else email.split("@")[0]
+            ),
+            "lastName": last_name or "",
+            "name": name
+            or f"{first_name} {last_name}".strip()
+            or email.split("@")[0],
+        }
+        if self.extra_fields:
+            user.update(self.extra_fields(props, user))
+        return user
+
+    def fetch(self, since=None):
+        """Fetch all users (only those created after ``since`` if given)"""
+        print("📊 Fetching users from Notion database...")
+
+        notion_token = os.getenv("NOTION_TOKEN")
+        database_id = os.getenv("NOTION_DATABASE_ID")
+
+        if not notion_token or not database_id:
+            raise ValueError("Missing NOTION_TOKEN or NOTION_DATABASE_ID in environment")
+
+        notion = self.client_factory(auth=notion_token)
+        users = []
+        has_more = True
+        start_cursor = None
+
+        query_filter = {"property": "Email", "email": {"is_not_empty": True}}
+        if since:
+            query_filter = {
+                "and": [
+                    query_filter,
+                    {"timestamp": "created_time", "created_time": {"on_or_after": since}},
+                ]
+            }
+
+        while has_more:
+            try:
+                response = notion.databases.query(
+                    database_id=database_id,
+                    start_cursor=start_cursor,
+                    page_size=self.page_size,
+                    filter=query_filter,
+                )
+
+                self.pages_fetched += len(response["results"])
+                for page in response["results"]:
+                    user = self.parse_page(page)
+                    if user:
+                        users.append(user)
+
+                has_more = response.get("has_more", False)
+                start_cursor = response.get("next_cursor")
+
+            except Exception as e:
+                print(f"❌ Error fetching users from Notion: {e}")
+                raise
+
+        print(f"✅ Found {len(users)} registered users")
+        return users
+
+    __call__ = fetch
+
+
+class StaticSource:
+    """A fixed list of users (test sends, replays of a saved list)"""
+
+    def __init__(self, users):
+        self.users = list(users)
+
+    def fetch(self, since=None):
+        return list(self.users)
+
+    __call__ = fetch
@@ -0,0 +1,38 @@
+"""
+JSON file helpers shared by the campaign scripts
+"""
+
+import json
+from datetime import datetime
+
+
+def load_json_file(filepath):
+    """Load JSON file, return empty list/dict if not found"""
+    try:
+        with open(filepath, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return [] if "emails" in str(filepath) else {}
+    except json.JSONDecodeError:
+        print(f"⚠️ Warning: {filepath} is corrupted, starting fresh")
+        return [] if "emails" in str(filepath) else {}
+
+
+def save_json_file(filepath, data):
+    """Save data to JSON file"""
+    with open(filepath, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def failure_record(user, error):
+    """Entry for the failed-emails ledger"""
+    return {**user, "error": error, "timestamp": datetime.now().isoformat()}
+
+
+def append_failures(filepath, records):
+    """Append failure records to a failed-emails ledger in one rewrite"""
+    if not records:
+        return
+    failed_emails = load_json_file(filepath)
+    failed_emails.extend(records)
+    save_json_file(filepath, failed_emails)
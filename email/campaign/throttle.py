@@ -0,0 +1,151 @@
+"""
+Per-recipient-domain throttling with round-robin fair queuing
+
+Recipients come out of Notion in signup order, so a run can hit one
+mailbox provider with a long block of addresses (gmail.com, say) and trip
+its receiving limits while every other domain sits idle. A campaign with a
+``DomainThrottle``:
+
+  order    interleaves the recipients round-robin across domains (each
+           domain keeps its own order, so priorities within it hold)
+  reserve  takes a token from the recipient domain's bucket before each
+           send; when the bucket is empty the engine waits until it refills
+  schedule splits a fast-mode batch into waves by when each recipient's
+           token comes up, so a batch call never carries more of a domain
+           than its bucket allows
+
+Buckets hold ``burst`` tokens and refill at the domain's per-minute limit.
+Domains without their own limit use the ``"*"`` entry, or are unlimited if
+there is none. With per-domain limits in place the campaign-wide rate limit
+can be relaxed, raising overall throughput without exceeding any single
+domain's limit.
+
+The order is fixed before the checkpoint snapshot is taken, so --resume
+positions stay valid.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+DEFAULT_DOMAIN = "*"
+# Sends whose tokens come up this close together go out in one batch call
+WAVE_SECONDS = 1.0
+
+
+def email_domain(email):
+    return email.rpartition("@")[2].strip().lower()
+
+
+def interleave_domains(users):
+    """Round-robin across recipient domains, in order of first appearance"""
+    queues = OrderedDict()
+    for user in users:
+        queues.setdefault(email_domain(user["email"]), deque()).append(user)
+    ordered = []
+    active = deque(queues.values())
+    while active:
+        queue = active.popleft()
+        ordered.append(queue.popleft())
+        if queue:
+            active.append(queue)
+    return ordered
+
+
+class TokenBucket:
+    """Token bucket refilling at ``per_minute`` up to ``burst`` tokens (thread-safe)"""
+
+    def __init__(self, per_minute, burst=1, now=None):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic() if now is None else now
+        self._lock = threading.Lock()
+
+    def reserve(self, now=None):
+        """
+        Take a token, borrowing against the refill if none is left
+
+        Returns:
+            Seconds to wait before the reserved send may go out (0 if a
+            token was available)
+        """
+        with self._lock:
+            now = time.monotonic() if now is None else now
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self):
+        """Block until a token is available (for worker threads)"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class DomainThrottle:
+    """Per-domain send limits for a campaign
+
+    Args:
+        limits: ``{domain: emails per minute}``; ``"*"`` sets the limit for
+            every other domain
+        burst: Sends a domain may make back to back before its limit applies
+    """
+
+    def __init__(self, limits, burst=1):
+        self.limits = {domain.lower(): per_minute for domain, per_minute in limits.items()}
+        self.burst = burst
+        self.buckets = {}
+
+    def limit(self, domain):
+        """Emails per minute allowed to a domain (None if unlimited)"""
+        return self.limits.get(domain, self.limits.get(DEFAULT_DOMAIN))
+
+    def order(self, users):
+        return interleave_domains(users)
+
+    def reserve(self, email, now=None):
+        """Take a send slot for an address; returns seconds to wait first"""
+        domain = email_domain(email)
+        per_minute = self.limit(domain)
+        if not per_minute:
+            return 0.0
+        # Every domain has its own bucket, including those on the "*" limit
+        bucket = self.buckets.get(domain)
+        if bucket is None:
+            bucket = self.buckets[domain] = TokenBucket(per_minute, self.burst, now)
+        return bucket.reserve(now)
+
+    def schedule(self, items, email=lambda item: item["email"], window=WAVE_SECONDS, now=None):
+        """
+        Reserve a send slot for every item of a batch and group them in waves
+
+        Items whose slots come up within ``window`` seconds of the first in
+        a wave join it, unless the wave already has a waiting send to the
+        same domain (the domain's burst is only the sends that need no
+        wait). The wave waits for the last of its slots, so no send goes
+        out before its token.
+
+        Returns:
+            (seconds to wait before sending, items) pairs, in send order
+        """
+        slots = sorted((self.reserve(email(item), now), n) for n, item in enumerate(items))
+        waves = []
+        for delay, n in slots:
+            domain = email_domain(email(items[n]))
+            wave = waves[-1] if waves else None
+            if wave and delay - wave["first"] <= window and (delay <= 0 or domain not in wave["domains"]):
+                wave["delay"] = delay
+            else:
+                wave = {"first": delay, "delay": delay, "domains": set(), "items": []}
+                waves.append(wave)
+            wave["domains"].add(domain)
+            wave["items"].append(items[n])
+        return [(wave["delay"], wave["items"]) for wave in waves]
+
+    def describe(self):
+        # Named domains first, then the "*" default
+        domains = sorted(self.limits, key=lambda domain: (domain == DEFAULT_DOMAIN, domain))
+        limits = ", ".join(f"{domain} {self.limits[domain]:g}/min" for domain in domains)
+        return f"per domain: {limits} (burst {self.burst})"
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Checkpointed resume for the email campaign scripts.
+
+A live run writes two files next to the sent ledger:
+
+  checkpoint-<campaign>.recipients.json  recipient snapshot, written once
+  checkpoint-<campaign>.json             small progress record, rewritten
+                                         every CHECKPOINT_EVERY sends and
+                                         on interrupt
+
+The progress record holds the position in the snapshot, the rate limiter
+state (interval and last send time), failed recipients to retry and the
+time the snapshot was fetched. ``--resume`` restores the remaining
+recipients straight from the snapshot without touching Notion. With
+``--delta`` only users created in Notion since the snapshot are fetched
+and appended.
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_EVERY = 10
+
+
+def checkpoint_path(ledger_file, campaign):
+    """Checkpoint file for a campaign, stored next to its sent ledger"""
+    ledger_file = Path(ledger_file)
+    return ledger_file.with_name(f"checkpoint-{campaign}.json")
+
+
+def utc_now_iso():
+    """Current UTC time as an ISO-8601 string (Notion timestamp filter format)"""
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _write_json_atomic(path, data):
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class CampaignCheckpoint:
+    """Periodic progress checkpoint for one campaign run"""
+
+    def __init__(self, path, campaign, every=CHECKPOINT_EVERY, enabled=True):
+        self.path = Path(path)
+        self.snapshot_path = self.path.with_name(self.path.stem + ".recipients.json")
+        self.campaign = campaign
+        self.every = max(1, every)
+        self.enabled = enabled
+        self.recipients = []
+        self.position = 0
+        self.fetched_at = None
+        self.interval_seconds = 0
+        self.last_send_at = None
+        self.pending_retries = []
+        self._since_save = 0
+
+    def load(self):
+        """
+        Load a saved checkpoint for this campaign
+
+        Returns:
+            State dict with the remaining recipients under 'remaining', or
+            None if there is no usable checkpoint.
+        """
+        try:
+            with open(self.path, "r") as f:
+                state = json.load(f)
+            with open(self.snapshot_path, "r") as f:
+                recipients = json.load(f)
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            print(f"⚠️ Warning: checkpoint {self.path} is corrupted, ignoring it")
+            return None
+
+        if state.get("version") != CHECKPOINT_VERSION or state.get("campaign") != self.campaign:
+            print(f"⚠️ Warning: checkpoint {self.path} is for a different campaign, ignoring it")
+            return None
+
+        position = min(state.get("position", 0), len(recipients))
+        state["recipients"] = recipients
+        state["remaining"] = recipients[position:] + [
+            retry["user"] for retry in state.get("pending_retries", [])
+        ]
+        return state
+
+    def begin(self, recipients, fetched_at, interval_seconds=0, state=None):
+        """Start checkpointing a run over a recipient list (snapshot written once)"""
+        self.recipients = list(recipients)
+        self.position = 0
+        self.fetched_at = fetched_at
+        self.interval_seconds = interval_seconds
+        self.pending_retries = []
+        self.last_send_at = (state or {}).get("rate_limiter", {}).get("last_send_at")
+        self._since_save = 0
+        if self.enabled:
+            _write_json_atomic(self.snapshot_path, self.recipients)
+            self.save()
+
+    def advance(self, position, sent=False):
+        """Record progress; saves every ``every`` recipients"""
+        self.position = position
+        if sent:
+            self.last_send_at = time.time()
+        self._since_save += 1
+        if self._since_save >= self.every:
+            self.save()
+
+    def add_retry(self, user, error):
+        """Remember a failed recipient so a resumed run retries it"""
+        self.pending_retries.append({"user": user, "error": error})
+
+    def save(self, position=None):
+        """Write the progress record now"""
+        if position is not None:
+            self.position = position
+        self._since_save = 0
+        if not self.enabled:
+            return
+        _write_json_atomic(self.path, {
+            "version": CHECKPOINT_VERSION,
+            "campaign": self.campaign,
+            "updated_at": utc_now_iso(),
+            "fetched_at": self.fetched_at,
+            "position": self.position,
+            "total": len(self.recipients),
+            "rate_limiter": {
+                "interval_seconds": self.interval_seconds,
+                "last_send_at": self.last_send_at,
+            },
+            "pending_retries": self.pending_retries,
+        })
+
+    def finish(self):
+        """Mark the run complete: keep only pending retries, otherwise remove the checkpoint"""
+        if self.pending_retries:
+            self.save(position=len(self.recipients))
+        else:
+            self.clear()
+
+    def clear(self):
+        """Remove the checkpoint after a completed run"""
+        if not self.enabled:
+            # A dry or spooling run must not discard a real run's checkpoint
+            return
+        for path in (self.path, self.snapshot_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def wait_for_rate_limit(self, sleep=None):
+        """Honour the rate limit across a restart, based on the saved last send"""
+        if not self.last_send_at or not self.interval_seconds:
+            return 0
+        remaining = self.last_send_at + self.interval_seconds - time.time()
+        if remaining > 0:
+            (sleep or time.sleep)(remaining)
+            return remaining
+        return 0
+
+
+def describe_checkpoint(state):
+    """One-line summary of a loaded checkpoint for the console"""
+    retries = len(state.get("pending_retries", []))
+    return (
+        f"{state['position']}/{state['total']} processed, "
+        f"{retries} to retry, saved {state['updated_at']}"
+    )
@@ -9,6 +9,8 @@ import urllib.parse
 import re
 from pathlib import Path
 
+from campaign.events import recipient_hash
+
 class EmailLinkInterpolator:
     """Handles link generation and template interpolation for encourage emails."""
     
@@ -24,8 +26,18 @@ class EmailLinkInterpolator:
         'copy': 'CP'
     }
     
-    def __init__(self, template_path='encourage.html'):
-        """Initialize with the email template."""
+    def __init__(self, template_path='encourage.html', links=None, campaign_id='encourage'):
+        """
+        Initialize with the email template.
+
+        Args:
+            template_path: Compiled encourage template
+            links: tracking.clicks.LinkTable; when given, share links are
+                replaced with click-tracking redirects
+            campaign_id: Campaign the tracked clicks are counted under
+        """
+        self.links = links
+        self.campaign_id = campaign_id
         # Handle relative paths properly
         if not Path(template_path).is_absolute():
             # Look for template in same directory as script
@@ -47,8 +59,14 @@ class EmailLinkInterpolator:
             url += f"&src={self.PLATFORM_CODES[platform]}"
         return url
     
-    def generate_share_urls(self, referral_code, share_text=''):
-        """Generate all platform-specific share URLs."""
+    def generate_share_urls(self, referral_code, share_text='', recipient=None):
+        """
+        Generate all platform-specific share URLs.
+
+        With a link table every URL except 'copy' (shown for copying, not
+        clicked) is a click-tracking redirect; ``recipient`` is the
+        recipient hash the clicks are attributed to.
+        """
         base_url = self.generate_share_url(referral_code)
         encoded_url = urllib.parse.quote(base_url, safe='')
         encoded_text = urllib.parse.quote(share_text, safe='')
@@ -59,7 +77,7 @@ class EmailLinkInterpolator:
                          "tourists and residents for years to come. The survey closes midnight tonight!")
             encoded_text = urllib.parse.quote(share_text, safe='')
         
-        return {
+        urls = {
             'twitter': f"https://twitter.com/intent/tweet?text={encoded_text}&url={encoded_url}&hashtags=SaveNorthSwanage,TrafficSafety",
             'facebook': f"https://www.facebook.com/sharer/sharer.php?u={encoded_url}",
             'whatsapp': f"https://wa.me/?text={encoded_text}%20{encoded_url}",
@@ -68,6 +86,9 @@ class EmailLinkInterpolator:
             'sms': f"sms:?body={encoded_text}%20{base_url}",
             'copy': base_url
         }
+        if self.links is not None:
+            urls = self.links.track_urls(urls, self.campaign_id, recipient, skip=('copy',))
+        return urls
     
     def interpolate(self, user_data):
         """
@@ -89,9 +110,6 @@ class EmailLinkInterpolator:
         referral_code = user_data.get('referral_code', 'DEFAULTCODE')
         share_text = user_data.get('custom_share_text', '')
         
-        # Generate all share URLs
-        share_urls = self.generate_share_urls(referral_code, share_text)
-        
         # Start with the template
         content = self.template
         
@@ -129,6 +147,12 @@ class EmailLinkInterpolator:
                 content
             )
         
+        # Swap the share buttons for click-tracking redirects
+        if self.links is not None:
+            email = user_data.get('email')
+            recipient = recipient_hash(email) if email else None
+            content = self.links.track_html(content, self.campaign_id, recipient)
+        
         return content
     
     def save_interpolated(self, user_data, output_path=None):
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Recipient normalization and de-duplication for the email campaign scripts.
+
+Notion often holds the same person on several rows (repeated form
+submissions, different capitalisation, gmail dot/plus variants). Every
+sender runs the fetched users through ``dedupe_users`` so each mailbox is
+rendered and sent to exactly once per run.
+"""
+
+# Per-domain normalization policy.
+#   strip_plus: drop "+tag" from the local part
+#   strip_dots: drop "." from the local part
+#   alias:      canonical domain to fold this domain into
+# Domains not listed here are only trimmed and lowercased, since for most
+# providers "a.b@" and "ab@" (or "a+x@") can be different mailboxes.
+DOMAIN_POLICIES = {
+    "gmail.com": {"strip_plus": True, "strip_dots": True},
+    "googlemail.com": {"strip_plus": True, "strip_dots": True, "alias": "gmail.com"},
+    "outlook.com": {"strip_plus": True},
+    "hotmail.com": {"strip_plus": True},
+    "hotmail.co.uk": {"strip_plus": True},
+    "live.com": {"strip_plus": True},
+    "icloud.com": {"strip_plus": True},
+    "me.com": {"strip_plus": True},
+    "fastmail.com": {"strip_plus": True},
+    "protonmail.com": {"strip_plus": True},
+    "proton.me": {"strip_plus": True},
+}
+
+
+def clean_email(email):
+    """Trim and lowercase an address (the form we send to and record)"""
+    return (email or "").strip().lower()
+
+
+def normalize_email(email, policies=None):
+    """Return the canonical mailbox key for an address.
+
+    Used only as an index key - mail is still sent to ``clean_email(email)``.
+    """
+    email = clean_email(email)
+    local, sep, domain = email.rpartition("@")
+    if not sep:
+        return email
+
+    policy = (DOMAIN_POLICIES if policies is None else policies).get(domain, {})
+    if policy.get("strip_plus"):
+        local = local.split("+", 1)[0]
+    if policy.get("strip_dots"):
+        local = local.replace(".", "")
+    domain = policy.get("alias", domain)
+
+    return f"{local}@{domain}"
+
+
+def _row_rank(user):
+    """Sort key choosing the canonical row among duplicates.
+
+    Prefers the most complete row (most non-empty fields), then the lowest
+    Notion page id so the choice does not depend on query order.
+    """
+    filled = sum(1 for value in user.values() if value)
+    return (-filled, str(user.get("id", "")))
+
+
+def dedupe_users(users, policies=None):
+    """
+    Collapse users that share a mailbox into one canonical row each
+
+    Args:
+        users: List of user dicts with an 'email' key
+        policies: Optional domain policy mapping (defaults to DOMAIN_POLICIES)
+
+    Returns:
+        Tuple (unique_users, duplicates_removed). unique_users keeps the
+        order in which each mailbox was first seen.
+    """
+    index = {}
+    for user in users:
+        key = normalize_email(user["email"], policies)
+        current = index.get(key)
+        if current is None or _row_rank(user) < _row_rank(current):
+            index[key] = user
+
+    unique_users = []
+    seen = set()
+    for user in users:
+        key = normalize_email(user["email"], policies)
+        if key in seen:
+            continue
+        seen.add(key)
+        canonical = index[key]
+        unique_users.append({**canonical, "email": clean_email(canonical["email"])})
+
+    return unique_users, len(users) - len(unique_users)
+
+
+def build_sent_index(sent_emails, policies=None):
+    """Build a hash index of normalized keys for previously sent addresses"""
+    return {normalize_email(email, policies) for email in sent_emails}
+
+
+def filter_unsent(users, sent_index, policies=None):
+    """Return users whose normalized address is not in the sent index"""
+    return [u for u in users if normalize_email(u["email"], policies) not in sent_index]
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped membership index for the sent-emails ledgers.
+
+The ledger itself stays a JSON list (scripts/sent-*.json). Next to it we
+keep ``<ledger>.index``, built from the ledger once and reused while the
+ledger is unchanged:
+
+  header   magic, ledger size + mtime it was built from, entry count,
+           Bloom filter geometry
+  bloom    Bloom filter bits over the entries
+  digests  sorted 8-byte blake2b digests of every normalized address
+
+Both sections are read through mmap, so a membership check touches a few
+pages of the Bloom filter and, only when that says "maybe", a binary
+search over the digests. The ledger JSON is only parsed when the index is
+missing or stale. Addresses recorded during a run are appended to the JSON
+in place and folded into the index on close().
+"""
+
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+from bloom import BloomFilter, optimal_size
+from recipients import normalize_email
+
+INDEX_MAGIC = b"NSTCGSL1"
+# magic, ledger size, ledger mtime_ns, count, bloom bits, bloom hashes
+INDEX_HEADER = struct.Struct("<8sQQQQI")
+DIGEST_SIZE = 8
+BLOOM_ERROR_RATE = 0.01
+# Build the filter with headroom so appends don't force an early rebuild
+BLOOM_MIN_CAPACITY = 1024
+
+
+def email_digest(key):
+    """8-byte digest of a normalized address (collisions ~2^-64 per pair)"""
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+def _bloom_key(digest):
+    return digest.hex()
+
+
+def append_to_json_list(filepath, item):
+    """
+    Append one item to a JSON list file without parsing it
+
+    Rewrites only the closing bracket, so the cost is independent of the
+    ledger size. Falls back to a full rewrite if the file is missing or is
+    not a JSON list.
+    """
+    filepath = Path(filepath)
+    encoded = json.dumps(item)
+    try:
+        with open(filepath, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            ch = prev = b""
+            # Walk back over trailing whitespace to the closing bracket
+            while pos > 0:
+                f.seek(pos - 1)
+                ch = f.read(1)
+                if not ch.isspace():
+                    break
+                pos -= 1
+            if ch != b"]":
+                raise ValueError("not a JSON list")
+            close_pos = pos - 1
+            # Find the last significant character before the bracket
+            pos = close_pos
+            while pos > 0:
+                f.seek(pos - 1)
+                prev = f.read(1)
+                if not prev.isspace():
+                    break
+                pos -= 1
+            separator = "\n" if prev == b"[" else ",\n"
+            f.seek(pos)
+            f.truncate()
+            f.write(f"{separator}  {encoded}\n]".encode("utf-8"))
+        return
+    except FileNotFoundError:
+        pass
+    except ValueError:
+        print(f"⚠️ Warning: {filepath} is not a JSON list, rewriting")
+
+    with open(filepath, "w") as f:
+        json.dump([item], f, indent=2)
+
+
+class SentLedger:
+    """Sent-emails ledger with an on-disk Bloom filter and digest index"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".index")
+        self._file = None
+        self._mm = None
+        self._bloom = None
+        self._digests = None
+        self._views = []
+        self._count = 0
+        self._added = set()
+        self.rebuilt = False
+        self.open()
+
+    # -- index lifecycle -------------------------------------------------
+
+    def _ledger_stamp(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_size, st.st_mtime_ns
+        except FileNotFoundError:
+            return 0, 0
+
+    def open(self):
+        """Map the index, rebuilding it first if missing or stale"""
+        if not self._map_index():
+            self.rebuild()
+            self._map_index()
+
+    def _map_index(self):
+        try:
+            f = open(self.index_path, "rb")
+        except FileNotFoundError:
+            return False
+        try:
+            size = os.fstat(f.fileno()).st_size
+            if size < INDEX_HEADER.size:
+                f.close()
+                return False
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            f.close()
+            return False
+
+        magic, ledger_size, ledger_mtime, count, num_bits, num_hashes = INDEX_HEADER.unpack_from(mm, 0)
+        bloom_bytes = (num_bits + 7) // 8
+        expected = INDEX_HEADER.size + bloom_bytes + count * DIGEST_SIZE
+        if magic != INDEX_MAGIC or (ledger_size, ledger_mtime) != self._ledger_stamp() or size != expected:
+            mm.close()
+            f.close()
+            return False
+
+        self._release()
+        self._file, self._mm, self._count = f, mm, count
+        view = memoryview(mm)
+        bloom_start = INDEX_HEADER.size
+        bits = view[bloom_start:bloom_start + bloom_bytes]
+        self._bloom = BloomFilter(num_bits=num_bits, num_hashes=num_hashes, bits=bits)
+        self._digests = view[bloom_start + bloom_bytes:]
+        self._views = [bits, self._digests, view]
+        return True
+
+    def rebuild(self):
+        """Parse the ledger once and write a fresh index"""
+        try:
+            with open(self.path, "r") as f:
+                emails = json.load(f)
+        except FileNotFoundError:
+            emails = []
+        except json.JSONDecodeError:
+            print(f"⚠️ Warning: {self.path} is corrupted, starting fresh")
+            emails = []
+        digests = sorted({email_digest(normalize_email(e)) for e in emails})
+        self._write_index(digests)
+        self.rebuilt = True
+
+    def _write_index(self, digests):
+        """Write the index for a sorted iterable of digests atomically"""
+        digests = list(digests)
+        num_bits, num_hashes = optimal_size(
+            max(BLOOM_MIN_CAPACITY, 2 * len(digests)), BLOOM_ERROR_RATE
+        )
+        bloom = BloomFilter(num_bits=num_bits, num_hashes=num_hashes)
+        for digest in digests:
+            bloom.add(_bloom_key(digest))
+
+        ledger_size, ledger_mtime = self._ledger_stamp()
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(
+                INDEX_MAGIC, ledger_size, ledger_mtime, len(digests), num_bits, num_hashes
+            ))
+            f.write(bloom.bits)
+            f.write(b"".join(digests))
+        self._release()
+        os.replace(tmp_path, self.index_path)
+
+    def close(self):
+        """Fold addresses recorded this run into the index and unmap it"""
+        if self._added and self._mm is not None:
+            added = sorted(email_digest(k) for k in self._added if not self._contains_indexed(k))
+            existing = (
+                bytes(self._digests[i:i + DIGEST_SIZE])
+                for i in range(0, len(self._digests), DIGEST_SIZE)
+            )
+            merged = list(heapq.merge(existing, added))
+            self._added = set()
+            self._write_index(merged)
+        self._release()
+
+    def _release(self):
+        # Views must be released before the mmap can be closed
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._bloom = None
+        self._digests = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- membership -------------------------------------------------------
+
+    def _contains_indexed(self, key):
+        if self._bloom is None:
+            return False
+        digest = email_digest(key)
+        if _bloom_key(digest) not in self._bloom:
+            return False
+        # Bloom says maybe: confirm with a binary search over the digests
+        digests = self._digests
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = bytes(digests[mid * DIGEST_SIZE:(mid + 1) * DIGEST_SIZE])
+            if probe < digest:
+                lo = mid + 1
+            elif probe > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def __contains__(self, email):
+        key = normalize_email(email)
+        return key in self._added or self._contains_indexed(key)
+
+    def __len__(self):
+        return self._count + len(self._added)
+
+    def record(self, email):
+        """Record a successful send in the ledger and the in-run index"""
+        append_to_json_list(self.path, email)
+        self._added.add(normalize_email(email))
+
+
+def main():
+    """Rebuild or inspect a ledger index: python sent_ledger.py LEDGER [EMAIL ...]"""
+    if len(sys.argv) < 2:
+        print(main.__doc__)
+        return 1
+    ledger = SentLedger(sys.argv[1])
+    print(f"📌 {len(ledger)} addresses indexed ({ledger.index_path.stat().st_size} bytes)"
+          f"{' - rebuilt' if ledger.rebuilt else ''}")
+    for email in sys.argv[2:]:
+        print(f"  {email}: {'sent' if email in ledger else 'not sent'}")
+    ledger.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Suppression list shared by every email sender.
+
+Bounced, complained and unsubscribed addresses are kept in
+scripts/suppressed-emails.json as a mapping of normalized address to
+{reason, source, added}. Senders drop suppressed recipients right after
+the Notion fetch, before any rendering.
+
+Usage:
+  python suppression.py add someone@example.com --reason unsubscribed
+  python suppression.py remove someone@example.com
+  python suppression.py import-csv bounces.csv --column email --reason bounced
+  python suppression.py import-failed ../scripts/failed-emails.json --match "550"
+  python suppression.py check someone@example.com
+  python suppression.py stats
+"""
+
+import argparse
+import csv
+import json
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from recipients import normalize_email
+
+# Get script directory
+SCRIPT_DIR = Path(__file__).parent.absolute()
+PROJECT_ROOT = SCRIPT_DIR.parent
+
+# File paths
+SUPPRESSION_FILE = PROJECT_ROOT / "scripts" / "suppressed-emails.json"
+FAILED_EMAILS_FILE = PROJECT_ROOT / "scripts" / "failed-emails.json"
+
+
+class SuppressionList:
+    """Hash index of suppressed addresses persisted as JSON"""
+
+    def __init__(self, entries=None, path=None):
+        self.path = Path(path) if path else None
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path=None):
+        """Load the suppression list from disk (empty if missing)"""
+        path = Path(path or SUPPRESSION_FILE)
+        try:
+            with open(path, "r") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            entries = {}
+        except json.JSONDecodeError:
+            print(f"⚠️ Warning: {path} is corrupted, ignoring suppression list")
+            entries = {}
+        return cls(entries, path=path)
+
+    def save(self, path=None):
+        """Persist the suppression list"""
+        path = Path(path or self.path or SUPPRESSION_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, email):
+        # The entries are in memory anyway (the CLI edits and saves them), so
+        # one dict lookup is the whole check
+        return normalize_email(email) in self.entries
+
+    def add(self, email, reason="manual", source="cli"):
+        """Suppress an address. Returns True if it was newly added."""
+        key = normalize_email(email)
+        if not key or "@" not in key:
+            return False
+        if key in self.entries:
+            return False
+        self.entries[key] = {
+            "reason": reason,
+            "source": source,
+            "added": datetime.now().isoformat(),
+        }
+        return True
+
+    def remove(self, email):
+        """Remove an address. Returns True if it was present."""
+        return self.entries.pop(normalize_email(email), None) is not None
+
+    def reason(self, email):
+        """Return the suppression record for an address, or None"""
+        return self.entries.get(normalize_email(email))
+
+    def import_csv(self, csv_path, column="email", reason="imported", reason_column=None):
+        """Import addresses from a CSV file. Returns the number added."""
+        added = 0
+        with open(csv_path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            if column not in (reader.fieldnames or []):
+                raise ValueError(f"Column '{column}' not found in {csv_path}")
+            for row in reader:
+                row_reason = (row.get(reason_column) if reason_column else None) or reason
+                if self.add(row[column], reason=row_reason, source=Path(csv_path).name):
+                    added += 1
+        return added
+
+    def import_failed_ledger(self, ledger_path=None, match=None, reason="failed"):
+        """
+        Import addresses from a failed-emails ledger
+
+        Args:
+            ledger_path: Path to a failed-*.json file (list of user dicts with 'error')
+            match: Optional list of substrings; only errors containing one are imported
+
+        Returns:
+            Number of addresses added
+        """
+        ledger_path = Path(ledger_path or FAILED_EMAILS_FILE)
+        try:
+            with open(ledger_path, "r") as f:
+                failed = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+
+        added = 0
+        for entry in failed:
+            error = str(entry.get("error") or "")
+            if match and not any(m.lower() in error.lower() for m in match):
+                continue
+            if self.add(entry.get("email", ""), reason=f"{reason}: {error}"[:200], source=ledger_path.name):
+                added += 1
+        return added
+
+
+def filter_suppressed(users, suppression):
+    """Return (kept_users, suppressed_count) with suppressed addresses dropped"""
+    if not len(suppression):
+        return users, 0
+    kept = [u for u in users if u["email"] not in suppression]
+    return kept, len(users) - len(kept)
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Manage the email suppression list")
+    parser.add_argument("--file", type=str, help="Suppression list path (default: scripts/suppressed-emails.json)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="Suppress one or more addresses")
+    add.add_argument("emails", nargs="+")
+    add.add_argument("--reason", default="manual")
+
+    remove = sub.add_parser("remove", help="Remove addresses from the list")
+    remove.add_argument("emails", nargs="+")
+
+    import_csv = sub.add_parser("import-csv", help="Import addresses from a CSV file")
+    import_csv.add_argument("csv_file")
+    import_csv.add_argument("--column", default="email")
+    import_csv.add_argument("--reason", default="imported")
+    import_csv.add_argument("--reason-column", help="CSV column holding a per-row reason")
+
+    import_failed = sub.add_parser("import-failed", help="Import addresses from a failed-emails ledger")
+    import_failed.add_argument("ledger", nargs="?", help="Ledger path (default: scripts/failed-emails.json)")
+    import_failed.add_argument("--match", action="append", help="Only import errors containing this text (repeatable)")
+
+    check = sub.add_parser("check", help="Check whether addresses are suppressed")
+    check.add_argument("emails", nargs="+")
+
+    sub.add_parser("stats", help="Show suppression counts by reason")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    suppression = SuppressionList.load(args.file)
+
+    if args.command == "add":
+        added = sum(suppression.add(e, reason=args.reason) for e in args.emails)
+        suppression.save()
+        print(f"✅ Suppressed {added} new address(es), {len(suppression)} total")
+    elif args.command == "remove":
+        removed = sum(suppression.remove(e) for e in args.emails)
+        suppression.save()
+        print(f"✅ Removed {removed} address(es), {len(suppression)} total")
+    elif args.command == "import-csv":
+        added = suppression.import_csv(
+            args.csv_file, column=args.column, reason=args.reason, reason_column=args.reason_column
+        )
+        suppression.save()
+        print(f"✅ Imported {added} new address(es) from {args.csv_file}, {len(suppression)} total")
+    elif args.command == "import-failed":
+        added = suppression.import_failed_ledger(args.ledger, match=args.match)
+        suppression.save()
+        print(f"✅ Imported {added} new address(es) from failed ledger, {len(suppression)} total")
+    elif args.command == "check":
+        for email in args.emails:
+            record = suppression.reason(email)
+            if record:
+                print(f"🚫 {email} - {record['reason']} ({record['source']}, {record['added']})")
+            else:
+                print(f"✅ {email} - not suppressed")
+    elif args.command == "stats":
+        print(f"📊 {len(suppression)} suppressed addresses")
+        reasons = Counter(e["reason"].split(":")[0] for e in suppression.entries.values())
+        for reason, count in reasons.most_common():
+            print(f"  {reason}: {count}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
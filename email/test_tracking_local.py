@@ -4,22 +4,37 @@ Local Email Tracking Test Script
 
 This script helps test the email tracking pixel implementation locally.
 It simulates email opens and verifies tracking data is properly recorded.
+
+With --load it capacity-tests a pixel endpoint instead: it replays a
+realistic open pattern (a burst right after the send, a long tail of late
+opens, repeat opens and bot/scanner fetches) with asyncio over keep-alive
+connections, and reports the achieved request rate, latency percentiles
+and errors:
+
+    python test_tracking_local.py --load --url http://127.0.0.1:8080/api/track-email \
+        --recipients 20000 --concurrency 200 --duration 30
 """
 
-import requests
+import asyncio
+import random
 import time
 import base64
 import json
 import sys
 import os
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlencode, urlsplit
 import argparse
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from auto_resend_news import obfuscate_email, generate_tracking_pixel_url, CONFIG
+from campaign.lazy import lazy_import
+from campaign.tracking import obfuscate_email
+
+requests = lazy_import("requests")
 
 # Test configuration
 TEST_BASE_URL = "http://localhost:3000"
@@ -207,6 +222,229 @@ def simulate_email_campaign():
     print(f"   - Open rate: {(opens/len(TEST_EMAILS)*100):.1f}%")
 
 
+# -- load generation -------------------------------------------------------
+
+BROWSER_AGENTS = [
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36 Edg/124.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko)",
+    "Mozilla/5.0 (Windows NT 5.1; rv:11.0) Gecko Firefox/11.0 (via ggpht.com GoogleImageProxy)",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Mobile Safari/537.36",
+]
+BOT_AGENTS = [
+    "Googlebot/2.1 (+http://www.google.com/bot.html)",
+    "facebookexternalhit/1.1",
+    "Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)",
+    "LinkedInBot/1.0 (compatible; Mozilla/5.0; Apache-HttpClient +http://www.linkedin.com)",
+]
+REQUEST_TIMEOUT = 10.0
+
+
+def generate_hits(recipients, campaign_id, duration, open_rate=0.5, repeat_rate=0.3,
+                  bot_rate=0.05, burst_share=0.6, seed=None):
+    """
+    Pixel hits for a simulated send, as (offset seconds, query, user agent)
+
+    Of the recipients, ``open_rate`` open the email: ``burst_share`` of them
+    within the first minutes after the send (exponential, mean 5% of the
+    duration), the rest spread over the whole duration with most of them
+    early (a long tail). ``repeat_rate`` of openers open it 1-3 more times
+    later. ``bot_rate`` of all recipients get a scanner or link-preview
+    fetch within seconds of delivery. Offsets are scaled to ``duration``;
+    a duration of 0 sends every hit at once, in that order.
+    """
+    rng = random.Random(seed)
+    sent_ms = str(int(time.time() * 1000))
+    hits = []
+    span = duration
+
+    def hit(offset, email, agent):
+        query = urlencode({"e": obfuscate_email(email), "c": campaign_id, "t": sent_ms})
+        hits.append((min(offset, span) if duration else 0.0, query, agent))
+
+    # The pattern is generated over one second when there is no duration
+    duration = duration or 1.0
+
+    for i in range(recipients):
+        email = f"load-{i}@example.com"
+        if rng.random() < bot_rate:
+            hit(rng.uniform(0, duration * 0.01), email, rng.choice(BOT_AGENTS))
+        if rng.random() >= open_rate:
+            continue
+        agent = rng.choice(BROWSER_AGENTS)
+        if rng.random() < burst_share:
+            first = rng.expovariate(1 / (duration * 0.05))
+        else:
+            first = duration * rng.random() ** 3
+        hit(first, email, agent)
+        if rng.random() < repeat_rate:
+            for _ in range(rng.randint(1, 3)):
+                hit(first + rng.uniform(0, duration - min(first, duration)), email, agent)
+
+    hits.sort(key=lambda h: h[0])
+    return hits
+
+
+class PixelConnection:
+    """Keep-alive HTTP/1.1 connection issuing pixel GETs (stdlib asyncio streams)"""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.secure = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.secure else 80)
+        self.path = parts.path or "/"
+        self.reader = self.writer = None
+
+    async def get(self, query, user_agent):
+        """Fetch the pixel; returns the HTTP status"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.secure or None
+            )
+        request = (
+            f"GET {self.path}?{query} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            f"User-Agent: {user_agent}\r\n"
+            "Accept: image/*\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        )
+        self.writer.write(request.encode("latin-1"))
+        try:
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+            if not status_line:
+                raise ConnectionResetError("server closed the connection")
+            status = int(status_line.split()[1])
+            length = 0
+            keep_alive = True
+            while True:
+                line = await self.reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                name = name.strip().lower()
+                if name == "content-length":
+                    length = int(value)
+                elif name == "connection" and value.strip().lower() == "close":
+                    keep_alive = False
+            if length:
+                await self.reader.readexactly(length)
+        except BaseException:
+            # The stream is in an unknown state; reconnect for the next hit
+            self.close()
+            raise
+        if not keep_alive or status_line.startswith(b"HTTP/1.0"):
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+class LoadResult:
+    """Latencies, statuses and errors collected during a load run"""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.max_lag = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def requests(self):
+        return len(self.latencies) + sum(self.errors.values())
+
+    @property
+    def rps(self):
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def percentiles(self, points=(50, 90, 99)):
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return {}
+        return {p: ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+
+    def report(self):
+        lines = [
+            f"   Requests: {self.requests} in {self.elapsed:.1f}s ({self.rps:.0f} req/s)",
+        ]
+        if self.latencies:
+            percentiles = ", ".join(
+                f"p{p} {seconds * 1000:.1f}ms" for p, seconds in self.percentiles().items()
+            )
+            lines.append(f"   Latency: {percentiles}, max {max(self.latencies) * 1000:.1f}ms")
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(self.statuses.items()))
+        lines.append(f"   Statuses: {statuses or 'none'}")
+        errors = sum(self.errors.values())
+        lines.append(f"   Errors: {errors}" + (f" ({dict(self.errors)})" if errors else ""))
+        lines.append(f"   Max schedule lag: {self.max_lag * 1000:.0f}ms")
+        return "\n".join(lines)
+
+
+async def run_load(url, hits, concurrency=50, timeout=REQUEST_TIMEOUT):
+    """
+    Replay hits against a pixel URL on ``concurrency`` keep-alive connections
+
+    Each hit is sent at its offset from the start (or as soon as a
+    connection is free, when the server cannot keep up; the largest such
+    delay is reported as the schedule lag).
+    """
+    loop = asyncio.get_running_loop()
+    result = LoadResult()
+    pending = iter(hits)
+    start = loop.time()
+
+    async def worker():
+        connection = PixelConnection(url)
+        try:
+            for offset, query, agent in pending:
+                delay = start + offset - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    result.max_lag = max(result.max_lag, -delay)
+                began = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(connection.get(query, agent), timeout)
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+                    result.errors[type(e).__name__] += 1
+                    continue
+                result.latencies.append(time.perf_counter() - began)
+                result.statuses[status] += 1
+        finally:
+            connection.close()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    result.elapsed = loop.time() - start
+    return result
+
+
+def run_load_test(args):
+    """Generate an open pattern and replay it against --url"""
+    hits = generate_hits(
+        args.recipients,
+        f"load-test-{int(time.time())}",
+        args.duration,
+        open_rate=args.open_rate,
+        repeat_rate=args.repeat_rate,
+        bot_rate=args.bot_rate,
+        seed=args.seed,
+    )
+    print(f"🏋️  Load test against {args.url}")
+    print(
+        f"   {len(hits)} hits from {args.recipients} recipients over {args.duration:g}s "
+        f"on {args.concurrency} connections"
+    )
+    result = asyncio.run(run_load(args.url, hits, args.concurrency))
+    print("\n📊 Results")
+    print(result.report())
+    return result
+
+
 def check_server_logs():
     """Provide instructions for checking server logs"""
     print("\n📋 To verify tracking in server logs:")
@@ -225,9 +463,25 @@ def main():
     parser.add_argument(
         "--campaign", action="store_true", help="Run campaign simulation only"
     )
+    load = parser.add_argument_group("load test")
+    load.add_argument("--load", action="store_true", help="Replay a simulated open pattern under load")
+    load.add_argument("--url", default=f"{TEST_BASE_URL}/api/track-email",
+                      help="Pixel endpoint to load (default: %(default)s)")
+    load.add_argument("--recipients", type=int, default=5000, help="Simulated recipients (default: 5000)")
+    load.add_argument("--concurrency", type=int, default=50, help="Concurrent connections (default: 50)")
+    load.add_argument("--duration", type=float, default=30,
+                      help="Seconds the open pattern is compressed into (0 = as fast as possible)")
+    load.add_argument("--open-rate", type=float, default=0.5, help="Share of recipients who open")
+    load.add_argument("--repeat-rate", type=float, default=0.3, help="Share of openers who open again")
+    load.add_argument("--bot-rate", type=float, default=0.05, help="Share of recipients hit by a bot fetch")
+    load.add_argument("--seed", type=int, help="Random seed for a reproducible pattern")
 
     args = parser.parse_args()
 
+    if args.load:
+        result = run_load_test(args)
+        sys.exit(1 if result.errors or not result.latencies else 0)
+
     print("🚀 Email Tracking Local Test Suite")
     print("==================================\n")
 
@@ -290,4 +290,24 @@ def capture_print(mocker):
 @pytest.fixture
 def mock_getpass(mocker):
     """Mock getpass for password input"""
-    return mocker.patch("getpass.getpass", return_value="test-password-123")
\ No newline at end of file
+    return mocker.patch("getpass.getpass", return_value="test-password-123")
+
+
+@pytest.fixture
+def make_campaign(temp_files):
+    """Factory for a Campaign over static users with temp ledgers"""
+    from campaign import Campaign, StaticSource
+
+    def factory(users, backend, **kwargs):
+        kwargs.setdefault("render", lambda user: f"<p>{user['name']}</p>")
+        return Campaign(
+            campaign_id="test",
+            title="Test Campaign",
+            source=StaticSource(users),
+            backend=backend,
+            sent_file=temp_files["sent"],
+            failed_file=temp_files["failed"],
+            suppression_file=temp_files["dir"] / "suppressed.json",
+            **kwargs,
+        )
+    return factory
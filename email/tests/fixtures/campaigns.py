@@ -0,0 +1,36 @@
+"""
+Campaign engine test doubles: a recording backend and parsed-args builder
+"""
+
+from argparse import Namespace
+
+from campaign import DeliveryBackend
+
+
+class RecordingBackend(DeliveryBackend):
+    """Backend that records what it was asked to send"""
+
+    def __init__(self, fail=()):
+        self.sent = []
+        self.batches = []
+        self.fail = set(fail)
+        self.closed = False
+
+    def send(self, user, html):
+        self.sent.append((user["email"], html))
+        if user["email"] in self.fail:
+            return False, "rejected"
+        return True, None
+
+    def send_batch(self, items):
+        self.batches.append([user["email"] for user, _ in items])
+        return super().send_batch(items)
+
+    def close(self):
+        self.closed = True
+
+
+def make_args(**overrides):
+    args = {"dry_run": False, "resume": False, "delta": False, "fast": False, "batch_size": 50}
+    args.update(overrides)
+    return Namespace(**args)
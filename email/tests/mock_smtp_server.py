@@ -74,6 +74,7 @@ class MockSMTPServer:
         self.handler = MockSMTPHandler()
         self.controller = None
         self.thread = None
+        self.stopped = threading.Event()
     
     def start(self):
         """Start the mock SMTP server"""
@@ -95,12 +96,13 @@ class MockSMTPServer:
     def _run_server(self):
         """Run the server in a thread"""
         self.controller.start()
-        # Keep the thread alive
-        while True:
-            time.sleep(0.1)
+        # Keep the thread alive until stop(); an Event rather than a
+        # time.sleep loop, so tests that patch time.sleep never see it
+        self.stopped.wait()
     
     def stop(self):
         """Stop the mock SMTP server"""
+        self.stopped.set()
         if self.controller:
             self.controller.stop()
             print(f"Mock SMTP server stopped")
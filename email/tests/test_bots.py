@@ -0,0 +1,89 @@
+"""
+Tests for the bot user-agent classifier
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from tests.fixtures.user_agents import BOT_USER_AGENTS, BROWSER_USER_AGENTS, USER_AGENTS
+from tracking.bots import BotClassifier, benchmark, is_bot, is_bot_linear, load_corpus, main
+from tracking.processor import coalesce
+
+
+class TestClassifier:
+    """Test the compiled classifier against the linear scan"""
+
+    @pytest.mark.parametrize("user_agent", USER_AGENTS)
+    def test_agrees_with_linear_scan(self, user_agent):
+        assert is_bot(user_agent) == is_bot_linear(user_agent)
+
+    def test_corpus_verdicts(self):
+        assert not any(map(is_bot, BROWSER_USER_AGENTS))
+        assert all(map(is_bot, BOT_USER_AGENTS))
+
+    def test_empty_and_case(self):
+        assert is_bot("") is False
+        assert is_bot(None) is False
+        assert is_bot("GOOGLEBOT/2.1")
+
+    def test_repeated_agents_hit_the_cache(self):
+        classifier = BotClassifier(cache_size=8)
+        for _ in range(5):
+            classifier(BROWSER_USER_AGENTS[0])
+
+        info = classifier.cache_info()
+        assert (info.hits, info.misses) == (4, 1)
+        assert BotClassifier(cache_size=0).cache_info() is None
+
+    def test_custom_patterns_are_escaped(self):
+        classifier = BotClassifier(["proxy.example", "Bot"])
+
+        assert classifier("image proxy.example fetcher")
+        assert not classifier("image proxyXexample fetcher")
+        assert classifier.match("SomeBOT/1.0") == "bot"
+        assert classifier.match("Firefox") is None
+
+    def test_processor_skips_spooled_bot_opens(self):
+        events = [
+            {"ts": 1, "event": "open", "email": "a@example.com", "campaign": "news",
+             "user_agent": BROWSER_USER_AGENTS[0]},
+            {"ts": 2, "event": "open", "email": "a@example.com", "campaign": "news",
+             "user_agent": BOT_USER_AGENTS[0]},
+        ]
+
+        assert coalesce(events)["a@example.com|news"].count == 1
+
+
+class TestBenchmark:
+    """Test the microbenchmark command"""
+
+    def test_corpus_from_text_and_opens_files(self, tmp_path):
+        text = tmp_path / "agents.txt"
+        text.write_text("\n".join(USER_AGENTS[:3]) + "\n\n")
+        opens = tmp_path / "opens.jsonl"
+        opens.write_text('{"event": "open", "user_agent": "Twitterbot/1.0"}\n{"event": "open"}\n{"trunc')
+
+        assert load_corpus(text) == USER_AGENTS[:3]
+        assert load_corpus(opens) == ["Twitterbot/1.0"]
+
+    def test_main_prints_timings(self, tmp_path, capsys):
+        corpus = tmp_path / "agents.txt"
+        corpus.write_text("\n".join(USER_AGENTS))
+
+        assert main([str(corpus), "--repeat", "2"]) == 0
+
+        out = capsys.readouterr().out
+        assert f"{len(USER_AGENTS)} user agents" in out
+        assert "linear" in out and "compiled" in out and "cached" in out
+
+    @pytest.mark.performance
+    def test_cached_classifier_beats_linear_scan(self):
+        # A realistic mix: few distinct agents, many repeats
+        results = benchmark(USER_AGENTS * 50, repeat=10)
+
+        assert results["cached"] < results["linear"]
@@ -0,0 +1,125 @@
+"""
+Tests for the shared campaign engine
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import auto_resend
+import auto_smtp
+from campaign import NotionSource, run_campaign
+from tests.fixtures.campaigns import RecordingBackend, make_args
+from tests.fixtures.notion_responses import get_single_page_response
+
+
+class TestCampaignRun:
+    """Test the engine pipeline with a pluggable backend"""
+
+    def test_sequential_run(self, make_campaign, sample_users, temp_files, mock_time):
+        backend = RecordingBackend(fail={sample_users[1]["email"]})
+
+        stats = run_campaign(make_campaign(sample_users, backend, rate_limit_seconds=2), make_args())
+
+        assert stats["sent"] == len(sample_users) - 1
+        assert stats["failed"] == 1
+        assert backend.sent[0] == (sample_users[0]["email"], f"<p>{sample_users[0]['name']}</p>")
+        assert backend.closed
+        assert mock_time.call_count == len(sample_users) - 1
+        failed = json.loads(temp_files["failed"].read_text())
+        assert [f["email"] for f in failed] == [sample_users[1]["email"]]
+
+    def test_fast_mode_batches(self, make_campaign, sample_users, temp_files, mock_time):
+        backend = RecordingBackend()
+
+        stats = run_campaign(
+            make_campaign(sample_users, backend, batch_delay_seconds=1), make_args(fast=True, batch_size=2)
+        )
+
+        assert stats["sent"] == len(sample_users)
+        assert [len(b) for b in backend.batches] == [2, 2, 1]
+        assert mock_time.call_count == 2
+        assert json.loads(temp_files["sent"].read_text()) == [u["email"] for u in sample_users]
+
+    def test_fast_mode_render_failure(self, make_campaign, sample_users, temp_files, mock_time):
+        backend = RecordingBackend()
+        campaign = make_campaign(sample_users, backend)
+        bad = sample_users[2]["email"]
+
+        def render(user):
+            if user["email"] == bad:
+                raise ValueError("boom")
+            return "<p/>"
+        campaign.render = render
+
+        stats = run_campaign(campaign, make_args(fast=True, batch_size=10))
+
+        assert stats["sent"] == len(sample_users) - 1
+        assert stats["failed"] == 1
+        assert bad not in backend.batches[0]
+        failed = json.loads(temp_files["failed"].read_text())
+        assert failed[0]["error"] == "HTML generation failed"
+
+    def test_batch_size_capped_by_backend(self, make_campaign, sample_users, mock_time):
+        backend = RecordingBackend()
+        backend.max_batch = 3
+
+        run_campaign(make_campaign(sample_users, backend), make_args(fast=True, batch_size=50))
+
+        assert [len(b) for b in backend.batches] == [3, 2]
+
+    def test_dry_run_does_not_render_or_sleep(self, make_campaign, sample_users, mock_time, capsys):
+        backend = RecordingBackend()
+        campaign = make_campaign(sample_users, backend, rate_limit_seconds=5)
+        campaign.render = pytest.fail
+
+        run_campaign(campaign, make_args(dry_run=True))
+
+        assert backend.sent == []
+        mock_time.assert_not_called()
+        assert "Mode: DRY RUN" in capsys.readouterr().out
+
+
+class TestSources:
+    """Test recipient sources"""
+
+    def test_notion_source_extra_fields(self, mocker, monkeypatch, sample_users):
+        monkeypatch.setenv("NOTION_TOKEN", "t")
+        monkeypatch.setenv("NOTION_DATABASE_ID", "db")
+        client = mocker.Mock()
+        client.return_value.databases.query.return_value = get_single_page_response(sample_users[:2])
+
+        users = NotionSource(client, extra_fields=lambda props, user: {"upper": user["email"].upper()}).fetch()
+
+        client.assert_called_once_with(auth="t")
+        assert [u["upper"] for u in users] == [u["email"].upper() for u in sample_users[:2]]
+
+    def test_encourage_users_get_referral_codes(self, mocker, sample_users):
+        client = mocker.patch.object(auto_resend, "NotionClient")
+        client.return_value.databases.query.return_value = get_single_page_response(sample_users[:3])
+
+        users = auto_resend.fetch_users_from_notion()
+
+        assert all(len(u["referralCode"]) == 11 for u in users)
+
+
+class TestScriptsShareEngine:
+    """Test that every script can use the batched path"""
+
+    def test_auto_smtp_fast_mode(self, mocker, temp_files, sample_users, mock_time):
+        mocker.patch.object(sys, "argv", ["auto_smtp.py", "--fast", "--batch-size", "2"])
+        mocker.patch.object(auto_smtp, "SENT_EMAILS_FILE", temp_files["sent"])
+        mocker.patch.object(auto_smtp, "FAILED_EMAILS_FILE", temp_files["failed"])
+        mocker.patch.object(auto_smtp, "fetch_users_from_notion", return_value=sample_users)
+        render = mocker.patch.object(auto_smtp, "compile_mjml_template", return_value="<html/>")
+        smtp = mocker.patch("smtplib.SMTP").return_value
+
+        auto_smtp.main()
+
+        assert render.call_count == len(sample_users)
+        assert smtp.send_message.call_count == len(sample_users)
+        smtp.quit.assert_called_once()
@@ -0,0 +1,207 @@
+"""
+Tests for TOML campaign definitions and plan compilation
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign import __main__ as campaign_cli
+from campaign.plan import PlanError, compile_plan, load_definition, validate_definition
+
+SCRIPT_DIR = Path(__file__).parent.parent
+
+DEFINITION = """
+[campaign]
+id = "test-campaign"
+subject = "Hello"
+sender = "Test <test@example.com>"
+
+[source]
+type = "json"
+path = "users.json"
+
+[template]
+path = "template.html"
+
+[template.vars]
+target_count = 1000
+
+[delivery]
+backend = "outbox"
+outbox = "outbox"
+
+[rate]
+per_minute = 120
+
+[files]
+sent = "sent-emails.json"
+failed = "failed-emails.json"
+suppression = "suppressed-emails.json"
+"""
+
+
+@pytest.fixture
+def campaign_dir(tmp_path, sample_users):
+    (tmp_path / "users.json").write_text(json.dumps(sample_users))
+    (tmp_path / "template.html").write_text(
+        "<p>Hi {{name}}, {{target_count}} needed</p>{{tracking_pixel}}"
+    )
+    (tmp_path / "campaign.toml").write_text(DEFINITION)
+    return tmp_path
+
+
+def write_definition(campaign_dir, old, new):
+    path = campaign_dir / "campaign.toml"
+    path.write_text(DEFINITION.replace(old, new))
+    return path
+
+
+class TestValidation:
+    """Test definition validation"""
+
+    def test_valid_definition(self, campaign_dir):
+        plan = compile_plan(campaign_dir / "campaign.toml")
+
+        assert plan.campaign_id == "test-campaign"
+        assert plan.rate.interval_seconds == 0.5
+        assert plan.sent_file == campaign_dir / "sent-emails.json"
+        plan.close()
+
+    def test_reports_every_problem(self):
+        errors = validate_definition({
+            "campaign": {"id": "x", "subject": 3},
+            "delivery": {"backend": "carrier-pigeon"},
+            "rate": {"interval_seconds": 1, "per_minute": 60, "batch_size": 0},
+            "files": {"sent": "a.json", "failed": "b.json", "extra": "c"},
+            "extras": {},
+        })
+
+        assert "missing [template] section" in errors
+        assert "campaign.subject has the wrong type" in errors
+        assert "missing campaign.sender" in errors
+        assert "unknown key files.extra" in errors
+        assert "unknown section [extras]" in errors
+        assert "set only one of rate.interval_seconds and rate.per_minute" in errors
+        assert "rate.batch_size must be positive" in errors
+        assert any(e.startswith("delivery.backend must be one of") for e in errors)
+
+    @pytest.mark.parametrize(
+        "old, new, top, message",
+        [
+            ('[source]\ntype = "json"\npath = "users.json"\n', "", 'source = "notion"\n', "[source] must be a table"),
+            (
+                'path = "template.html"\n\n[template.vars]\ntarget_count = 1000\n',
+                'path = "template.html"\nvars = "x"\n',
+                "",
+                "template.vars has the wrong type",
+            ),
+            ('[delivery]\nbackend = "outbox"\noutbox = "outbox"\n', "", 'delivery = "resend"\n', "[delivery] must be a table"),
+            ("[rate]\nper_minute = 120\n", "", 'rate = "fast"\n', "[rate] must be a table"),
+        ],
+        ids=["source", "template.vars", "delivery", "rate"],
+    )
+    def test_wrong_section_types_are_plan_errors(self, campaign_dir, capsys, old, new, top, message):
+        # Top-level keys must come before the first table
+        (campaign_dir / "campaign.toml").write_text(top + DEFINITION.replace(old, new))
+
+        assert campaign_cli.main([str(campaign_dir / "campaign.toml"), "--check"]) == 2
+        assert message in capsys.readouterr().out
+
+    def test_unknown_placeholder(self, campaign_dir):
+        (campaign_dir / "template.html").write_text("<p>{{nmae}}</p>")
+
+        with pytest.raises(PlanError, match=r"\{\{nmae\}\} has no value"):
+            compile_plan(campaign_dir / "campaign.toml")
+
+    def test_missing_template(self, campaign_dir):
+        path = write_definition(campaign_dir, '"template.html"', '"missing.html"')
+
+        with pytest.raises(PlanError, match="template not found"):
+            compile_plan(path)
+
+    def test_toml_syntax_error(self, campaign_dir):
+        path = write_definition(campaign_dir, 'subject = "Hello"', "subject = ")
+
+        with pytest.raises(PlanError, match="TOML syntax error"):
+            compile_plan(path)
+
+    def test_check_reports_missing_ledger_directory(self, campaign_dir, capsys):
+        path = write_definition(campaign_dir, 'sent = "sent-emails.json"', 'sent = "logs/sent-emails.json"')
+
+        assert campaign_cli.main([str(path), "--check"]) == 2
+        assert f"files.sent directory not found: {campaign_dir / 'logs'}" in capsys.readouterr().out
+        assert not (campaign_dir / "logs").exists()
+
+    def test_resend_requires_api_key_for_live_runs(self, campaign_dir, monkeypatch, mocker):
+        monkeypatch.delenv("RESEND_API_KEY", raising=False)
+        mocker.patch("resend.api_key", None)
+        path = write_definition(campaign_dir, 'backend = "outbox"', 'backend = "resend"')
+
+        with pytest.raises(PlanError, match="RESEND_API_KEY"):
+            compile_plan(path)
+        compile_plan(path, dry_run=True).close()
+
+    def test_fails_before_fetching(self, campaign_dir, mocker):
+        (campaign_dir / "template.html").write_text("{{unknown}}")
+        source = mocker.patch("campaign.plan.StaticSource")
+
+        assert campaign_cli.main([str(campaign_dir / "campaign.toml")]) == 2
+        source.assert_not_called()
+
+
+class TestCompiledPlan:
+    """Test running a compiled plan"""
+
+    def test_renderer_fills_all_placeholders(self, campaign_dir, sample_users):
+        plan = compile_plan(campaign_dir / "campaign.toml")
+
+        html = plan.renderer(sample_users[0])
+
+        assert html.startswith(f"<p>Hi {sample_users[0]['name']}, 1000 needed</p><img src=")
+        assert "c=test-campaign" in html
+        plan.close()
+
+    def test_mjml_compiled_once(self, campaign_dir, mocker, sample_users):
+        (campaign_dir / "template.mjml").write_text("<mjml>{{email}}</mjml>")
+        run = mocker.patch("subprocess.run")
+        run.return_value.stdout = "<html>{{email}}</html>"
+        path = write_definition(campaign_dir, '"template.html"', '"template.mjml"')
+
+        plan = compile_plan(path)
+        rendered = [plan.renderer(user) for user in sample_users]
+
+        run.assert_called_once()
+        assert rendered[0] == f"<html>{sample_users[0]['email']}</html>"
+        plan.close()
+
+    def test_cli_runs_outbox_campaign(self, campaign_dir, sample_users, mock_time):
+        exit_code = campaign_cli.main([str(campaign_dir / "campaign.toml")])
+
+        assert exit_code == 0
+        lines = (campaign_dir / "outbox" / "messages.jsonl").read_text().splitlines()
+        assert [json.loads(line)["to"] for line in lines] == [u["email"] for u in sample_users]
+        # Spooling does not deliver, so nothing is recorded as sent
+        sent_file = campaign_dir / "sent-emails.json"
+        assert not sent_file.exists() or json.loads(sent_file.read_text()) == []
+
+    def test_shipped_definitions_are_valid(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("NOTION_TOKEN", "token")
+        monkeypatch.setenv("NOTION_DATABASE_ID", "db")
+        definitions = sorted((SCRIPT_DIR / "campaigns").glob("*.toml"))
+
+        assert definitions
+        for path in definitions:
+            definition = load_definition(path)
+            # Keep the real ledgers (and their index files) out of the test
+            definition["files"] = {
+                key: str(tmp_path / Path(value).name)
+                for key, value in definition["files"].items()
+            }
+            plan = compile_plan(definition, base_dir=path.parent, dry_run=True)
+            assert plan.renderer.template.slots
+            plan.close()
@@ -0,0 +1,144 @@
+"""
+Tests for checkpointed resume
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import auto_smtp
+from checkpoint import CampaignCheckpoint, checkpoint_path
+
+
+@pytest.fixture
+def checkpoint_file(tmp_path):
+    return checkpoint_path(tmp_path / "sent-emails.json", "activation")
+
+
+class TestCampaignCheckpoint:
+    """Test checkpoint persistence"""
+
+    def test_path_next_to_ledger(self, tmp_path):
+        path = checkpoint_path(tmp_path / "sent-emails.json", "news")
+
+        assert path == tmp_path / "checkpoint-news.json"
+
+    def test_save_and_load_remaining(self, checkpoint_file, sample_users):
+        checkpoint = CampaignCheckpoint(checkpoint_file, "activation", every=100)
+        checkpoint.begin(sample_users, "2024-01-01T00:00:00+00:00", interval_seconds=0.1)
+        checkpoint.advance(1, sent=True)
+        checkpoint.add_retry(sample_users[1], "550 rejected")
+        checkpoint.advance(2)
+        checkpoint.save()
+
+        state = CampaignCheckpoint(checkpoint_file, "activation").load()
+
+        assert state["position"] == 2
+        assert state["fetched_at"] == "2024-01-01T00:00:00+00:00"
+        assert state["remaining"] == sample_users[2:] + [sample_users[1]]
+        assert state["rate_limiter"]["last_send_at"] is not None
+
+    def test_saves_every_n(self, checkpoint_file, sample_users):
+        checkpoint = CampaignCheckpoint(checkpoint_file, "activation", every=2)
+        checkpoint.begin(sample_users, "t0")
+
+        checkpoint.advance(1)
+        assert json.loads(checkpoint_file.read_text())["position"] == 0
+        checkpoint.advance(2)
+        assert json.loads(checkpoint_file.read_text())["position"] == 2
+
+    def test_other_campaign_ignored(self, checkpoint_file, sample_users, capsys):
+        CampaignCheckpoint(checkpoint_file, "news").begin(sample_users, "t0")
+
+        assert CampaignCheckpoint(checkpoint_file, "activation").load() is None
+        assert "different campaign" in capsys.readouterr().out
+
+    def test_finish_keeps_only_retries(self, checkpoint_file, sample_users):
+        checkpoint = CampaignCheckpoint(checkpoint_file, "activation")
+        checkpoint.begin(sample_users, "t0")
+        checkpoint.add_retry(sample_users[0], "timeout")
+        checkpoint.finish()
+
+        assert CampaignCheckpoint(checkpoint_file, "activation").load()["remaining"] == [sample_users[0]]
+
+        checkpoint.pending_retries = []
+        checkpoint.finish()
+        assert not checkpoint_file.exists()
+
+    def test_disabled_writes_nothing(self, checkpoint_file, sample_users):
+        checkpoint = CampaignCheckpoint(checkpoint_file, "activation", enabled=False)
+        checkpoint.begin(sample_users, "t0")
+        checkpoint.save()
+
+        assert not checkpoint_file.exists()
+
+    def test_rate_limit_honoured_across_restart(self, checkpoint_file, mocker):
+        mocker.patch("checkpoint.time.time", return_value=1000.0)
+        checkpoint = CampaignCheckpoint(checkpoint_file, "activation")
+        checkpoint.begin([], "t0", interval_seconds=5, state={"rate_limiter": {"last_send_at": 998.0}})
+        sleep = mocker.Mock()
+
+        assert checkpoint.wait_for_rate_limit(sleep) == pytest.approx(3.0)
+        sleep.assert_called_once_with(pytest.approx(3.0))
+
+
+class TestSenderResume:
+    """Test that --resume restarts from the snapshot"""
+
+    @pytest.fixture
+    def sender(self, mocker, temp_files, mock_time):
+        mocker.patch.object(auto_smtp, "SENT_EMAILS_FILE", temp_files["sent"])
+        mocker.patch.object(auto_smtp, "FAILED_EMAILS_FILE", temp_files["failed"])
+        mocker.patch.object(auto_smtp, "SUPPRESSION_FILE", temp_files["dir"] / "suppressed.json")
+        mocker.patch.object(auto_smtp, "compile_mjml_template", return_value="<html/>")
+        return temp_files
+
+    def test_interrupt_then_resume_skips_notion(self, mocker, sender, sample_users):
+        mocker.patch.object(sys, "argv", ["auto_smtp.py"])
+        fetch = mocker.patch.object(auto_smtp, "fetch_users_from_notion", return_value=sample_users)
+        smtp = mocker.patch("smtplib.SMTP").return_value
+        smtp.send_message.side_effect = [None, None, KeyboardInterrupt()]
+
+        auto_smtp.main()
+
+        path = checkpoint_path(sender["sent"], "activation")
+        assert json.loads(path.read_text())["position"] == 2
+
+        fetch.reset_mock()
+        smtp.send_message.reset_mock(side_effect=True)
+        mocker.patch.object(sys, "argv", ["auto_smtp.py", "--resume"])
+
+        auto_smtp.main()
+
+        fetch.assert_not_called()
+        assert [c.args[0]["To"] for c in smtp.send_message.call_args_list] == [u["email"] for u in sample_users[2:]]
+        assert json.loads(sender["sent"].read_text()) == [u["email"] for u in sample_users]
+        assert not path.exists()
+
+    def test_delta_fetches_new_users_only(self, mocker, sender, sample_users):
+        CampaignCheckpoint(checkpoint_path(sender["sent"], "activation"), "activation").begin(
+            sample_users[:2], "2024-01-01T00:00:00+00:00"
+        )
+        mocker.patch.object(sys, "argv", ["auto_smtp.py", "--resume", "--delta"])
+        fetch = mocker.patch.object(auto_smtp, "fetch_users_from_notion", return_value=sample_users[2:3])
+        smtp = mocker.patch("smtplib.SMTP").return_value
+
+        auto_smtp.main()
+
+        fetch.assert_called_once_with(since="2024-01-01T00:00:00+00:00")
+        assert [c.args[0]["To"] for c in smtp.send_message.call_args_list] == [u["email"] for u in sample_users[:3]]
+
+    def test_delta_filter_uses_created_time(self, mocker, monkeypatch):
+        client = mocker.patch.object(auto_smtp, "NotionClient").return_value
+        client.databases.query.return_value = {"results": [], "has_more": False}
+        monkeypatch.setenv("NOTION_TOKEN", "t")
+        monkeypatch.setenv("NOTION_DATABASE_ID", "db")
+
+        auto_smtp.fetch_users_from_notion(since="2024-01-01T00:00:00+00:00")
+
+        query_filter = client.databases.query.call_args.kwargs["filter"]
+        assert {"timestamp": "created_time", "created_time": {"on_or_after": "2024-01-01T00:00:00+00:00"}} in query_filter["and"]
@@ -0,0 +1,187 @@
+"""
+Tests for share-link click tracking
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign.events import EventLog, read_events, recipient_hash
+from interpolate_encourage_email import EmailLinkInterpolator
+from tests.test_pixel_server import CHROME, RecordingStore, call_wsgi, pixel_query
+from tracking.clicks import ClickApp, LinkTable, click_through, link_token, main, share_platform
+
+TEMPLATE = (
+    '<a href="https://wa.me/?text=Hi%20https%3A%2F%2Fnstcg.org%2F%3Fref%3D{{user_referral_code}}">WhatsApp</a>'
+    '<a href="https://twitter.com/intent/tweet?text=Hi&amp;url=https%3A%2F%2Fnstcg.org">X</a>'
+    '<a href="https://nstcg.org/?ref={{user_referral_code}}">Visit</a>'
+    "<p>{{response_count}} of {{target_count}}</p>"
+)
+
+
+@pytest.fixture
+def links(tmp_path):
+    return LinkTable(tmp_path / "links.jsonl", site_url="https://t.example")
+
+
+def path_of(url):
+    return url.split("https://t.example", 1)[1]
+
+
+class TestLinkTable:
+    """Test rewriting links into redirect tokens"""
+
+    def test_tokens_are_stable_and_written_once(self, links):
+        first = links.track([("https://wa.me/?text=a", "whatsapp")], "encourage", "abc")
+        again = links.track([("https://wa.me/?text=a", "whatsapp")], "encourage", "abc")
+        other = links.track([("https://wa.me/?text=a", "whatsapp")], "encourage", "def")
+
+        assert first == again != other
+        assert first[0] == "https://t.example/r/" + link_token("https://wa.me/?text=a", "encourage", "whatsapp", "abc")
+        assert len(links.path.read_text().splitlines()) == 2
+        assert LinkTable(links.path).links == links.links
+
+    def test_track_html_rewrites_share_buttons_only(self, links):
+        html = TEMPLATE.replace("{{user_referral_code}}", "REF1")
+
+        tracked = links.track_html(html, "encourage", "abc")
+
+        assert tracked.count('href="https://t.example/r/') == 2
+        assert 'href="https://nstcg.org/?ref=REF1"' in tracked
+        targets = {link[0] for link in links.links.values()}
+        # Entities are decoded: the redirect target is the real URL
+        assert "https://twitter.com/intent/tweet?text=Hi&url=https%3A%2F%2Fnstcg.org" in targets
+
+    def test_share_platform(self):
+        assert share_platform("mailto:?subject=x") == "email"
+        assert share_platform("https://x.com/intent/post") == "twitter"
+        assert share_platform("https://nstcg.org") is None
+
+
+class TestInterpolator:
+    """Test tracked links from the encourage email renderer"""
+
+    @pytest.fixture
+    def interpolator(self, tmp_path, links):
+        template = tmp_path / "encourage.html"
+        template.write_text(TEMPLATE)
+        return EmailLinkInterpolator(template, links=links)
+
+    def test_share_urls_are_redirects_except_copy(self, interpolator, links):
+        urls = interpolator.generate_share_urls("REF1", recipient="abc")
+
+        assert urls["copy"] == "https://nstcg.org/?ref=REF1"
+        assert all(url.startswith("https://t.example/r/") for p, url in urls.items() if p != "copy")
+        platforms = {link[2] for link in links.links.values()}
+        assert platforms == {"twitter", "facebook", "whatsapp", "linkedin", "email", "sms"}
+
+    def test_rendered_email_is_tracked(self, interpolator, links):
+        content = interpolator.interpolate({"referral_code": "REF1", "email": "Reader@Example.com"})
+
+        assert content.count("https://t.example/r/") == 2
+        assert {link[3] for link in links.links.values()} == {recipient_hash("reader@example.com")}
+
+    def test_untracked_by_default(self, tmp_path):
+        template = tmp_path / "encourage.html"
+        template.write_text(TEMPLATE)
+
+        urls = EmailLinkInterpolator(template).generate_share_urls("REF1")
+
+        assert urls["whatsapp"].startswith("https://wa.me/")
+
+
+class TestRedirects:
+    """Test the redirect endpoint"""
+
+    def test_redirects_and_queues_click(self, links):
+        url = links.track([("https://wa.me/?text=a", "whatsapp")], "encourage", "abc")[0]
+        store = RecordingStore()
+        app = ClickApp(store, links)
+
+        status, headers, body = call_wsgi(app, path=path_of(url), user_agent=CHROME, x_vercel_ip_country="GB")
+
+        assert (status, body) == ("302 Found", b"")
+        assert headers["Location"] == "https://wa.me/?text=a"
+        assert "no-store" in headers["Cache-Control"]
+        event, fields = store.events[0]
+        assert event == "click"
+        assert (fields["campaign"], fields["platform"], fields["recipient"], fields["country"]) == (
+            "encourage", "whatsapp", "abc", "GB",
+        )
+
+    def test_bots_and_head_redirect_without_recording(self, links):
+        url = links.track([("https://wa.me/?text=a", "whatsapp")], "encourage", "abc")[0]
+        store = RecordingStore()
+        app = ClickApp(store, links)
+
+        assert call_wsgi(app, path=path_of(url), user_agent="WhatsApp/2.23")[0] == "302 Found"
+        assert call_wsgi(app, path=path_of(url), method="HEAD", user_agent=CHROME)[0] == "302 Found"
+        assert store.events == []
+        assert app.stats["bot_click"] == 1
+
+    def test_unknown_tokens_and_links_added_later(self, links):
+        app = ClickApp(RecordingStore(), LinkTable(links.path))
+
+        assert call_wsgi(app, path="/r/nope")[0] == "404 Not Found"
+        # Rendered by a sender after the server loaded the table
+        url = links.track([("mailto:?body=hi", "email")], "encourage", "abc")[0]
+        assert call_wsgi(app, path=path_of(url), user_agent=CHROME)[0] == "302 Found"
+
+    def test_pixel_still_served(self, links):
+        store = RecordingStore()
+        app = ClickApp(store, links)
+
+        assert call_wsgi(app, pixel_query(), user_agent=CHROME)[0] == "200 OK"
+        assert store.events[0][0] == "open"
+
+
+class TestClickThrough:
+    """Test click-through per platform from the shared event log"""
+
+    def test_report(self, links, tmp_path, capsys):
+        log_path = tmp_path / "opens.jsonl"
+        app = ClickApp(EventLog(log_path), links)
+        by_recipient = {
+            recipient: links.track(
+                [("https://wa.me/?text=a", "whatsapp"), ("mailto:?body=a", "email")], "encourage", recipient
+            )
+            for recipient in ("r1", "r2", "r3", "r4")
+        }
+        for recipient, clicks in (("r1", 2), ("r2", 1)):
+            for _ in range(clicks):
+                call_wsgi(app, path=path_of(by_recipient[recipient][0]), user_agent=CHROME)
+        call_wsgi(app, path=path_of(by_recipient["r3"][1]), user_agent=CHROME)
+        call_wsgi(app, pixel_query(), user_agent=CHROME)
+        app.close()
+
+        rows = click_through(links, read_events(log_path))
+
+        assert [(r["platform"], r["sent"], r["clicks"], r["clickers"], r["rate"]) for r in rows] == [
+            ("whatsapp", 4, 3, 2, 0.5),
+            ("email", 4, 1, 1, 0.25),
+        ]
+        assert main(["report", "--links", str(links.path), "--store", str(log_path)]) == 0
+        out = capsys.readouterr().out
+        assert "🔗 encourage" in out
+        assert "whatsapp        2 of 4      (50.0%)  3 clicks" in out
+
+
+@pytest.mark.performance
+def test_redirect_throughput(links):
+    """Redirects are an in-memory lookup and a queued event"""
+    urls = links.track([(f"https://wa.me/?text={i}", "whatsapp") for i in range(1000)], "encourage", "abc")
+    paths = [path_of(url) for url in urls] * 20
+    app = ClickApp(RecordingStore(), links)
+
+    started = time.perf_counter()
+    for path in paths:
+        app.respond("GET", path, "", CHROME)
+    elapsed = time.perf_counter() - started
+
+    assert app.stats["clicks"] == len(paths)
+    assert elapsed / len(paths) < 50e-6
@@ -0,0 +1,195 @@
+"""
+Tests for the structured event log and its summary reader
+"""
+
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign import ResendBackend, run_campaign
+from campaign.events import (
+    EventLog,
+    event_log_path,
+    format_summary,
+    main,
+    read_events,
+    recipient_hash,
+    summarize,
+)
+from tests.fixtures.campaigns import RecordingBackend, make_args
+
+
+def read_log(path):
+    return [json.loads(line) for line in Path(path).read_text().splitlines()]
+
+
+def attempt(event, ts, error=None, provider="smtp"):
+    record = {"ts": ts, "event": event, "provider": provider}
+    if error:
+        record["error"] = error
+    return record
+
+
+class TestEventLog:
+    """Test the background JSON-lines writer"""
+
+    def test_writes_events_in_order_on_close(self, tmp_path):
+        log = EventLog(tmp_path / "events.jsonl", "news")
+
+        for i in range(500):
+            log.record("sent", position=i)
+        log.close()
+
+        events = read_log(tmp_path / "events.jsonl")
+        assert [e["position"] for e in events] == list(range(500))
+        assert {e["campaign"] for e in events} == {"news"}
+
+    def test_full_queue_drops_instead_of_blocking(self, tmp_path, mocker):
+        release = threading.Event()
+        writing = threading.Event()
+        original = EventLog._write
+
+        def stalled_write(self, lines):
+            writing.set()
+            release.wait(5)
+            original(self, lines)
+
+        mocker.patch.object(EventLog, "_write", stalled_write)
+        log = EventLog(tmp_path / "events.jsonl", "news", queue_size=2)
+
+        log.record("sent", position=0)
+        writing.wait(5)
+        for i in range(1, 6):
+            log.record("sent", position=i)
+        assert log.dropped == 3
+
+        release.set()
+        log.close()
+        assert [e["position"] for e in read_log(tmp_path / "events.jsonl")] == [0, 1, 2]
+
+    def test_default_path_next_to_ledger(self, tmp_path):
+        path = event_log_path(tmp_path / "sent-news-emails.json", "news")
+
+        assert path == tmp_path / "events-news.jsonl"
+
+    def test_recipient_hash_ignores_case(self):
+        assert recipient_hash("Alice@Example.com ") == recipient_hash("alice@example.com")
+        assert "alice" not in recipient_hash("alice@example.com")
+
+
+class TestSendAttempts:
+    """Test what a campaign run records per attempt"""
+
+    def test_slow_mode_records_timings(self, make_campaign, sample_users, temp_files, mock_time):
+        failing = sample_users[1]["email"]
+
+        run_campaign(make_campaign(sample_users, RecordingBackend(fail={failing})), make_args())
+
+        events = read_log(temp_files["dir"] / "events-test.jsonl")
+        attempts = [e for e in events if e["event"] in ("sent", "failed")]
+        assert len(attempts) == len(sample_users)
+        assert {e["provider"] for e in attempts} == {"RecordingBackend"}
+        assert all(set(e["timings"]) == {"render", "send", "persist"} for e in attempts)
+        assert "email" not in json.dumps(events)
+        assert attempts[1]["recipient"] == recipient_hash(failing)
+        assert events[-1]["dropped"] == 0
+
+    def test_fast_mode_records_resend_message_ids(
+        self, make_campaign, sample_users, temp_files, mock_time, mocker
+    ):
+        mocker.patch("resend.api_key", "test-key")
+        mocker.patch(
+            "resend.Batch.send",
+            side_effect=lambda params: {"data": [{"id": f"msg-{i}"} for i in range(len(params))]},
+        )
+        campaign = make_campaign(sample_users, ResendBackend("Subject"), batch_size=3)
+
+        run_campaign(campaign, make_args(fast=True))
+
+        sent = [e for e in read_log(temp_files["dir"] / "events-test.jsonl") if e["event"] == "sent"]
+        assert [e["message_id"] for e in sent] == ["msg-0", "msg-1", "msg-2", "msg-0", "msg-1"]
+        assert [e["batch"] for e in sent] == [3, 3, 3, 2, 2]
+        assert {e["provider"] for e in sent} == {"resend"}
+
+    def test_render_failure_logged_once(self, make_campaign, sample_users, temp_files, mock_time):
+        bad = sample_users[0]["email"]
+
+        def render(user):
+            if user["email"] == bad:
+                raise ValueError("missing name")
+            return "<p>ok</p>"
+
+        campaign = make_campaign(sample_users, RecordingBackend(), batch_size=2, render=render)
+        run_campaign(campaign, make_args(fast=True))
+
+        events = read_log(temp_files["dir"] / "events-test.jsonl")
+        failures = [e for e in events if e["event"] not in ("sent", "run_started", "run_finished")]
+        assert len(failures) == 1
+        assert failures[0]["event"] == "render_failed"
+        assert failures[0]["detail"] == "missing name"
+
+
+class TestSummary:
+    """Test aggregating a log into throughput and error tables"""
+
+    EVENTS = [
+        {"ts": 0, "event": "run_started"},
+        attempt("sent", 1),
+        {"ts": 1, "event": "run_finished"},
+        {"ts": 1000, "event": "run_started"},
+        attempt("sent", 1000.5),
+        attempt("sent", 1010),
+        attempt("failed", 1030, "rejected"),
+        attempt("sent", 1130, provider="resend"),
+        attempt("failed", 1150, "rejected"),
+        attempt("render_failed", 1170, "HTML generation failed"),
+    ]
+
+    def test_last_run_throughput_and_errors(self):
+        summary = summarize(self.EVENTS, bucket_seconds=60)
+
+        assert summary["attempts"] == 6
+        assert summary["error_rate"] == 0.5
+        assert summary["providers"] == {"smtp": 5, "resend": 1}
+        assert [(r["start"], r["sent"], r["failed"]) for r in summary["throughput"]] == [
+            (960, 2, 0),
+            (1020, 0, 1),
+            (1080, 1, 0),
+            (1140, 0, 2),
+        ]
+        assert summary["errors"][0] == {"error": "rejected", "count": 2, "share": 0.3333}
+
+    def test_empty_buckets_are_filled(self):
+        summary = summarize(self.EVENTS, bucket_seconds=30)
+
+        assert [r["sent"] + r["failed"] for r in summary["throughput"]] == [2, 1, 0, 0, 1, 1, 1]
+        assert summary["throughput"][0]["per_minute"] == 4.0
+
+    def test_all_runs(self):
+        assert summarize(self.EVENTS, run="all")["attempts"] == 7
+
+    @pytest.mark.parametrize("bucket", ["0", "-60", "abc"])
+    def test_non_positive_bucket_is_rejected(self, bucket, capsys):
+        with pytest.raises(SystemExit):
+            main(["events.jsonl", "--bucket", bucket])
+
+        assert "expected a positive number of seconds" in capsys.readouterr().err
+        with pytest.raises(ValueError, match="bucket_seconds must be positive"):
+            summarize(self.EVENTS, bucket_seconds=0)
+
+    def test_reader_skips_truncated_line_and_prints_tables(self, tmp_path, capsys):
+        log = tmp_path / "events.jsonl"
+        log.write_text("".join(json.dumps(e) + "\n" for e in self.EVENTS) + '{"ts": 12')
+
+        assert len(list(read_events(log))) == len(self.EVENTS)
+        main([str(log)])
+
+        out = capsys.readouterr().out
+        assert out == format_summary(summarize(self.EVENTS)) + "\n"
+        assert "6 attempts: 3 sent, 3 failed (50.0% error rate)" in out
+        assert "Throughput" in out and "Errors" in out
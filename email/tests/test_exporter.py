@@ -0,0 +1,127 @@
+"""
+Tests for the --metrics-port Prometheus endpoint
+"""
+
+import sys
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign import CampaignRun, build_parser, run_campaign
+from campaign.exporter import MetricsServer, render_metrics
+from tests.fixtures.campaigns import RecordingBackend, make_args
+
+
+def scrape(url):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        return response.read().decode("utf-8")
+
+
+def samples(text):
+    """Metric lines as a {name{labels}: value} dict"""
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line and not line.startswith("#")
+    }
+
+
+class ScrapingBackend(RecordingBackend):
+    """Backend that scrapes the metrics endpoint from inside each send"""
+
+    def __init__(self):
+        super().__init__()
+        self.server = None
+        self.scrapes = []
+
+    def send(self, user, html):
+        self.scrapes.append(samples(scrape(self.server.url)))
+        return super().send(user, html)
+
+
+class TestRenderMetrics:
+    """Test the Prometheus text for a run"""
+
+    def test_counters_gauges_and_histograms(self, make_campaign, sample_users):
+        run = CampaignRun(make_campaign(sample_users, RecordingBackend()), make_args())
+        run.stats.update(sent=3, failed=1)
+        run.to_send = 10
+        run.metrics.observe("send", 0.02)
+        run.metrics.observe("send", 3.0)
+
+        values = samples(render_metrics(run))
+
+        assert values['campaign_emails_sent_total{campaign="test"}'] == 3
+        assert values['campaign_emails_failed_total{campaign="test"}'] == 1
+        assert values['campaign_queue_depth{campaign="test",queue="recipients"}'] == 6
+        assert values['campaign_stage_seconds_bucket{campaign="test",stage="send",le="0.025"}'] == 1
+        assert values['campaign_stage_seconds_bucket{campaign="test",stage="send",le="5"}'] == 2
+        assert values['campaign_stage_seconds_bucket{campaign="test",stage="send",le="+Inf"}'] == 2
+        assert values['campaign_stage_seconds_count{campaign="test",stage="send"}'] == 2
+        assert 'campaign_stage_seconds_count{campaign="test",stage="fetch"}' not in values
+
+    def test_type_lines(self, make_campaign, sample_users):
+        run = CampaignRun(make_campaign(sample_users, RecordingBackend()), make_args())
+
+        text = render_metrics(run)
+
+        assert "# TYPE campaign_emails_sent_total counter" in text
+        assert "# TYPE campaign_in_flight gauge" in text
+        assert "# TYPE campaign_stage_seconds histogram" in text
+
+
+class TestMetricsServer:
+    """Test serving metrics during a run"""
+
+    def test_option(self):
+        assert build_parser("test").parse_args(["--metrics-port", "9100"]).metrics_port == 9100
+
+    def test_scraped_during_send(self, make_campaign, sample_users, temp_files, mock_time, mocker):
+        backend = ScrapingBackend()
+        original = MetricsServer.start
+
+        def start(server):
+            original(server)
+            backend.server = server
+
+        mocker.patch.object(MetricsServer, "start", start)
+
+        run_campaign(make_campaign(sample_users, backend), make_args(metrics_port=0))
+
+        first, last = backend.scrapes[0], backend.scrapes[-1]
+        assert first['campaign_in_flight{campaign="test"}'] == 1
+        assert first['campaign_queue_depth{campaign="test",queue="recipients"}'] == len(sample_users)
+        assert last['campaign_emails_sent_total{campaign="test"}'] == len(sample_users) - 1
+        assert last['campaign_stage_seconds_count{campaign="test",stage="render"}'] == len(sample_users)
+
+    def test_unknown_path_and_shutdown(self, make_campaign, sample_users):
+        run = CampaignRun(make_campaign(sample_users, RecordingBackend()), make_args())
+        server = MetricsServer(run, 0)
+        server.start()
+        try:
+            assert "campaign_emails_sent_total" in scrape(server.url)
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(server.url.replace("/metrics", "/nope"), timeout=5)
+            assert error.value.code == 404
+        finally:
+            server.stop()
+        assert server._server is None
+
+    def test_port_in_use_does_not_abort(self, make_campaign, sample_users, temp_files, mock_time, capsys):
+        run = CampaignRun(make_campaign(sample_users, RecordingBackend()), make_args())
+        blocker = MetricsServer(run, 0)
+        blocker.start()
+        try:
+            stats = run_campaign(
+                make_campaign(sample_users, RecordingBackend()), make_args(metrics_port=blocker.port)
+            )
+        finally:
+            blocker.stop()
+
+        assert stats["sent"] == len(sample_users)
+        assert "Metrics endpoint not started" in capsys.readouterr().out
@@ -0,0 +1,120 @@
+"""
+Tests for the pixel load generator in test_tracking_local.py
+"""
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign.tracking import deobfuscate_email
+from test_tracking_local import BOT_AGENTS, LoadResult, generate_hits, run_load
+from tracking.server import PixelApp
+
+
+class RecordingStore:
+    def __init__(self):
+        self.events = []
+
+    def record(self, event, **fields):
+        self.events.append(fields)
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    # wsgiref answers HTTP/1.0 by default, which closes every connection
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def pixel_server():
+    app = PixelApp(RecordingStore())
+    server = make_server("127.0.0.1", 0, app, ThreadingWSGIServer, QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield app, f"http://127.0.0.1:{server.server_address[1]}/api/track-email"
+    server.shutdown()
+    server.server_close()
+
+
+class TestOpenPattern:
+    """Test the simulated open pattern"""
+
+    def test_pattern_shape(self):
+        hits = generate_hits(2000, "load", duration=60, open_rate=0.5, repeat_rate=0.3, bot_rate=0.1, seed=1)
+
+        offsets = [offset for offset, _, _ in hits]
+        assert offsets == sorted(offsets)
+        assert 0 <= offsets[0] and offsets[-1] <= 60
+        # Most opens land in the burst after the send
+        assert sum(offset < 10 for offset in offsets) > len(offsets) / 2
+        bots = [agent for _, _, agent in hits if agent in BOT_AGENTS]
+        assert 100 < len(bots) < 300
+        openers = {parse_qs(query)["e"][0] for _, query, agent in hits if agent not in BOT_AGENTS}
+        assert len(hits) - len(bots) > len(openers) > 800
+
+    def test_addresses_decode(self):
+        _, query, _ = generate_hits(1, "load", duration=1, open_rate=1, seed=2)[-1]
+
+        assert deobfuscate_email(parse_qs(query)["e"][0]) == "load-0@example.com"
+
+    def test_zero_duration_sends_at_once(self):
+        hits = generate_hits(50, "load", duration=0, open_rate=1, seed=3)
+
+        assert {offset for offset, _, _ in hits} == {0.0}
+
+    def test_reproducible_with_seed(self):
+        first = generate_hits(100, "load", duration=10, seed=4)
+        second = generate_hits(100, "load", duration=10, seed=4)
+
+        assert [h[0] for h in first] == [h[0] for h in second]
+
+
+class TestRunLoad:
+    """Test replaying hits against a live pixel server"""
+
+    def test_replays_every_hit(self, pixel_server):
+        app, url = pixel_server
+        hits = generate_hits(200, "load", duration=0, open_rate=0.8, bot_rate=0.1, seed=5)
+
+        result = asyncio.run(run_load(url, hits, concurrency=8))
+
+        assert result.requests == len(hits)
+        assert result.statuses == {200: len(hits)}
+        assert not result.errors
+        bots = sum(agent in BOT_AGENTS for _, _, agent in hits)
+        assert app.stats["bot"] == bots
+        assert len(app.store.events) == len(hits) - bots
+        assert set(result.percentiles()) == {50, 90, 99}
+
+    def test_connection_errors_are_counted(self):
+        hits = generate_hits(5, "load", duration=0, open_rate=1, seed=6)
+
+        result = asyncio.run(run_load("http://127.0.0.1:9/api/track-email", hits, concurrency=2))
+
+        assert result.requests == len(hits)
+        assert sum(result.errors.values()) == len(hits)
+        assert f"Errors: {len(hits)}" in result.report()
+
+    def test_report(self):
+        result = LoadResult()
+        result.latencies = [0.001, 0.002, 0.010]
+        result.statuses[200] = 3
+        result.elapsed = 1.5
+
+        report = result.report()
+        assert "3 in 1.5s (2 req/s)" in report
+        assert "p50 2.0ms" in report
@@ -0,0 +1,96 @@
+"""
+Tests for per-stage campaign timing
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign import run_campaign
+from campaign.metrics import Histogram, RunMetrics
+from tests.fixtures.campaigns import RecordingBackend, make_args
+
+
+class TestHistogram:
+    """Test the fixed-bucket histogram"""
+
+    def test_observe_and_quantiles(self):
+        histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+        for value in [0.005] * 90 + [0.05] * 9 + [2.0]:
+            histogram.observe(value)
+
+        assert histogram.count == 100
+        assert histogram.counts == [90, 9, 0, 1]
+        assert histogram.quantile(0.5) == 0.01
+        assert histogram.quantile(0.95) == 0.1
+        assert histogram.quantile(1.0) == 2.0
+        assert histogram.to_dict()["buckets"] == {"0.01": 90, "0.1": 9, "1.0": 0, "+Inf": 1}
+
+    def test_quantile_capped_at_max(self):
+        histogram = Histogram(buckets=(1.0,))
+        histogram.observe(0.2)
+
+        assert histogram.quantile(0.5) == 0.2
+
+    def test_timer_records_when_stage_raises(self):
+        metrics = RunMetrics()
+
+        with pytest.raises(RuntimeError):
+            with metrics.time("send"):
+                raise RuntimeError("provider down")
+
+        assert metrics.stages["send"].count == 1
+
+
+class TestRunMetrics:
+    """Test stage timing across a campaign run"""
+
+    def test_sequential_run_writes_metrics_json(
+        self, make_campaign, sample_users, temp_files, mock_time, capsys
+    ):
+        path = temp_files["dir"] / "metrics.json"
+        backend = RecordingBackend(fail={sample_users[0]["email"]})
+
+        run_campaign(
+            make_campaign(sample_users, backend, rate_limit_seconds=1),
+            make_args(metrics_json=str(path)),
+        )
+
+        data = json.loads(path.read_text())
+        stages = data["stages"]
+        assert stages["fetch"]["count"] == 1
+        assert stages["filter"]["count"] == 1
+        assert stages["render"]["count"] == len(sample_users)
+        assert stages["send"]["count"] == len(sample_users)
+        # Pauses between sends plus the checkpoint rate-limit wait at start
+        assert stages["wait"]["count"] == len(sample_users)
+        assert stages["persist"]["count"] >= len(sample_users)
+        assert data["counters"]["send_calls"] == len(sample_users)
+        assert data["stats"]["failed"] == 1
+        assert data["campaign"] == "test"
+        out = capsys.readouterr().out
+        assert "Stage breakdown" in out
+        assert "render" in out and "p95" in out
+
+    def test_fast_run_counts_batches_and_threaded_renders(
+        self, make_campaign, sample_users, temp_files, mock_time
+    ):
+        path = temp_files["dir"] / "metrics.json"
+        campaign = make_campaign(sample_users, RecordingBackend(), batch_size=2)
+
+        run_campaign(campaign, make_args(fast=True, metrics_json=str(path)))
+
+        data = json.loads(path.read_text())
+        assert data["fast"] is True
+        assert data["counters"]["batches"] == 3
+        assert data["stages"]["render"]["count"] == len(sample_users)
+        assert data["stages"]["send"]["count"] == 3
+
+    def test_no_file_without_flag(self, make_campaign, sample_users, temp_files, mock_time):
+        run_campaign(make_campaign(sample_users, RecordingBackend()), make_args())
+
+        assert not (temp_files["dir"] / "metrics.json").exists()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for the pre-split news template renderer and outbox spool
+"""
+
+import builtins
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import auto_resend_news
+from auto_resend_news import NewsTemplate, NewsOutbox, expand_outbox, load_news_template
+
+
+TEMPLATE_HTML = "<p>Hi {{name}},</p><div>news</div>{{tracking_pixel}}<footer>{{name}}</footer>"
+
+
+def naive_render(html, name, pixel):
+    """Reference implementation matching the original str.replace rendering"""
+    return html.replace("{{name}}", name).replace("{{tracking_pixel}}", pixel)
+
+
+class TestNewsTemplate:
+    """Test template splitting and rendering"""
+
+    def test_split_into_chunks_and_slots(self):
+        template = NewsTemplate(TEMPLATE_HTML)
+
+        assert template.slots == ("{{name}}", "{{tracking_pixel}}", "{{name}}")
+        assert len(template.chunks) == len(template.slots) + 1
+        assert "{{" not in "".join(template.chunks)
+
+    def test_render_matches_replace(self):
+        template = NewsTemplate(TEMPLATE_HTML)
+
+        rendered = template.render("Jane", '<img src="x" />')
+
+        assert rendered == naive_render(TEMPLATE_HTML, "Jane", '<img src="x" />')
+
+    def test_template_without_placeholders(self):
+        template = NewsTemplate("<p>static</p>")
+
+        assert template.render("Jane", "pixel") == "<p>static</p>"
+
+    def test_real_template_matches_replace(self):
+        html = auto_resend_news.NEWS_TEMPLATE_FILE.read_text(encoding="utf-8")
+        template = load_news_template()
+
+        rendered = template.render("Test User", "PIXEL")
+
+        assert rendered == naive_render(html, "Test User", "PIXEL")
+
+    def test_template_loaded_once(self, mocker):
+        load_news_template.cache_clear()
+        open_spy = mocker.spy(builtins, "open")
+        user = {"email": "a@example.com", "name": "A"}
+
+        for _ in range(5):
+            auto_resend_news.generate_news_email(user)
+
+        assert open_spy.call_count == 1
+
+
+class TestNewsOutbox:
+    """Test spooling messages as shared-body references"""
+
+    def test_body_written_once(self, tmp_path, sample_users):
+        outbox = NewsOutbox(tmp_path / "outbox")
+
+        for user in sample_users:
+            outbox.add(user)
+
+        bodies = list((tmp_path / "outbox" / "bodies").iterdir())
+        lines = (tmp_path / "outbox" / "messages.jsonl").read_text().splitlines()
+        assert len(bodies) == 1
+        assert len(lines) == len(sample_users)
+        assert all(json.loads(line)["body"] == bodies[0].stem for line in lines)
+
+    def test_expand_outbox_rebuilds_full_html(self, tmp_path, sample_users):
+        outbox = NewsOutbox(tmp_path / "outbox")
+        records = [outbox.add(user) for user in sample_users]
+
+        expanded = list(expand_outbox(tmp_path / "outbox"))
+
+        template = load_news_template()
+        assert len(expanded) == len(sample_users)
+        for (to, subject, html), record in zip(expanded, records):
+            assert to == record["to"]
+            assert subject == auto_resend_news.CONFIG["EMAIL_SUBJECT"]
+            assert html == template.render(
+                record["vars"]["{{name}}"], record["vars"]["{{tracking_pixel}}"]
+            )
+
+    def test_outbox_mode_does_not_send(self, mocker, tmp_path, sample_users):
+        mocker.patch.object(
+            sys, "argv", ["auto_resend_news.py", "--outbox", str(tmp_path / "outbox")]
+        )
+        mocker.patch.object(auto_resend_news, "SENT_EMAILS_FILE", tmp_path / "sent-emails.json")
+        mocker.patch.object(auto_resend_news, "FAILED_EMAILS_FILE", tmp_path / "failed-emails.json")
+        mocker.patch.object(auto_resend_news, "fetch_users_from_notion", return_value=sample_users)
+        send = mocker.patch.object(auto_resend_news, "send_email")
+        sleep = mocker.patch("time.sleep")
+
+        auto_resend_news.main()
+
+        send.assert_not_called()
+        sleep.assert_not_called()
+        assert len(list(expand_outbox(tmp_path / "outbox"))) == len(sample_users)
+        # Spooled is not sent: the real run must still deliver to everyone
+        assert not (tmp_path / "sent-emails.json").exists() or json.loads(
+            (tmp_path / "sent-emails.json").read_text()
+        ) == []
+        assert list(tmp_path.glob("*checkpoint*")) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
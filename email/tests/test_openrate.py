@@ -0,0 +1,176 @@
+"""
+Tests for the per-campaign open-rate report
+"""
+
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign.events import recipient_hash
+from tracking.openrate import (
+    distribution,
+    load_ledger,
+    load_send_times,
+    main,
+    open_rates,
+    percentile,
+)
+from tracking.store import TrackingStore
+
+SENT_AT = datetime(2025, 7, 18, 9, 0, tzinfo=timezone.utc).timestamp()
+
+
+def iso_after(seconds):
+    moment = datetime.fromtimestamp(SENT_AT + seconds, timezone.utc)
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def tracking_row(email, campaign, first_opened):
+    return {
+        "email": email,
+        "campaign": campaign,
+        "open_count": 1,
+        "first_opened": first_opened,
+        "last_opened": first_opened,
+        "country": "GB",
+    }
+
+
+def write_sends(log, users):
+    log.write_text(
+        "".join(
+            json.dumps({"ts": SENT_AT, "event": "sent", "recipient": recipient_hash(f"user{i}@example.com")})
+            + "\n"
+            for i in users
+        )
+    )
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    path = tmp_path / "sent-news-emails.json"
+    path.write_text(json.dumps([f"User{i}@Example.com" for i in range(10)]))
+    return path
+
+
+class TestJoin:
+    """Test joining ledger, event log and opens"""
+
+    def test_open_rate_and_first_open(self, ledger):
+        delivered = load_ledger(ledger)
+        send_times = {recipient_hash(f"user{i}@example.com"): SENT_AT for i in range(10)}
+        opens = [
+            ("user0@example.com", iso_after(600)),
+            ("user1@example.com", iso_after(7200)),
+            ("user1@example.com", iso_after(9000)),
+            ("user2@example.com", iso_after(2 * 86400)),
+            ("tester@example.com", iso_after(60)),
+        ]
+
+        report = open_rates("news", delivered, opens, send_times)
+
+        assert (report["delivered"], report["opened"], report["open_rate"]) == (10, 3, 0.3)
+        assert report["unmatched"] == 1
+        first_open = report["first_open"]
+        assert first_open["count"] == 3
+        assert first_open["percentiles"][50] == 7200
+        assert dict(first_open["histogram"]) == {
+            "< 1h": 1, "1-6h": 1, "6-24h": 0, "1-3d": 1, "3-7d": 0, "> 7d": 0,
+        }
+
+    def test_missing_send_times(self, ledger):
+        report = open_rates("news", load_ledger(ledger), [("user0@example.com", iso_after(60))])
+
+        assert report["opened"] == 1
+        assert report["first_open"] is None
+
+    def test_send_times_from_event_log(self, tmp_path):
+        log = tmp_path / "events-news.jsonl"
+        lines = [
+            {"ts": 5, "event": "failed", "recipient": "a"},
+            {"ts": 10, "event": "sent", "recipient": "a"},
+            {"ts": 20, "event": "sent", "recipient": "a"},
+            {"ts": 30, "event": "sent", "recipient": "b", "campaign": "other"},
+        ]
+        log.write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+        assert load_send_times(log) == {"a": 10, "b": 30}
+        assert load_send_times(log, "news") == {"a": 10}
+        assert load_send_times(tmp_path / "missing.jsonl") == {}
+
+    def test_percentile_nearest_rank(self):
+        assert percentile([1, 2, 3, 4], 50) == 2
+        assert percentile([1, 2, 3, 4], 90) == 4
+        assert percentile([], 50) is None
+        assert distribution([]) is None
+
+
+class TestCommand:
+    """Test the command-line report"""
+
+    def test_report_from_store(self, ledger, tmp_path, capsys):
+        store_path = tmp_path / "stats.sqlite3"
+        with TrackingStore(store_path) as store:
+            store.upsert(
+                [
+                    ("p1", None, tracking_row("user3@example.com", "news", iso_after(300))),
+                    ("p2", None, tracking_row("user4@example.com", "other", iso_after(300))),
+                ]
+            )
+        write_sends(ledger.with_name("events-news.jsonl"), range(10))
+
+        assert main([f"news={ledger}", "--store", str(store_path)]) == 0
+
+        out = capsys.readouterr().out
+        assert "Opened: 1 (10.0%)" in out
+        assert "Time to first open (1 recipients): p10 5m" in out
+
+    def test_shared_ledger_counts_each_campaigns_sends(self, ledger, tmp_path, capsys):
+        store_path = tmp_path / "stats.sqlite3"
+        with TrackingStore(store_path) as store:
+            store.upsert([("p1", None, tracking_row("user3@example.com", "news", iso_after(300)))])
+        # Both campaigns record their recipients in the one ledger
+        write_sends(ledger.with_name("events-news.jsonl"), range(4))
+        write_sends(ledger.with_name("events-activation.jsonl"), range(4, 10))
+
+        assert main([f"news={ledger}", f"activation={ledger}", "--store", str(store_path), "--json"]) == 0
+
+        reports = {r["campaign"]: r for r in json.loads(capsys.readouterr().out)}
+        assert (reports["news"]["delivered"], reports["news"]["open_rate"]) == (4, 0.25)
+        assert (reports["activation"]["delivered"], reports["activation"]["opened"]) == (6, 0)
+
+    def test_ledger_without_event_log_refused(self, ledger, tmp_path, capsys):
+        store_path = tmp_path / "stats.sqlite3"
+        with TrackingStore(store_path) as store:
+            store.upsert([("p1", None, tracking_row("user3@example.com", "news", iso_after(300)))])
+
+        assert main([f"news={ledger}", "--store", str(store_path)]) == 2
+        assert "--whole-ledger" in capsys.readouterr().out
+        assert main([f"news={ledger}", "--store", str(store_path), "--whole-ledger"]) == 0
+        assert "Opened: 1 (10.0%)" in capsys.readouterr().out
+
+    def test_missing_store(self, ledger, tmp_path, capsys):
+        assert main([f"news={ledger}", "--store", str(tmp_path / "none.sqlite3")]) == 1
+        assert "view_tracking_stats.py" in capsys.readouterr().out
+
+
+@pytest.mark.performance
+def test_join_throughput():
+    """Hundreds of thousands of rows join in well under a second"""
+    count = 200_000
+    delivered = {recipient_hash(f"user{i}@example.com") for i in range(count)}
+    send_times = dict.fromkeys(delivered, SENT_AT)
+    opens = [(f"user{i}@example.com", iso_after(60 + i)) for i in range(0, count, 2)]
+
+    started = time.perf_counter()
+    report = open_rates("news", delivered, opens, send_times)
+    elapsed = time.perf_counter() - started
+
+    assert report["opened"] == count // 2
+    assert elapsed < 2.0
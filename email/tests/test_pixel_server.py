@@ -0,0 +1,244 @@
+"""
+Tests for the tracking pixel server
+"""
+
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign.events import EventLog
+from campaign.tracking import deobfuscate_email, obfuscate_email, tracking_pixel_url
+from tracking.server import PIXEL_GIF, PixelApp, create_app, decode_open, parse_query
+
+CHROME = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0 Safari/537.36"
+
+
+class RecordingStore:
+    def __init__(self):
+        self.events = []
+        self.closed = False
+
+    def record(self, event, **fields):
+        self.events.append((event, fields))
+
+    def close(self):
+        self.closed = True
+
+
+def pixel_query(email="reader@example.com", campaign="news", sent_ms=None):
+    query = urlparse(tracking_pixel_url(email, campaign)).query
+    if sent_ms is not None:
+        query = query.rsplit("&t=", 1)[0] + f"&t={sent_ms}"
+    return query
+
+
+def call_wsgi(app, query="", method="GET", path="/api/track-email", **headers):
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "wsgi.input": io.BytesIO(),
+    }
+    environ.update({f"HTTP_{k.upper()}": v for k, v in headers.items()})
+    response = {}
+
+    def start_response(status, headers):
+        response["status"] = status
+        response["headers"] = dict(headers)
+
+    body = b"".join(app(environ, start_response))
+    return response["status"], response["headers"], body
+
+
+class TestDecoding:
+    """Test parameter decoding and filtering"""
+
+    def test_round_trip(self):
+        for email in ("a@b.co", "first.last+tag@example.com", "ünïcode@example.org"):
+            assert deobfuscate_email(obfuscate_email(email)) == email
+
+    def test_plus_decoded_as_space(self):
+        encoded = obfuscate_email("z>?@example.com")
+        assert "+" in encoded or "/" in encoded
+
+        assert deobfuscate_email(encoded.replace("+", " ")) == "z>?@example.com"
+
+    def test_garbage(self):
+        assert deobfuscate_email("!!!") is None
+        assert deobfuscate_email(obfuscate_email("not-an-address")) is None
+
+    def test_parse_query_first_value_wins(self):
+        assert parse_query("e=abc%3D&c=news&c=other&x=1") == {"e": "abc=", "c": "news"}
+
+    @pytest.mark.parametrize(
+        "query, user_agent, reason",
+        [
+            ("c=news", CHROME, "missing"),
+            (pixel_query(), "Mozilla/5.0 (compatible; Googlebot/2.1)", "bot"),
+            (pixel_query(sent_ms=0), CHROME, "expired"),
+            (pixel_query(sent_ms="soon"), CHROME, "expired"),
+            ("e=bm9wZQ&c=news", CHROME, "invalid"),
+        ],
+    )
+    def test_rejected(self, query, user_agent, reason):
+        assert decode_open(parse_query(query), user_agent) == (None, reason)
+
+    def test_accepted(self):
+        sent_ms = int(time.time() * 1000)
+        fields, reason = decode_open(parse_query(pixel_query("Reader@Example.com", sent_ms=sent_ms)), CHROME)
+
+        assert reason is None
+        assert fields == {
+            "email": "reader@example.com",
+            "campaign": "news",
+            "user_agent": CHROME,
+            "sent_ms": sent_ms,
+        }
+
+
+class TestWSGI:
+    """Test the WSGI endpoint"""
+
+    def test_returns_gif_and_queues_open(self):
+        store = RecordingStore()
+        app = PixelApp(store)
+
+        status, headers, body = call_wsgi(
+            app, pixel_query(), user_agent=CHROME, x_vercel_ip_country="GB"
+        )
+
+        assert status == "200 OK"
+        assert body == PIXEL_GIF
+        assert headers["Content-Length"] == str(len(PIXEL_GIF))
+        assert headers["Content-Type"] == "image/gif"
+        assert headers["Cache-Control"] == "no-cache, no-store, must-revalidate"
+        event, fields = store.events[0]
+        assert event == "open"
+        assert (fields["email"], fields["country"], fields["region"]) == ("reader@example.com", "GB", "Unknown")
+        assert app.stats["queued"] == 1
+
+    def test_bots_get_the_pixel_but_are_not_recorded(self):
+        store = RecordingStore()
+        app = PixelApp(store)
+
+        status, _, body = call_wsgi(app, pixel_query(), user_agent="WhatsApp/2.23")
+
+        assert (status, body) == ("200 OK", PIXEL_GIF)
+        assert store.events == []
+        assert app.stats["bot"] == 1
+
+    def test_other_methods_and_paths(self):
+        app = PixelApp(RecordingStore())
+
+        assert call_wsgi(app, method="OPTIONS")[0] == "200 OK"
+        assert call_wsgi(app, method="POST")[0] == "405 Method Not Allowed"
+        assert call_wsgi(app, path="/favicon.ico")[0] == "404 Not Found"
+        assert call_wsgi(app, pixel_query(), method="HEAD")[2] == b""
+        assert app.stats["queued"] == 0
+
+
+class TestASGI:
+    """Test the ASGI endpoint"""
+
+    def test_request_and_lifespan(self):
+        store = RecordingStore()
+        app = PixelApp(store)
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def run():
+            scope = {
+                "type": "http",
+                "method": "GET",
+                "path": "/track-email",
+                "query_string": pixel_query().encode(),
+                "headers": [(b"user-agent", CHROME.encode())],
+            }
+            await app.asgi(scope, None, send)
+
+            messages = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+
+            async def receive():
+                return next(messages)
+
+            await app.asgi({"type": "lifespan"}, receive, send)
+
+        asyncio.run(run())
+
+        assert sent[0]["status"] == 200
+        assert (b"content-type", b"image/gif") in [(k.lower(), v) for k, v in sent[0]["headers"]]
+        assert sent[1]["body"] == PIXEL_GIF
+        assert [m["type"] for m in sent[2:]] == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        assert store.events[0][1]["user_agent"] == CHROME
+        assert store.closed
+
+
+class TestStore:
+    """Test opens reaching the local store"""
+
+    def test_opens_flushed_to_jsonl(self, tmp_path):
+        app = create_app(tmp_path / "opens.jsonl")
+
+        for i in range(50):
+            call_wsgi(app, pixel_query(f"reader{i}@example.com"), user_agent=CHROME)
+        app.close()
+
+        lines = [json.loads(line) for line in (tmp_path / "opens.jsonl").read_text().splitlines()]
+        assert len(lines) == 50
+        assert lines[0]["event"] == "open"
+        assert lines[-1]["email"] == "reader49@example.com"
+        assert "campaign" in lines[0] and lines[0]["campaign"] == "news"
+
+    def test_stats_exact_across_worker_threads(self):
+        """Concurrent requests do not lose counter updates"""
+
+        class SlowCounter(Counter):
+            # Yield between the read and the write of ``stats[key] += 1``
+            def __getitem__(self, key):
+                value = super().__getitem__(key)
+                time.sleep(0)
+                return value
+
+        app = PixelApp(RecordingStore())
+        app.stats = SlowCounter()
+        query = pixel_query()
+
+        def worker():
+            for _ in range(500):
+                app.track(query, user_agent=CHROME)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert app.stats["hits"] == app.stats["queued"] == 4000
+
+
+@pytest.mark.performance
+def test_pixel_throughput(tmp_path):
+    """The app handles thousands of hits per second on one core"""
+    app = PixelApp(EventLog(tmp_path / "opens.jsonl"))
+    queries = [pixel_query(f"reader{i}@example.com") for i in range(1000)]
+
+    start = time.perf_counter()
+    for i in range(20000):
+        call_wsgi(app, queries[i % 1000], user_agent=CHROME)
+    elapsed = time.perf_counter() - start
+    app.close()
+
+    assert app.stats["queued"] + app.store.dropped == 20000
+    assert 20000 / elapsed > 5000, f"{20000 / elapsed:.0f} hits/s"
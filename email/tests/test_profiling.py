@@ -0,0 +1,94 @@
+"""
+Tests for --profile (cProfile and tracemalloc snapshots)
+"""
+
+import pstats
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign import CampaignRun, build_parser, run_campaign
+from campaign.profiling import RunProfiler
+from tests.fixtures.campaigns import RecordingBackend, make_args
+
+
+class TestProfileOptions:
+    """Test the shared --profile options"""
+
+    def test_defaults(self):
+        args = build_parser("test").parse_args([])
+
+        assert RunProfiler.from_args(args, "news") is None
+
+    def test_bare_flag_uses_default_prefix(self):
+        args = build_parser("test").parse_args(["--profile"])
+
+        profiler = RunProfiler.from_args(args, "news")
+
+        assert profiler.prefix.name.startswith("profile-news-")
+        assert profiler.memory is False
+
+    def test_prefix_and_memory(self):
+        args = build_parser("test").parse_args(
+            ["--profile", "out/run", "--profile-memory", "--profile-memory-every", "5"]
+        )
+
+        profiler = RunProfiler.from_args(args, "news")
+
+        assert profiler.prefix == Path("out/run")
+        assert profiler.memory is True
+        assert profiler.memory_every == 5
+
+
+class TestProfiledRun:
+    """Test profiling a campaign run"""
+
+    def test_writes_pstats_and_summary(self, make_campaign, sample_users, temp_files, mock_time):
+        prefix = temp_files["dir"] / "profiles" / "run"
+
+        run_campaign(
+            make_campaign(sample_users, RecordingBackend()),
+            make_args(profile=str(prefix), profile_top=5),
+        )
+
+        stats = pstats.Stats(str(prefix) + ".pstats")
+        functions = {name for (_, _, name) in stats.stats}
+        assert "send_sequential" in functions
+        report = Path(str(prefix) + ".txt").read_text()
+        assert report.startswith("Top 5 functions by cumulative time")
+        assert "Memory" not in report
+
+    # No mock_time here: a patched time.sleep records every call, and a
+    # leftover sleeping thread from another test would then grow the traced heap
+    def test_memory_snapshots_at_stage_boundaries(self, make_campaign, sample_users, temp_files):
+        prefix = temp_files["dir"] / "run"
+        args = make_args(profile=str(prefix), profile_memory=True, profile_memory_every=2)
+        campaign_run = CampaignRun(make_campaign(sample_users, RecordingBackend()), args)
+        campaign_run.run()
+
+        labels = [snap["label"] for snap in campaign_run.profiler.snapshots]
+        assert labels == [
+            "start",
+            "after fetch",
+            "after filter",
+            "after 2 sends",
+            "after 4 sends",
+            "end",
+        ]
+        report = Path(str(prefix) + ".txt").read_text()
+        assert "after filter:" in report
+
+    def test_memory_snapshots_per_batch_in_fast_mode(self, make_campaign, sample_users, temp_files):
+        args = make_args(
+            fast=True,
+            profile=str(temp_files["dir"] / "run"),
+            profile_memory=True,
+            profile_memory_every=3,
+        )
+        campaign_run = CampaignRun(make_campaign(sample_users, RecordingBackend(), batch_size=2), args)
+        campaign_run.run()
+
+        labels = [snap["label"] for snap in campaign_run.profiler.snapshots]
+        assert "after 4 sends" in labels
+        assert labels[-1] == "end"
@@ -0,0 +1,148 @@
+"""
+Tests for the progress line and per-recipient console output
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign import ResendBackend, run_campaign
+from campaign.events import recipient_hash
+from campaign.progress import ProgressReporter, format_duration
+from tests.fixtures.campaigns import RecordingBackend, make_args
+
+
+class FakeTerminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProgressReporter:
+    """Test the rate-limited status line"""
+
+    def test_piped_output_is_rate_limited(self, mocker):
+        clock = mocker.patch("campaign.progress.time.monotonic", FakeClock())
+        stream = io.StringIO()
+        progress = ProgressReporter(100, stream=stream)
+
+        for _ in range(50):
+            progress.update(sent=1)
+        assert stream.getvalue() == ""
+
+        clock.now += 10
+        progress.update(sent=1)
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 1
+        assert lines[0].startswith("📤 Sending 51/100 (51%) | ✅ 51 | ❌ 0")
+        assert "306/min" in lines[0]
+        assert "ETA 9s" in lines[0]
+
+    def test_terminal_line_is_rewritten_in_place(self, mocker):
+        clock = mocker.patch("campaign.progress.time.monotonic", FakeClock())
+        stream = FakeTerminal()
+        progress = ProgressReporter(3, stream=stream)
+
+        clock.now += 1
+        progress.update(sent=1)
+        progress.message("❌ b@example.com - rejected")
+        progress.update(failed=1)
+        progress.finish()
+
+        out = stream.getvalue()
+        assert out.startswith("\r📤 Sending 1/3")
+        assert "\r\x1b[K❌ b@example.com - rejected\n" in out
+        assert out.endswith("\r📤 Sending 2/3 (67%) | ✅ 1 | ❌ 1 | 120/min | ETA 0s\x1b[K\n")
+
+    def test_waiting_note(self, mocker):
+        mocker.patch("campaign.progress.time.monotonic", FakeClock())
+        progress = ProgressReporter(2, stream=FakeTerminal())
+
+        progress.waiting(30)
+
+        assert progress.status().endswith("⏳ next in 30s")
+
+    def test_format_duration(self):
+        assert format_duration(42) == "42s"
+        assert format_duration(125) == "2m05s"
+        assert format_duration(3720) == "1h02m"
+
+
+class TestCampaignOutput:
+    """Test console output and event logging during a run"""
+
+    def test_live_run_shows_progress_not_recipients(
+        self, make_campaign, sample_users, temp_files, mock_time, capsys
+    ):
+        failing = sample_users[2]["email"]
+        backend = RecordingBackend(fail={failing})
+
+        run_campaign(make_campaign(sample_users, backend), make_args())
+
+        out = capsys.readouterr().out
+        assert "Sending to" not in out
+        assert sample_users[0]["email"] not in out
+        assert f"❌ {failing} - rejected" in out
+        assert "📤 Sending 5/5 (100%) | ✅ 4 | ❌ 1" in out
+
+        events = [
+            json.loads(line)
+            for line in (temp_files["dir"] / "events-test.jsonl").read_text().splitlines()
+        ]
+        assert events[0]["event"] == "run_started"
+        assert events[0]["total"] == len(sample_users)
+        assert [e["event"] for e in events[1:-1]].count("sent") == 4
+        expected = {"event": "failed", "recipient": recipient_hash(failing), "error": "rejected", "position": 3}
+        assert expected.items() <= events[3].items()
+        assert events[-1]["event"] == "run_finished"
+        assert events[-1]["sent"] == 4
+
+    def test_verbose_prints_each_recipient(
+        self, make_campaign, sample_users, temp_files, mock_time, capsys
+    ):
+        run_campaign(make_campaign(sample_users, RecordingBackend()), make_args(verbose=True))
+
+        out = capsys.readouterr().out
+        assert all(f"Sending to {u['email']}... ✅" in out for u in sample_users)
+        assert "📤 Sending 5/5" not in out
+
+    def test_fast_mode_logs_batches(self, make_campaign, sample_users, temp_files, mock_time, capsys):
+        log_file = temp_files["dir"] / "logs" / "run.jsonl"
+        campaign = make_campaign(sample_users, RecordingBackend(), batch_size=2)
+
+        run_campaign(campaign, make_args(fast=True, log_file=str(log_file)))
+
+        out = capsys.readouterr().out
+        assert "Processing batch" not in out
+        assert "📤 Sending 5/5 (100%) | ✅ 5 | ❌ 0" in out
+        events = [json.loads(line)["event"] for line in log_file.read_text().splitlines()]
+        assert events.count("sent") == len(sample_users)
+
+    def test_dry_run_lists_recipients_without_log(
+        self, make_campaign, sample_users, temp_files, mock_time, capsys
+    ):
+        run_campaign(make_campaign(sample_users, RecordingBackend()), make_args(dry_run=True))
+
+        out = capsys.readouterr().out
+        assert all(f"Would send to: {u['email']}" in out for u in sample_users)
+        assert not (temp_files["dir"] / "events-test.jsonl").exists()
+
+
+def test_resend_response_not_printed(mocker, capsys):
+    send = mocker.patch("resend.Emails.send", return_value={"id": "msg-123"})
+    mocker.patch("resend.api_key", "test-key")
+
+    assert ResendBackend("Subject").deliver("a@example.com", "<p>Hi</p>") == (True, None)
+
+    send.assert_called_once()
+    assert "msg-123" not in capsys.readouterr().out
@@ -0,0 +1,138 @@
+"""
+Tests for recipient normalization and de-duplication
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import auto_smtp
+from recipients import (
+    normalize_email, dedupe_users, build_sent_index, filter_unsent, clean_email
+)
+
+
+def make_user(user_id, email, first="", last="", name=""):
+    return {
+        "id": user_id,
+        "email": email,
+        "firstName": first,
+        "lastName": last,
+        "name": name,
+    }
+
+
+class TestNormalizeEmail:
+    """Test per-domain normalization policies"""
+
+    @pytest.mark.parametrize("raw,expected", [
+        ("  John@Example.com ", "john@example.com"),
+        ("user+tag@example.com", "user+tag@example.com"),
+        ("j.o.h.n@example.com", "j.o.h.n@example.com"),
+        ("John.Doe+news@Gmail.com", "johndoe@gmail.com"),
+        ("john.doe@googlemail.com", "johndoe@gmail.com"),
+        ("jane+promo@outlook.com", "jane@outlook.com"),
+        ("jane.doe@outlook.com", "jane.doe@outlook.com"),
+        ("notanemail", "notanemail"),
+    ])
+    def test_default_policies(self, raw, expected):
+        assert normalize_email(raw) == expected
+
+    def test_custom_policy(self):
+        policies = {"example.com": {"strip_plus": True}}
+
+        assert normalize_email("user+tag@example.com", policies) == "user@example.com"
+        assert normalize_email("a.b+x@gmail.com", policies) == "a.b+x@gmail.com"
+
+    def test_clean_email_handles_none(self):
+        assert clean_email(None) == ""
+
+
+class TestDedupeUsers:
+    """Test duplicate collapsing"""
+
+    def test_collapses_duplicates(self):
+        users = [
+            make_user("b", "John.Doe@gmail.com", "John"),
+            make_user("c", "jane@example.com", "Jane"),
+            make_user("a", "johndoe+form@gmail.com", "John"),
+            make_user("d", " JANE@example.com ", "Jane"),
+        ]
+
+        unique, removed = dedupe_users(users)
+
+        assert removed == 2
+        assert [u["id"] for u in unique] == ["a", "c"]
+
+    def test_prefers_most_complete_row(self):
+        users = [
+            make_user("a", "kim@example.com", "Kim"),
+            make_user("b", "kim@example.com", "Kim", "Lee", "Kim Lee"),
+        ]
+
+        unique, removed = dedupe_users(users)
+
+        assert removed == 1
+        assert unique[0]["id"] == "b"
+
+    def test_choice_is_independent_of_order(self):
+        users = [
+            make_user("x2", "sam@example.com", "Sam"),
+            make_user("x1", "SAM@example.com", "Sam"),
+        ]
+
+        first, _ = dedupe_users(users)
+        second, _ = dedupe_users(list(reversed(users)))
+
+        assert first[0]["id"] == second[0]["id"] == "x1"
+
+    def test_cleans_send_address(self):
+        unique, _ = dedupe_users([make_user("a", "  Sam@Example.com ")])
+
+        assert unique[0]["email"] == "sam@example.com"
+
+    def test_no_duplicates(self, sample_users):
+        unique, removed = dedupe_users(sample_users)
+
+        assert removed == 0
+        assert unique == sample_users
+
+
+class TestSentIndex:
+    """Test filtering against the sent ledger"""
+
+    def test_filter_matches_normalized_variants(self):
+        users = [
+            make_user("a", "johndoe@gmail.com"),
+            make_user("b", "new@example.com"),
+        ]
+        sent_index = build_sent_index(["John.Doe@gmail.com"])
+
+        remaining = filter_unsent(users, sent_index)
+
+        assert [u["id"] for u in remaining] == ["b"]
+
+
+class TestCampaignIntegration:
+    """Test that senders dedupe before sending"""
+
+    def test_duplicates_sent_once(self, mocker, temp_files, capsys, mock_time):
+        users = [
+            make_user("a", "dup@example.com", "Dup"),
+            make_user("b", "DUP@example.com", "Dup"),
+            make_user("c", "other@example.com", "Other"),
+        ]
+        mocker.patch.object(sys, "argv", ["auto_smtp.py", "--dry-run"])
+        mocker.patch.object(auto_smtp, "SENT_EMAILS_FILE", temp_files["sent"])
+        mocker.patch.object(auto_smtp, "FAILED_EMAILS_FILE", temp_files["failed"])
+        mocker.patch.object(auto_smtp, "fetch_users_from_notion", return_value=users)
+
+        auto_smtp.main()
+
+        out = capsys.readouterr().out
+        assert out.count("Would send to: dup@example.com") == 1
+        assert "Collapsed 1 duplicate rows" in out
+        assert "Duplicates Removed: 1" in out
@@ -0,0 +1,199 @@
+"""
+Tests for deadline planning and recipient priority
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import auto_resend
+from campaign import CampaignRun, build_parser
+from campaign.schedule import (
+    DeadlineSchedule,
+    end_of_day,
+    parse_deadline,
+    prefer_new_recipients,
+)
+from tests.fixtures.campaigns import RecordingBackend, make_args
+
+NOW = datetime(2025, 7, 18, 22, 0, 0)
+
+
+class TestParseDeadline:
+    """Test --deadline values"""
+
+    def test_time_today(self):
+        assert parse_deadline("23:30", now=NOW) == datetime(2025, 7, 18, 23, 30)
+
+    def test_iso_datetime(self):
+        assert parse_deadline("2025-07-19T06:00", now=NOW) == datetime(2025, 7, 19, 6, 0)
+
+    def test_aware_datetime_is_local(self):
+        deadline = parse_deadline("2025-07-19T06:00+00:00", now=NOW)
+
+        assert deadline.tzinfo is None
+        assert deadline == datetime(2025, 7, 19, 6, 0, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+
+    def test_invalid(self):
+        with pytest.raises(ValueError, match="HH:MM"):
+            parse_deadline("tonight", now=NOW)
+
+    def test_option(self, capsys):
+        args = build_parser("test").parse_args(["--deadline", "23:00", "--deadline-policy", "fast"])
+        assert (args.deadline.hour, args.deadline_policy) == (23, "fast")
+
+        with pytest.raises(SystemExit):
+            build_parser("test").parse_args(["--deadline", "soon"])
+        assert "Invalid deadline 'soon'" in capsys.readouterr().err
+
+    def test_end_of_day(self):
+        assert end_of_day(NOW) == datetime(2025, 7, 18, 23, 59, 59)
+
+
+class TestDeadlineSchedule:
+    """Test ETA estimates and the mode decision"""
+
+    def schedule(self, count, minutes_left, **kwargs):
+        kwargs.setdefault("rate_limit_seconds", 30)
+        kwargs.setdefault("batch_size", 100)
+        return DeadlineSchedule(NOW + timedelta(minutes=minutes_left), count, now=NOW, **kwargs)
+
+    def test_estimates(self):
+        schedule = self.schedule(250, 60, batch_delay_seconds=1, send_seconds=0.5, batch_seconds=2)
+
+        assert schedule.slow_seconds == 250 * 0.5 + 249 * 30
+        assert schedule.fast_seconds == 3 * 2 + 2 * 1
+        assert schedule.required_per_minute == pytest.approx(250 / 60)
+
+    def test_fits_in_slow_mode(self):
+        fast, messages = self.schedule(100, 120).choose(policy="fast")
+
+        assert fast is False
+        assert "within the deadline" in messages[-1]
+
+    def test_warns_and_suggests_fast(self):
+        fast, messages = self.schedule(500, 60).choose(policy="warn")
+
+        assert fast is False
+        assert "exceeds the deadline" in messages[1]
+        assert "rerun with --fast" in messages[2]
+
+    def test_switches_to_fast(self):
+        fast, messages = self.schedule(500, 60).choose(policy="fast")
+
+        assert fast is True
+        assert messages[-1].startswith("⚡ Switching to fast mode (ETA")
+
+    def test_switches_even_when_fast_misses(self):
+        schedule = self.schedule(10000, 1, batch_seconds=5)
+
+        fast, messages = schedule.choose(policy="fast")
+
+        assert fast is True
+        assert "still past the deadline" in messages[-1]
+
+    def test_deadline_passed(self):
+        fast, messages = self.schedule(10, -5).choose(policy="fast")
+
+        assert fast is False
+        assert messages[-1] == "⚠️ The deadline has already passed"
+
+
+class TestPriority:
+    """Test never-emailed recipients going first"""
+
+    def test_new_recipients_first(self, tmp_path, sample_users, capsys):
+        ledger = tmp_path / "sent-news-emails.json"
+        ledger.write_text(json.dumps([sample_users[0]["email"], sample_users[2]["email"]]))
+
+        ordered = prefer_new_recipients(ledger, tmp_path / "missing.json")(sample_users)
+
+        assert [u["email"] for u in ordered] == [
+            sample_users[i]["email"] for i in (1, 3, 4, 0, 2)
+        ]
+        assert "3 never-emailed recipients before 2 previously emailed" in capsys.readouterr().out
+        assert not (tmp_path / "missing.json.index").exists()
+
+
+class TestDeadlineRun:
+    """Test the engine applying a campaign deadline"""
+
+    def test_campaign_policy_switches_to_fast(self, make_campaign, sample_users, temp_files, mock_time):
+        backend = RecordingBackend()
+        campaign = make_campaign(
+            sample_users,
+            backend,
+            rate_limit_seconds=3600,
+            batch_size=2,
+            deadline=lambda: datetime.now() + timedelta(hours=1),
+            deadline_policy="fast",
+        )
+
+        run = CampaignRun(campaign, make_args())
+        run.run()
+
+        assert run.fast is True
+        assert backend.batches == [
+            [u["email"] for u in sample_users[0:2]],
+            [u["email"] for u in sample_users[2:4]],
+            [sample_users[4]["email"]],
+        ]
+        assert run.metrics.counters["deadline_fast_switch"] == 1
+
+    def test_explicit_slow_only_warns(self, make_campaign, sample_users, temp_files, mock_time, capsys):
+        campaign = make_campaign(
+            sample_users,
+            RecordingBackend(),
+            rate_limit_seconds=3600,
+            deadline=datetime.now() + timedelta(hours=1),
+            deadline_policy="fast",
+        )
+
+        run = CampaignRun(campaign, make_args(slow=True))
+        run.run()
+
+        assert run.fast is False
+        assert "exceeds the deadline" in capsys.readouterr().out
+
+    def test_command_line_deadline_and_priority(self, make_campaign, sample_users, temp_files, mock_time):
+        backend = RecordingBackend()
+        campaign = make_campaign(
+            sample_users, backend, prioritize=lambda users: list(reversed(users))
+        )
+
+        CampaignRun(
+            campaign, make_args(deadline=datetime.now() + timedelta(hours=1), deadline_policy="warn")
+        ).run()
+
+        assert [email for email, _ in backend.sent] == [u["email"] for u in reversed(sample_users)]
+
+    def test_encourage_campaign_plans_for_midnight_when_asked(self):
+        campaign = auto_resend.build_campaign(deadline_policy="fast")
+
+        assert campaign.deadline() == end_of_day()
+        assert campaign.deadline_policy == "fast"
+        assert campaign.prioritize is not None
+
+    def test_encourage_campaign_has_no_deadline_by_default(self, mocker):
+        mocker.patch.object(sys, "argv", ["auto_resend.py", "--dry-run"])
+        run = mocker.patch.object(auto_resend, "run_campaign")
+
+        auto_resend.main()
+
+        campaign = run.call_args.args[0]
+        assert campaign.deadline is None
+        assert campaign.prioritize is None
+
+    def test_encourage_deadline_flag_opts_in(self, mocker):
+        mocker.patch.object(sys, "argv", ["auto_resend.py", "--deadline", "21:00"])
+        run = mocker.patch.object(auto_resend, "run_campaign")
+
+        auto_resend.main()
+
+        campaign = run.call_args.args[0]
+        assert (campaign.deadline_policy, campaign.prioritize is not None) == ("warn", True)
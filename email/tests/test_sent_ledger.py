@@ -0,0 +1,139 @@
+"""
+Tests for the memory-mapped sent ledger index
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import auto_smtp
+import sent_ledger
+from sent_ledger import SentLedger, append_to_json_list
+
+
+@pytest.fixture
+def ledger_file(tmp_path):
+    path = tmp_path / "sent-emails.json"
+    path.write_text(json.dumps([f"user{i}@example.com" for i in range(500)], indent=2))
+    return path
+
+
+class TestAppendToJsonList:
+    """Test in-place ledger appends"""
+
+    @pytest.mark.parametrize("initial", ["[]", "[\n]\n", '["a@example.com"]', '[\n  "a@example.com"\n]'])
+    def test_append_keeps_valid_json(self, tmp_path, initial):
+        path = tmp_path / "ledger.json"
+        path.write_text(initial)
+        before = json.loads(initial)
+
+        append_to_json_list(path, "b@example.com")
+        append_to_json_list(path, "c@example.com")
+
+        assert json.loads(path.read_text()) == before + ["b@example.com", "c@example.com"]
+
+    def test_append_creates_missing_file(self, tmp_path):
+        path = tmp_path / "missing.json"
+
+        append_to_json_list(path, "a@example.com")
+
+        assert json.loads(path.read_text()) == ["a@example.com"]
+
+    def test_append_rewrites_non_list(self, tmp_path):
+        path = tmp_path / "ledger.json"
+        path.write_text("{ invalid json")
+
+        append_to_json_list(path, "a@example.com")
+
+        assert json.loads(path.read_text()) == ["a@example.com"]
+
+
+class TestSentLedger:
+    """Test Bloom filter + digest index membership"""
+
+    def test_membership(self, ledger_file):
+        ledger = SentLedger(ledger_file)
+
+        assert len(ledger) == 500
+        assert "user42@example.com" in ledger
+        assert " USER42@example.com" in ledger
+        assert all(f"other{i}@example.com" not in ledger for i in range(1000))
+        ledger.close()
+
+    def test_index_reused_without_parsing(self, ledger_file, mocker):
+        SentLedger(ledger_file).close()
+        load = mocker.spy(json, "load")
+
+        ledger = SentLedger(ledger_file)
+
+        assert ledger.rebuilt is False
+        assert "user7@example.com" in ledger
+        load.assert_not_called()
+        ledger.close()
+
+    def test_index_rebuilt_when_ledger_changes(self, ledger_file):
+        SentLedger(ledger_file).close()
+        ledger_file.write_text(json.dumps(["changed@example.com"]))
+
+        ledger = SentLedger(ledger_file)
+
+        assert ledger.rebuilt is True
+        assert "changed@example.com" in ledger
+        assert "user1@example.com" not in ledger
+        ledger.close()
+
+    def test_record_appends_and_folds_into_index(self, ledger_file):
+        ledger = SentLedger(ledger_file)
+        ledger.record("new@example.com")
+
+        assert "new@example.com" in ledger
+        assert len(ledger) == 501
+        ledger.close()
+
+        assert json.loads(ledger_file.read_text())[-1] == "new@example.com"
+        reopened = SentLedger(ledger_file)
+        assert reopened.rebuilt is False
+        assert "new@example.com" in reopened
+        assert len(reopened) == 501
+        reopened.close()
+
+    def test_missing_ledger(self, tmp_path):
+        ledger = SentLedger(tmp_path / "sent-emails.json")
+
+        assert len(ledger) == 0
+        assert "a@example.com" not in ledger
+        ledger.close()
+
+    def test_absent_lookups_checked_by_bloom(self, ledger_file, mocker):
+        SentLedger(ledger_file).close()
+        ledger = SentLedger(ledger_file)
+        search = mocker.spy(sent_ledger.BloomFilter, "__contains__")
+
+        for i in range(200):
+            assert f"absent{i}@example.com" not in ledger
+
+        assert search.call_count == 200
+        ledger.close()
+
+
+class TestSenderUsesLedger:
+    """Test that senders record through the ledger"""
+
+    def test_sent_file_appended(self, mocker, temp_files, sample_users, mock_time):
+        temp_files["sent"].write_text(json.dumps([sample_users[0]["email"]]))
+        mocker.patch.object(sys, "argv", ["auto_smtp.py"])
+        mocker.patch.object(auto_smtp, "SENT_EMAILS_FILE", temp_files["sent"])
+        mocker.patch.object(auto_smtp, "FAILED_EMAILS_FILE", temp_files["failed"])
+        mocker.patch.object(auto_smtp, "fetch_users_from_notion", return_value=sample_users)
+        mocker.patch.object(auto_smtp, "compile_mjml_template", return_value="<html/>")
+        mocker.patch("smtplib.SMTP")
+
+        auto_smtp.main()
+
+        sent = json.loads(temp_files["sent"].read_text())
+        assert sent == [u["email"] for u in sample_users]
+        assert SentLedger(temp_files["sent"]).rebuilt is False
@@ -0,0 +1,111 @@
+"""
+Startup benchmark for the email CLIs
+
+Provider and client libraries are imported on first use (campaign/lazy.py).
+These tests run ``python -X importtime`` in a fresh interpreter and guard
+that ``import`` and ``--help`` stay free of them, and that cold start stays
+within budget.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign.lazy import LazyAttribute, lazy_import
+
+SCRIPT_DIR = Path(__file__).parent.parent
+
+SCRIPTS = ["auto_smtp", "auto_resend", "auto_resend_news", "view_tracking_stats"]
+
+# Modules that must only load when a run actually needs them
+DEFERRED_MODULES = {
+    "resend",
+    "notion_client",
+    "requests",
+    "httpx",
+    "smtplib",
+    "email.mime.text",
+    "dotenv.main",
+    "concurrent.futures",
+    "tomllib",
+    "http.server",
+}
+
+# Cumulative import time budget per script, in microseconds
+IMPORT_BUDGET_US = 100_000
+
+
+def child_env():
+    """
+    The test process's environment without pytest-cov's variables, which
+    would start coverage (and its imports) in the measured interpreter
+    """
+    return {
+        name: value
+        for name, value in os.environ.items()
+        if not name.startswith(("COV_CORE_", "COVERAGE_"))
+    }
+
+
+def import_times(*args):
+    """Run python -X importtime and return {module: cumulative_us}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=SCRIPT_DIR,
+        env=child_env(),
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestLazyImports:
+    """Test the deferred import helpers"""
+
+    def test_lazy_import_defers_execution(self):
+        module = lazy_import("json")
+        assert module.dumps([1]) == "[1]"
+
+    def test_missing_module_fails_at_startup(self):
+        with pytest.raises(ModuleNotFoundError):
+            lazy_import("no_such_module_nstcg")
+        with pytest.raises(ModuleNotFoundError):
+            LazyAttribute("no_such_module_nstcg", "Client")
+
+    def test_lazy_attribute_resolves_on_call(self):
+        factory = LazyAttribute("collections", "OrderedDict")
+        assert factory(a=1) == {"a": 1}
+
+    @pytest.mark.parametrize("script", SCRIPTS)
+    def test_import_skips_provider_modules(self, script):
+        loaded = DEFERRED_MODULES & set(import_times("-c", f"import {script}"))
+        assert not loaded, f"{script} imports {sorted(loaded)} at startup"
+
+    @pytest.mark.parametrize("script", SCRIPTS)
+    def test_help_skips_provider_modules(self, script):
+        loaded = DEFERRED_MODULES & set(import_times(f"{script}.py", "--help"))
+        assert not loaded, f"{script} --help imports {sorted(loaded)}"
+
+
+@pytest.mark.performance
+class TestStartupBudget:
+    """Cold-start import time of each CLI"""
+
+    @pytest.mark.parametrize("script", SCRIPTS)
+    def test_import_within_budget(self, script):
+        best = min(import_times("-c", f"import {script}")[script] for _ in range(3))
+        print(f"\n{script}: {best / 1000:.1f}ms cumulative import")
+        assert best < IMPORT_BUDGET_US
@@ -0,0 +1,185 @@
+"""
+Tests for the shared suppression list
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import auto_resend_news
+import auto_smtp
+import suppression
+from bloom import BloomFilter
+from suppression import SuppressionList, filter_suppressed
+
+
+class TestBloomFilter:
+    """Test the Bloom filter (the sent ledger's negative pre-check)"""
+
+    def test_no_false_negatives(self):
+        keys = [f"user{i}@example.com" for i in range(2000)]
+        bloom = BloomFilter.from_keys(keys)
+
+        assert all(key in bloom for key in keys)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter.from_keys([f"user{i}@example.com" for i in range(2000)], error_rate=0.01)
+
+        false_positives = sum(f"other{i}@example.com" in bloom for i in range(5000))
+
+        assert false_positives < 5000 * 0.03
+
+
+class TestSuppressionList:
+    """Test suppression store behaviour"""
+
+    def test_membership_is_normalized(self):
+        store = SuppressionList()
+        store.add("John.Doe+x@Gmail.com", reason="bounced")
+
+        assert "johndoe@gmail.com" in store
+        assert " JOHN.DOE@gmail.com " in store
+        assert "someone@gmail.com" not in store
+
+    def test_add_is_idempotent(self):
+        store = SuppressionList()
+
+        assert store.add("a@example.com") is True
+        assert store.add("A@example.com") is False
+        assert len(store) == 1
+
+    def test_rejects_invalid_addresses(self):
+        store = SuppressionList()
+
+        assert store.add("not-an-email") is False
+        assert len(store) == 0
+
+    def test_save_and_load(self, tmp_path):
+        path = tmp_path / "suppressed.json"
+        store = SuppressionList(path=path)
+        store.add("a@example.com", reason="complained")
+        store.save()
+
+        loaded = SuppressionList.load(path)
+
+        assert "a@example.com" in loaded
+        assert loaded.reason("a@example.com")["reason"] == "complained"
+
+    def test_load_missing_file(self, tmp_path):
+        assert len(SuppressionList.load(tmp_path / "missing.json")) == 0
+
+    def test_loaded_entries_and_additions(self):
+        entries = {f"user{i}@example.com": {"reason": "bounced"} for i in range(100)}
+
+        store = SuppressionList(entries)
+        store.add("late@example.com")
+
+        assert "user42@example.com" in store
+        assert "late@example.com" in store
+        assert "nobody@example.com" not in store
+
+    def test_remove(self):
+        store = SuppressionList()
+        store.add("a@example.com")
+
+        assert store.remove("A@example.com") is True
+        assert "a@example.com" not in store
+
+    def test_import_csv(self, tmp_path):
+        csv_file = tmp_path / "bounces.csv"
+        csv_file.write_text("email,type\na@example.com,hard\nb@example.com,\na@example.com,hard\n")
+        store = SuppressionList()
+
+        added = store.import_csv(csv_file, reason="bounced", reason_column="type")
+
+        assert added == 2
+        assert store.reason("a@example.com")["reason"] == "hard"
+        assert store.reason("b@example.com")["reason"] == "bounced"
+
+    def test_import_csv_missing_column(self, tmp_path):
+        csv_file = tmp_path / "bad.csv"
+        csv_file.write_text("address\na@example.com\n")
+
+        with pytest.raises(ValueError):
+            SuppressionList().import_csv(csv_file)
+
+    def test_import_failed_ledger(self, tmp_path, failed_emails_data):
+        ledger = tmp_path / "failed-emails.json"
+        ledger.write_text(json.dumps(failed_emails_data + [
+            {"email": "timeout@example.com", "error": "Connection timed out"},
+        ]))
+        store = SuppressionList()
+
+        added = store.import_failed_ledger(ledger, match=["invalid recipient"])
+
+        assert added == 1
+        assert "failed@example.com" in store
+        assert "timeout@example.com" not in store
+
+    def test_filter_suppressed(self, sample_users):
+        store = SuppressionList()
+        store.add(sample_users[0]["email"])
+
+        kept, removed = filter_suppressed(sample_users, store)
+
+        assert removed == 1
+        assert sample_users[0] not in kept
+
+
+class TestSuppressionCLI:
+    """Test the suppression management command"""
+
+    def test_add_and_check(self, tmp_path, capsys):
+        path = tmp_path / "suppressed.json"
+
+        suppression.main(["--file", str(path), "add", "a@example.com", "--reason", "unsubscribed"])
+        suppression.main(["--file", str(path), "check", "a@example.com", "b@example.com"])
+
+        out = capsys.readouterr().out
+        assert "🚫 a@example.com - unsubscribed" in out
+        assert "✅ b@example.com - not suppressed" in out
+
+
+class TestSendersHonourSuppression:
+    """Test that senders drop suppressed users before rendering"""
+
+    def test_auto_smtp_skips_suppressed(self, mocker, temp_files, sample_users, capsys, mock_time):
+        path = temp_files["dir"] / "suppressed.json"
+        store = SuppressionList(path=path)
+        store.add(sample_users[0]["email"], reason="bounced")
+        store.save()
+        mocker.patch.object(sys, "argv", ["auto_smtp.py", "--dry-run"])
+        mocker.patch.object(auto_smtp, "SENT_EMAILS_FILE", temp_files["sent"])
+        mocker.patch.object(auto_smtp, "FAILED_EMAILS_FILE", temp_files["failed"])
+        mocker.patch.object(auto_smtp, "SUPPRESSION_FILE", path)
+        mocker.patch.object(auto_smtp, "fetch_users_from_notion", return_value=sample_users)
+
+        auto_smtp.main()
+
+        out = capsys.readouterr().out
+        assert f"Would send to: {sample_users[0]['email']}" not in out
+        assert "Excluded 1 suppressed addresses" in out
+
+    def test_news_skips_before_rendering(self, mocker, temp_files, sample_users, mock_time):
+        path = temp_files["dir"] / "suppressed.json"
+        store = SuppressionList(path=path)
+        store.add(sample_users[1]["email"], reason="complained")
+        store.save()
+        mocker.patch.object(sys, "argv", ["auto_resend_news.py"])
+        mocker.patch.object(auto_resend_news, "SENT_EMAILS_FILE", temp_files["sent"])
+        mocker.patch.object(auto_resend_news, "FAILED_EMAILS_FILE", temp_files["failed"])
+        mocker.patch.object(auto_resend_news, "SUPPRESSION_FILE", path)
+        mocker.patch.object(auto_resend_news, "fetch_users_from_notion", return_value=sample_users)
+        mocker.patch.object(auto_resend_news.resend, "api_key", "test-key")
+        render = mocker.patch.object(auto_resend_news, "generate_news_email", return_value="<html/>")
+        mocker.patch.object(auto_resend_news.resend.Emails, "send", return_value={"id": "msg"})
+
+        auto_resend_news.main()
+
+        rendered_for = [c.args[0]["email"] for c in render.call_args_list]
+        assert sample_users[1]["email"] not in rendered_for
+        assert len(rendered_for) == len(sample_users) - 1
@@ -0,0 +1,214 @@
+"""
+Tests for per-domain token buckets and round-robin ordering
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign import CampaignRun
+from campaign.cli import build_parser
+from campaign.plan import compile_plan, validate_definition
+from campaign.throttle import DomainThrottle, TokenBucket, interleave_domains
+from tests.fixtures.campaigns import RecordingBackend, make_args
+from tests.test_campaign_plan import campaign_dir, write_definition  # noqa: F401
+
+
+def users(*emails):
+    return [{"email": email, "name": email} for email in emails]
+
+
+class TestInterleave:
+    """Test round-robin ordering across domains"""
+
+    def test_round_robin_keeps_domain_order(self):
+        ordered = interleave_domains(
+            users("a1@gmail.com", "a2@gmail.com", "a3@gmail.com", "b1@yahoo.com", "c1@nstcg.org", "b2@Yahoo.com")
+        )
+
+        assert [u["email"] for u in ordered] == [
+            "a1@gmail.com",
+            "b1@yahoo.com",
+            "c1@nstcg.org",
+            "a2@gmail.com",
+            "b2@Yahoo.com",
+            "a3@gmail.com",
+        ]
+
+    def test_empty(self):
+        assert interleave_domains([]) == []
+
+
+class TestTokenBucket:
+    """Test token reservation"""
+
+    def test_burst_then_refill_rate(self):
+        bucket = TokenBucket(per_minute=60, burst=2, now=0)
+
+        assert bucket.reserve(now=0) == 0
+        assert bucket.reserve(now=0) == 0
+        assert bucket.reserve(now=0) == pytest.approx(1.0)
+        assert bucket.reserve(now=0) == pytest.approx(2.0)
+        # Three seconds later the debt is repaid and one token has accrued
+        assert bucket.reserve(now=5) == 0
+
+    def test_refill_capped_at_burst(self):
+        bucket = TokenBucket(per_minute=60, burst=1, now=0)
+
+        bucket.reserve(now=0)
+        assert bucket.reserve(now=100) == 0
+        assert bucket.reserve(now=100) == pytest.approx(1.0)
+
+
+class TestDomainThrottle:
+    """Test per-domain limits"""
+
+    def test_limits_are_per_domain(self):
+        throttle = DomainThrottle({"gmail.com": 30, "*": 60})
+
+        assert throttle.reserve("a@gmail.com", now=0) == 0
+        assert throttle.reserve("b@gmail.com", now=0) == pytest.approx(2.0)
+        assert throttle.reserve("a@yahoo.com", now=0) == 0
+        assert throttle.reserve("a@outlook.com", now=0) == 0
+        assert throttle.reserve("b@yahoo.com", now=0) == pytest.approx(1.0)
+
+    def test_unlisted_domains_unlimited_without_default(self):
+        throttle = DomainThrottle({"GMAIL.com": 1})
+
+        assert throttle.limit("gmail.com") == 1
+        assert all(throttle.reserve("x@yahoo.com", now=0) == 0 for _ in range(10))
+
+    def test_schedule_groups_sends_by_token_time(self):
+        throttle = DomainThrottle({"gmail.com": 60})
+        batch = users("a1@gmail.com", "b1@yahoo.com", "a2@gmail.com", "b2@yahoo.com", "a3@gmail.com")
+
+        waves = throttle.schedule(batch, window=0.5, now=0)
+
+        assert [(delay, [u["email"] for u in wave]) for delay, wave in waves] == [
+            (0, ["a1@gmail.com", "b1@yahoo.com", "b2@yahoo.com"]),
+            (pytest.approx(1.0), ["a2@gmail.com"]),
+            (pytest.approx(2.0), ["a3@gmail.com"]),
+        ]
+
+    def test_describe(self):
+        assert DomainThrottle({"*": 60, "gmail.com": 20}, burst=5).describe() == (
+            "per domain: gmail.com 20/min, * 60/min (burst 5)"
+        )
+
+
+class TestThrottledRun:
+    """Test the engine applying a domain throttle"""
+
+    EMAILS = ("a1@gmail.com", "a2@gmail.com", "a3@gmail.com", "b1@yahoo.com", "b2@yahoo.com")
+
+    def test_slow_mode_interleaves_and_waits(self, make_campaign, temp_files, mock_time):
+        backend = RecordingBackend()
+        campaign = make_campaign(
+            users(*self.EMAILS), backend, domain_throttle=DomainThrottle({"gmail.com": 60})
+        )
+
+        run = CampaignRun(campaign, make_args())
+        run.run()
+
+        assert [email for email, _ in backend.sent] == [
+            "a1@gmail.com", "b1@yahoo.com", "a2@gmail.com", "b2@yahoo.com", "a3@gmail.com"
+        ]
+        # time.sleep is mocked, so both later gmail sends find the bucket empty
+        assert run.metrics.counters["domain_waits"] == 2
+        waits = [c.args[0] for c in mock_time.call_args_list]
+        assert waits[0] == pytest.approx(1.0, abs=0.1)
+
+    def test_fast_mode_waits_per_batch(self, make_campaign, temp_files, mock_time):
+        backend = RecordingBackend()
+        campaign = make_campaign(
+            users(*self.EMAILS),
+            backend,
+            batch_size=2,
+            domain_throttle=DomainThrottle({"*": 6000}, burst=2),
+        )
+
+        run = CampaignRun(campaign, make_args(fast=True))
+        run.run()
+
+        assert backend.batches == [
+            ["a1@gmail.com", "b1@yahoo.com"],
+            ["a2@gmail.com", "b2@yahoo.com"],
+            ["a3@gmail.com"],
+        ]
+        assert run.metrics.counters["domain_waits"] == 1
+
+    def test_fast_mode_splits_batch_by_domain(self, make_campaign, temp_files, mock_time):
+        backend = RecordingBackend()
+        campaign = make_campaign(
+            users(*self.EMAILS), backend, domain_throttle=DomainThrottle({"gmail.com": 60})
+        )
+
+        run = CampaignRun(campaign, make_args(fast=True))
+        run.run()
+
+        # One gmail.com send per token, however large the batch
+        assert backend.batches == [
+            ["a1@gmail.com", "b1@yahoo.com", "b2@yahoo.com"],
+            ["a2@gmail.com"],
+            ["a3@gmail.com"],
+        ]
+        # Background threads poll with short sleeps of their own
+        waits = [c.args[0] for c in mock_time.call_args_list if c.args[0] > 0.5]
+        assert waits == [pytest.approx(1.0, abs=0.1), pytest.approx(1.0, abs=0.1)]
+
+    def test_cli_domain_limits(self, make_campaign, temp_files, mock_time):
+        backend = RecordingBackend()
+        campaign = make_campaign(users(*self.EMAILS), backend)
+        args = build_parser("test").parse_args(["--domain-limit", "gmail.com=60", "--domain-burst", "2"])
+
+        run = CampaignRun(campaign, make_args(domain_limit=args.domain_limit, domain_burst=args.domain_burst))
+        run.run()
+
+        assert run.domain_throttle.limits == {"gmail.com": 60}
+        assert run.domain_throttle.burst == 2
+        assert [email for email, _ in backend.sent][:3] == ["a1@gmail.com", "b1@yahoo.com", "a2@gmail.com"]
+        assert run.metrics.counters["domain_waits"] == 1
+
+    def test_cli_rejects_bad_domain_limit(self, capsys):
+        with pytest.raises(SystemExit):
+            build_parser("test").parse_args(["--domain-limit", "gmail.com"])
+
+        assert "DOMAIN=EMAILS_PER_MINUTE" in capsys.readouterr().err
+
+    def test_dry_run_does_not_wait(self, make_campaign, temp_files, mock_time):
+        campaign = make_campaign(
+            users(*self.EMAILS), RecordingBackend(), domain_throttle=DomainThrottle({"*": 1})
+        )
+
+        run = CampaignRun(campaign, make_args(dry_run=True))
+        run.run()
+
+        assert "domain_waits" not in run.metrics.counters
+
+
+class TestPlanDomains:
+    """Test [rate.domains] in campaign definitions"""
+
+    def test_compiled_into_campaign(self, campaign_dir):  # noqa: F811
+        path = write_definition(
+            campaign_dir,
+            "per_minute = 120\n",
+            'per_minute = 120\ndomain_burst = 3\n\n[rate.domains]\n"gmail.com" = 20\n"*" = 60\n',
+        )
+
+        plan = compile_plan(path)
+        throttle = plan.to_campaign().domain_throttle
+
+        assert throttle.limits == {"gmail.com": 20, "*": 60}
+        assert throttle.burst == 3
+        assert "gmail.com 20/min" in plan.rate.describe()
+        plan.close()
+
+    def test_invalid_limits(self):
+        errors = validate_definition({"rate": {"domains": {"gmail.com": 0, "yahoo.com": "fast"}}})
+
+        assert "rate.domains.gmail.com must be a positive number of emails per minute" in errors
+        assert "rate.domains.yahoo.com must be a positive number of emails per minute" in errors
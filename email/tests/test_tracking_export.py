@@ -0,0 +1,171 @@
+"""
+Tests for streaming tracking exports
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import view_tracking_stats
+from tracking.export import FIELDNAMES, Exporter, export_filename, tee
+from tracking.store import TrackingStore
+
+
+def row(email, opens=1, campaign="news"):
+    return {
+        "email": email,
+        "campaign": campaign,
+        "open_count": opens,
+        "first_opened": "2025-07-18T16:08:00.000Z",
+        "last_opened": "2025-07-18T16:08:00.000Z",
+        "country": "GB",
+    }
+
+
+ROWS = [row("a@example.com"), row("b@example.com", 3)]
+
+
+class TestExporter:
+    """Test the atomic streaming writer"""
+
+    @pytest.mark.parametrize("fmt", ["csv", "csv.gz", "jsonl", "jsonl.gz"])
+    def test_formats_round_trip(self, tmp_path, fmt):
+        path = tmp_path / f"export.{fmt}"
+
+        with Exporter(path) as exporter:
+            exporter.write_all(ROWS)
+
+        opener = gzip.open if fmt.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", newline="") as f:
+            if fmt.startswith("csv"):
+                written = list(csv.DictReader(f))
+                assert written[1]["open_count"] == "3"
+            else:
+                written = [json.loads(line) for line in f]
+                assert written[1]["open_count"] == 3
+        assert [r["email"] for r in written] == ["a@example.com", "b@example.com"]
+        assert list(written[0]) == FIELDNAMES
+        assert not exporter.tmp_path.exists()
+
+    def test_partial_export_is_discarded(self, tmp_path):
+        path = tmp_path / "export.csv"
+        path.write_text("previous export\n")
+
+        def failing_rows():
+            yield ROWS[0]
+            raise RuntimeError("connection reset")
+
+        with pytest.raises(RuntimeError):
+            with Exporter(path) as exporter:
+                exporter.write_all(failing_rows())
+
+        assert path.read_text() == "previous export\n"
+        assert not exporter.tmp_path.exists()
+
+    def test_tmp_file_until_closed(self, tmp_path):
+        exporter = Exporter(tmp_path / "export.jsonl")
+        list(tee(iter(ROWS), exporter))
+
+        assert exporter.tmp_path.exists() and not exporter.path.exists()
+        assert exporter.close() == exporter.path
+        assert exporter.path.exists()
+
+    def test_no_rows_no_file(self, tmp_path):
+        with Exporter(tmp_path / "export.csv") as exporter:
+            exporter.write_all([])
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError, match="Unknown export format"):
+            Exporter(tmp_path / "export.xml", "xml")
+
+    def test_default_names(self):
+        assert export_filename("jsonl.gz", delta=True).startswith("email_tracking_delta_")
+        assert export_filename().endswith(".csv")
+
+
+class TestLiveExport:
+    """Test --live --export against a failing Notion stream"""
+
+    def test_failed_page_aborts_export(self, tmp_path, mocker, monkeypatch):
+        monkeypatch.setenv("NOTION_TOKEN", "token")
+        monkeypatch.setenv("NOTION_EMAIL_ANALYTICS_DB_ID", "db")
+        page = {
+            "properties": {
+                "Email": {"title": [{"text": {"content": "a@example.com"}}]},
+                "Open Count": {"number": 1},
+            }
+        }
+        client = mocker.Mock()
+        client.databases.query.side_effect = [
+            {"results": [page], "has_more": True, "next_cursor": "2"},
+            RuntimeError("rate limited"),
+        ]
+        mocker.patch.object(view_tracking_stats, "NotionClient", return_value=client)
+        path = tmp_path / "export.csv"
+        args = argparse.Namespace(export=True, format=None, output=str(path))
+
+        with pytest.raises(RuntimeError):
+            view_tracking_stats.report_live(args)
+
+        assert client.databases.query.call_count == 2
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestDeltaExport:
+    """Test --since-last-export against the local store"""
+
+    @staticmethod
+    def export(store_path, output):
+        args = argparse.Namespace(
+            export=True,
+            format=None,
+            output=str(output),
+            since_last_export=True,
+            offline=True,
+            full_sync=False,
+            store=str(store_path),
+        )
+        view_tracking_stats.report_local(args)
+
+    def test_only_changed_rows(self, tmp_path, capsys):
+        store_path = tmp_path / "stats.sqlite3"
+        with TrackingStore(store_path) as store:
+            store.upsert([("p1", None, ROWS[0]), ("p2", None, ROWS[1])])
+
+        self.export(store_path, tmp_path / "first.csv")
+        with TrackingStore(store_path) as store:
+            store.upsert([("p2", None, row("b@example.com", 4))])
+        self.export(store_path, tmp_path / "second.jsonl")
+        self.export(store_path, tmp_path / "third.csv")
+
+        assert len(list(csv.DictReader((tmp_path / "first.csv").open()))) == 2
+        second = [json.loads(line) for line in (tmp_path / "second.jsonl").open()]
+        assert [(r["email"], r["open_count"]) for r in second] == [("b@example.com", 4)]
+        assert not (tmp_path / "third.csv").exists()
+        assert "Nothing to export" in capsys.readouterr().out
+
+    def test_store_upgraded_with_version_column(self, tmp_path):
+        import sqlite3
+
+        path = tmp_path / "old.sqlite3"
+        db = sqlite3.connect(path)
+        db.execute(
+            "CREATE TABLE opens (page_id TEXT PRIMARY KEY, email TEXT NOT NULL, campaign TEXT NOT NULL,"
+            " campaign_key TEXT NOT NULL, open_count INTEGER NOT NULL, first_opened TEXT,"
+            " last_opened TEXT, first_opened_at TEXT, last_opened_at TEXT, country TEXT NOT NULL,"
+            " edited TEXT)"
+        )
+        db.close()
+
+        with TrackingStore(path) as store:
+            store.upsert([("p1", None, ROWS[0])])
+            assert [r["email"] for r in store.rows(since_version=0)] == ["a@example.com"]
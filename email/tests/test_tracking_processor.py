@@ -0,0 +1,276 @@
+"""
+Tests for the tracking queue processor
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from campaign.events import recipient_hash
+from tracking.processor import (
+    NotionUpserter,
+    OpenAggregate,
+    QueueProcessor,
+    RecipientDirectory,
+    coalesce,
+    format_stats,
+    iso_timestamp,
+    read_new_events,
+)
+
+
+class UnlimitedBucket:
+    def acquire(self):
+        pass
+
+
+class RateLimited(Exception):
+    code = "rate_limited"
+
+
+class FakeNotion:
+    """Email Analytics database with the notion_client call surface"""
+
+    def __init__(self, fail_emails=(), rate_limit_first=0):
+        self.rows = {}
+        self.calls = []
+        self.fail_emails = set(fail_emails)
+        self.rate_limit_first = rate_limit_first
+        self.lock = threading.Lock()
+        self.databases = self
+        self.pages = self
+
+    def _record(self, name, properties=None):
+        with self.lock:
+            self.calls.append(name)
+            if self.rate_limit_first:
+                self.rate_limit_first -= 1
+                raise RateLimited("slow down")
+        if properties and "Email" in properties:
+            email = properties["Email"]["title"][0]["text"]["content"]
+            if email in self.fail_emails:
+                raise RuntimeError("validation_error")
+
+    def query(self, database_id, filter, page_size):
+        self._record("query")
+        email = filter["and"][0]["title"]["equals"]
+        campaign = filter["and"][1]["rich_text"]["equals"]
+        results = [
+            {"id": page_id, "properties": {"Open Count": {"number": row["Open Count"]["number"]}}}
+            for page_id, row in self.rows.items()
+            if row["Email"]["title"][0]["text"]["content"] == email
+            and row["Campaign ID"]["rich_text"][0]["text"]["content"] == campaign
+        ]
+        return {"results": results[:page_size]}
+
+    def create(self, parent, properties):
+        self._record("create", properties)
+        page_id = f"page-{len(self.rows)}"
+        self.rows[page_id] = dict(properties)
+        return {"id": page_id}
+
+    def update(self, page_id, properties):
+        self._record("update")
+        self.rows[page_id].update(properties)
+        return {"id": page_id}
+
+    def row(self, email, campaign):
+        for row in self.rows.values():
+            if (
+                row["Email"]["title"][0]["text"]["content"] == email
+                and row["Campaign ID"]["rich_text"][0]["text"]["content"] == campaign
+            ):
+                return row
+
+
+def open_event(email, campaign, ts, country="GB"):
+    return {"ts": ts, "event": "open", "email": email, "campaign": campaign, "country": country}
+
+
+def write_opens(path, events):
+    with open(path, "a") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+
+@pytest.fixture
+def notion():
+    return FakeNotion()
+
+
+@pytest.fixture
+def make_processor(tmp_path):
+    def make(client, **kwargs):
+        upserter = NotionUpserter(client, "analytics-db", limiter=UnlimitedBucket())
+        return QueueProcessor(
+            upserter, tmp_path / "opens.jsonl", tmp_path / "state.json", **kwargs
+        )
+
+    return make
+
+
+class TestCoalesce:
+    """Test merging opens per (email, campaign)"""
+
+    def test_counts_and_timestamp_range(self):
+        aggregates = coalesce(
+            [
+                open_event("a@example.com", "news", 30, country="FR"),
+                open_event("a@example.com", "news", 10),
+                open_event("a@example.com", "encourage", 20),
+                {"ts": 40, "event": "run_started"},
+            ]
+        )
+
+        news = aggregates["a@example.com|news"]
+        assert len(aggregates) == 2
+        assert (news.count, news.first_ts, news.last_ts) == (2, 10, 30)
+        assert news.country == "FR"
+
+    def test_round_trips_through_state(self):
+        aggregate = OpenAggregate("a@example.com", "news", 3, 1.5, 9.25, "GB", "ENG")
+
+        assert OpenAggregate.from_dict(aggregate.to_dict()).to_dict() == aggregate.to_dict()
+
+    def test_iso_timestamp_matches_javascript(self):
+        assert iso_timestamp(1752850496.5) == "2025-07-18T14:54:56.500Z"
+
+
+class TestReadNewEvents:
+    """Test reading the opens file incrementally"""
+
+    def test_skips_partial_last_line(self, tmp_path):
+        path = tmp_path / "opens.jsonl"
+        write_opens(path, [open_event("a@example.com", "news", 1)])
+        with open(path, "a") as f:
+            f.write('{"ts": 2, "event": "op')
+
+        events, offset = read_new_events(path, 0)
+        assert len(events) == 1
+        with open(path, "a") as f:
+            f.write('en", "email": "b@example.com", "campaign": "news"}\n')
+        events, _ = read_new_events(path, offset)
+        assert [e["email"] for e in events] == ["b@example.com"]
+
+    def test_truncated_file_starts_over(self, tmp_path):
+        path = tmp_path / "opens.jsonl"
+        write_opens(path, [open_event("a@example.com", "news", 1)])
+
+        events, offset = read_new_events(path, 10_000)
+
+        assert len(events) == 1
+        assert offset == path.stat().st_size
+
+
+class TestQueueProcessor:
+    """Test draining opens into Notion upserts"""
+
+    def test_one_call_per_recipient_per_pass(self, tmp_path, notion, make_processor):
+        write_opens(
+            tmp_path / "opens.jsonl",
+            [open_event(f"user{i % 10}@example.com", "news", 1000 + i) for i in range(50)],
+        )
+        processor = make_processor(notion)
+
+        stats = processor.process_once()
+
+        assert stats == {
+            "events": 50, "groups": 10, "created": 10, "updated": 0, "failed": 0,
+            "unresolved": 0, "expired": 0,
+        }
+        row = notion.row("user3@example.com", "news")
+        assert row["Open Count"] == {"number": 5}
+        assert row["First Opened"]["date"]["start"] == iso_timestamp(1003)
+        assert row["Last Opened"]["date"]["start"] == iso_timestamp(1043)
+
+        # Cached rows are updated without another query
+        notion.calls.clear()
+        write_opens(tmp_path / "opens.jsonl", [open_event("user3@example.com", "news", 2000)] * 3)
+        assert processor.process_once()["updated"] == 1
+        assert notion.calls == ["update"]
+        assert notion.row("user3@example.com", "news")["Open Count"] == {"number": 8}
+
+    def test_existing_row_is_incremented(self, tmp_path, notion, make_processor):
+        notion.create(
+            {"database_id": "analytics-db"},
+            {
+                "Email": {"title": [{"text": {"content": "a@example.com"}}]},
+                "Campaign ID": {"rich_text": [{"text": {"content": "news"}}]},
+                "Open Count": {"number": 4},
+            },
+        )
+        write_opens(tmp_path / "opens.jsonl", [open_event("a@example.com", "news", 5)] * 2)
+
+        assert make_processor(notion).process_once()["updated"] == 1
+        assert notion.row("a@example.com", "news")["Open Count"] == {"number": 6}
+
+    def test_state_survives_restart(self, tmp_path, notion, make_processor):
+        write_opens(tmp_path / "opens.jsonl", [open_event("a@example.com", "news", 5)])
+        make_processor(notion).process_once()
+
+        restarted = make_processor(notion)
+
+        assert restarted.process_once()["events"] == 0
+        assert restarted.upserter.pages["a@example.com|news"]["count"] == 1
+
+    def test_signed_open_waits_for_its_ledger(self, tmp_path, notion, make_processor):
+        ledger = tmp_path / "sent-news-emails.json"
+        ledger.write_text(json.dumps([]))
+        signed = {"ts": time.time(), "event": "open", "recipient": recipient_hash("late@example.com"), "campaign": "news"}
+        write_opens(tmp_path / "opens.jsonl", [signed])
+        processor = make_processor(notion, recipients=RecipientDirectory([ledger]))
+
+        stats = processor.process_once()
+        assert (stats["groups"], stats["unresolved"]) == (0, 1)
+        assert "1 signed opens waiting for a sent ledger entry" in format_stats(stats)
+        # Held in the state file, so a restart keeps it too
+        processor = make_processor(notion, recipients=RecipientDirectory([ledger]))
+        assert processor.unresolved == [signed]
+
+        ledger.write_text(json.dumps(["late@example.com"]))
+        stats = processor.process_once()
+        assert (stats["created"], stats["unresolved"]) == (1, 0)
+        assert "signed opens" not in format_stats(stats)
+        assert notion.row("late@example.com", "news")["Open Count"] == {"number": 1}
+        assert processor.unresolved == []
+
+    def test_unresolved_opens_expire(self, tmp_path, notion, make_processor):
+        signed = {"ts": 5, "event": "open", "recipient": recipient_hash("a@example.com"), "campaign": "news"}
+        write_opens(tmp_path / "opens.jsonl", [signed])
+        processor = make_processor(notion, recipients=RecipientDirectory([]))
+
+        stats = processor.process_once()
+
+        assert (stats["unresolved"], stats["expired"]) == (0, 1)
+        assert processor.unresolved == []
+
+    def test_failed_groups_retried_next_pass(self, tmp_path, make_processor, capsys):
+        notion = FakeNotion(fail_emails={"bad@example.com"})
+        write_opens(
+            tmp_path / "opens.jsonl",
+            [open_event("bad@example.com", "news", 1), open_event("ok@example.com", "news", 1)],
+        )
+        processor = make_processor(notion, workers=2)
+
+        assert processor.process_once()["failed"] == 1
+        assert "bad@example.com|news" in capsys.readouterr().out
+
+        notion.fail_emails.clear()
+        write_opens(tmp_path / "opens.jsonl", [open_event("bad@example.com", "news", 2)])
+        stats = make_processor(notion).process_once()
+        assert (stats["events"], stats["created"]) == (1, 1)
+        assert notion.row("bad@example.com", "news")["Open Count"] == {"number": 2}
+
+    def test_rate_limited_calls_are_retried(self, tmp_path, make_processor, mocker):
+        mocker.patch("tracking.processor.time.sleep")
+        notion = FakeNotion(rate_limit_first=2)
+        write_opens(tmp_path / "opens.jsonl", [open_event("a@example.com", "news", 1)])
+
+        assert make_processor(notion).process_once()["created"] == 1
+        assert notion.calls == ["query", "query", "query", "create"]
@@ -0,0 +1,223 @@
+"""
+Tests for the streaming tracking statistics report
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import view_tracking_stats
+from tracking.store import TrackingStore
+from view_tracking_stats import (
+    StoredStats,
+    TrackingStats,
+    page_to_row,
+    parse_timestamp,
+    sync_store,
+)
+
+NOW = datetime(2025, 7, 20, 12, 0)
+
+
+def row(email, campaign, opens, last_opened=None, country="GB"):
+    return {
+        "email": email,
+        "campaign": campaign,
+        "open_count": opens,
+        "first_opened": last_opened,
+        "last_opened": last_opened,
+        "country": country,
+    }
+
+
+def hours_ago(hours):
+    return (NOW - timedelta(hours=hours)).isoformat() + "Z"
+
+
+class TestTrackingStats:
+    """Test the single-pass rollups"""
+
+    ROWS = [
+        row("a@example.com", "news", 3, hours_ago(1)),
+        row("b@example.com", "news", 1, hours_ago(30), country="FR"),
+        row("a@example.com", "encourage", 5, hours_ago(24 * 10)),
+        row("c@example.com", "", 3, hours_ago(2)),
+        row("d@example.com", "news", 3, None, country="FR"),
+    ]
+
+    def test_rollups(self):
+        stats = TrackingStats(now=NOW).consume(self.ROWS)
+
+        assert (stats.rows, stats.total_opens, len(stats.emails)) == (5, 15, 4)
+        assert stats.campaigns["news"]["opens"] == 7
+        assert len(stats.campaigns["news"]["recipients"]) == 3
+        assert "Unknown" in stats.campaigns
+        assert stats.countries.most_common() == [("GB", 3), ("FR", 2)]
+        assert stats.recent_count == 3
+
+    def test_bounded_heaps_keep_stable_order(self):
+        stats = TrackingStats(now=NOW, top_n=3, recent_n=2).consume(self.ROWS)
+
+        # Ties on open count keep the first rows seen, like a stable sort
+        assert [r["email"] for r in stats.top_recipients()] == [
+            "a@example.com",
+            "a@example.com",
+            "c@example.com",
+        ]
+        assert [r["email"] for _, r in stats.recent_opens()] == ["a@example.com", "c@example.com"]
+        assert len(stats._top) == 3 and len(stats._recent) == 2
+
+    def test_report_sections(self, capsys):
+        TrackingStats(now=NOW).consume(self.ROWS).print_report()
+
+        out = capsys.readouterr().out
+        assert "✅ Found 5 tracked email opens" in out
+        assert "Average opens per recipient: 3.8" in out
+        assert "FR: 2 (40.0%)" in out
+        assert "Recent opens: 3" in out
+        assert "  - a@example.com (news) - 2025-07-20 11:00" in out
+        assert "1. a@example.com - 5 opens (encourage)" in out
+
+    def test_empty_stream(self, capsys):
+        TrackingStats().consume(iter(())).print_report()
+
+        assert "📭 No tracking data found" in capsys.readouterr().out
+
+    def test_parse_timestamp(self):
+        assert parse_timestamp("2025-07-18T16:08:00.000+00:00") == datetime(2025, 7, 18, 16, 8)
+        assert parse_timestamp("2025-07-18T16:08:00.000Z") == datetime(2025, 7, 18, 16, 8)
+        assert parse_timestamp(None) is None
+        assert parse_timestamp("yesterday") is None
+
+
+class TestStreaming:
+    """Test fetching, aggregating and exporting as pages arrive"""
+
+    @staticmethod
+    def page(email, opens):
+        return {
+            "properties": {
+                "Email": {"title": [{"text": {"content": email}}]},
+                "Campaign ID": {"rich_text": [{"text": {"content": "news"}}]},
+                "Open Count": {"number": opens},
+                "First Opened": {"date": None},
+                "Last Opened": {"date": {"start": "2025-07-18T16:08:00.000Z"}},
+                "Country": {"rich_text": []},
+            }
+        }
+
+    def test_page_to_row_defaults(self):
+        data = page_to_row(self.page("a@example.com", None))
+
+        assert data["open_count"] == 0
+        assert data["first_opened"] is None
+        assert data["country"] == "Unknown"
+
+    def test_rows_stream_page_by_page(self, mocker, monkeypatch):
+        monkeypatch.setenv("NOTION_TOKEN", "token")
+        monkeypatch.setenv("NOTION_EMAIL_ANALYTICS_DB_ID", "db")
+        responses = [
+            {"results": [self.page("a@example.com", 1), self.page("", 1)], "has_more": True, "next_cursor": "2"},
+            {"results": [self.page("b@example.com", 2)], "has_more": False},
+        ]
+        client = mocker.Mock()
+        client.databases.query.side_effect = responses
+        mocker.patch.object(view_tracking_stats, "NotionClient", return_value=client)
+
+        rows = view_tracking_stats.stream_tracking_data()
+        assert next(rows)["email"] == "a@example.com"
+        # The second page has not been requested yet
+        assert client.databases.query.call_count == 1
+        assert [r["email"] for r in rows] == ["b@example.com"]
+
+    def test_export_csv(self, tmp_path, capsys):
+        rows = [row("a@example.com", "news", 1), row("b@example.com", "news", 2)]
+
+        view_tracking_stats.export_csv(iter(rows), tmp_path / "export.csv")
+
+        lines = (tmp_path / "export.csv").read_text().splitlines()
+        assert lines[0] == "email,campaign,open_count,first_opened,last_opened,country"
+        assert len(lines) == 3
+        assert "2 rows exported" in capsys.readouterr().out
+
+
+def records(rows, edited="2025-07-20T00:00:00.000Z"):
+    return [(f"page-{i}", edited, r) for i, r in enumerate(rows)]
+
+
+class TestTrackingStore:
+    """Test the local SQLite store and the report served from it"""
+
+    ROWS = TestTrackingStats.ROWS
+
+    def test_stored_report_matches_streamed_report(self, tmp_path, capsys):
+        with TrackingStore(tmp_path / "stats.sqlite3") as store:
+            store.upsert(records(self.ROWS))
+            StoredStats(store, now=NOW).print_report()
+        stored = capsys.readouterr().out
+        TrackingStats(now=NOW).consume(self.ROWS).print_report()
+        streamed = capsys.readouterr().out
+
+        assert stored.startswith(streamed)
+        assert "📅 Daily Activity" in stored[len(streamed):]
+
+    def test_rollups_follow_updates(self):
+        with TrackingStore(":memory:") as store:
+            store.upsert(records(self.ROWS))
+            moved = dict(self.ROWS[0], campaign="encourage", open_count=10)
+            store.upsert([("page-0", "2025-07-21T00:00:00.000Z", moved)])
+
+            assert store.campaigns() == [("Unknown", 1, 3), ("encourage", 1, 15), ("news", 2, 4)]
+            assert store.totals() == (5, 22, 4)
+            assert store.last_edited == "2025-07-21T00:00:00.000Z"
+            # Updated rows keep their place in storage order
+            assert next(store.rows())["open_count"] == 10
+
+    def test_daily_rollup(self):
+        with TrackingStore(":memory:") as store:
+            store.upsert(records(self.ROWS))
+
+            assert store.daily(2) == [("2025-07-20", 2, 2), ("2025-07-19", 1, 1)]
+
+    def test_sync_fetches_only_edited_pages(self, tmp_path, mocker, monkeypatch):
+        monkeypatch.setenv("NOTION_TOKEN", "token")
+        monkeypatch.setenv("NOTION_EMAIL_ANALYTICS_DB_ID", "db")
+        page = TestStreaming.page("a@example.com", 2)
+        client = mocker.Mock()
+        client.databases.query.return_value = {
+            "results": [dict(page, id="page-a", last_edited_time="2025-07-20T10:00:00.000Z")],
+            "has_more": False,
+        }
+        mocker.patch.object(view_tracking_stats, "NotionClient", return_value=client)
+
+        with TrackingStore(tmp_path / "stats.sqlite3") as store:
+            assert sync_store(store) == 1
+            assert "filter" not in client.databases.query.call_args.kwargs
+            assert sync_store(store) == 1
+            query = client.databases.query.call_args.kwargs
+            assert query["filter"]["last_edited_time"] == {"on_or_after": "2025-07-20T10:00:00.000Z"}
+            assert store.totals() == (1, 2, 1)
+
+    def test_failed_sync_is_not_recorded_as_complete(self, tmp_path, mocker, monkeypatch):
+        monkeypatch.setenv("NOTION_TOKEN", "token")
+        monkeypatch.setenv("NOTION_EMAIL_ANALYTICS_DB_ID", "db")
+        page = TestStreaming.page("a@example.com", 2)
+        client = mocker.Mock()
+        client.databases.query.side_effect = [
+            {
+                "results": [dict(page, id="page-a", last_edited_time="2025-07-20T10:00:00.000Z")],
+                "has_more": True,
+                "next_cursor": "2",
+            },
+            RuntimeError("rate limited"),
+        ]
+        mocker.patch.object(view_tracking_stats, "NotionClient", return_value=client)
+
+        with TrackingStore(tmp_path / "stats.sqlite3") as store:
+            with pytest.raises(RuntimeError):
+                sync_store(store)
+            assert store.synced_at is None
@@ -0,0 +1,29 @@
+"""
+Email open tracking: pixel ingestion and the local opens store
+
+The campaigns embed a tracking pixel (campaign/tracking.py). ``server``
+serves it and queues every open to a local JSON-lines store without
+waiting on Notion; ``processor`` drains the store into Notion, one upsert
+per (email, campaign) per window. ``clicks`` rewrites share links into
+redirects and serves them alongside the pixel, logging clicks to the same
+store.
+"""
+
+from .bots import BotClassifier, is_bot
+from .clicks import ClickApp, LinkTable
+from .processor import QueueProcessor, coalesce
+from .server import OPENS_FILE, PIXEL_GIF, PixelApp, create_app, decode_open
+
+__all__ = [
+    "BotClassifier",
+    "ClickApp",
+    "LinkTable",
+    "OPENS_FILE",
+    "PIXEL_GIF",
+    "PixelApp",
+    "QueueProcessor",
+    "coalesce",
+    "create_app",
+    "decode_open",
+    "is_bot",
+]
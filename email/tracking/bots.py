@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Bot user-agent classifier for tracked opens
+
+api/track-email.js checks every user agent against its bot list with a
+linear ``includes`` scan; the Python tracking path did the same with
+``any(bot in ua for bot in BOT_USER_AGENTS)``, lowercasing the string and
+scanning it once per pattern. ``BotClassifier`` compiles the whole list
+into one alternation, so a lowercased user agent is scanned once,
+and remembers verdicts in an LRU cache: mail clients and proxies send the
+same few hundred user agent strings over and over, so after warm-up nearly
+every pixel hit is a dict lookup.
+
+The default classifier (``is_bot``) is used by the pixel server to drop bot
+hits and by the queue processor to drop bot opens already in the spool, so
+the analytics database the stats report reads holds no bot opens.
+
+``python -m tracking.bots [FILE]`` benchmarks the linear scan, the compiled
+pattern and the cached classifier over a corpus of user agents (one per
+line, or the ``user_agent`` fields of a JSON-lines opens file; default
+scripts/tracking-opens.jsonl).
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+# Bot user agents to ignore (same list as api/track-email.js)
+BOT_USER_AGENTS = (
+    "googlebot", "bingbot", "slurp", "duckduckbot", "baiduspider",
+    "yandexbot", "facebookexternalhit", "twitterbot", "linkedinbot",
+    "whatsapp", "applebot", "semrushbot", "dataprovider", "ahrefs",
+)
+CACHE_SIZE = 4096
+
+
+def compile_patterns(patterns):
+    """One regex matching any of the (lowercased) substrings
+
+    Match it against lowercased text: ``re.IGNORECASE`` makes an alternation
+    of literals several times slower than lowercasing the subject first.
+    """
+    # Longest first, so a pattern that is a prefix of another never hides it
+    alternatives = sorted({re.escape(p.lower()) for p in patterns}, key=len, reverse=True)
+    return re.compile("|".join(alternatives))
+
+
+class BotClassifier:
+    """Substring bot matcher compiled to a single regex, with an LRU verdict cache
+
+    Args:
+        patterns: Case-insensitive substrings that mark a bot
+        cache_size: User agent strings whose verdicts are remembered
+    """
+
+    def __init__(self, patterns=BOT_USER_AGENTS, cache_size=CACHE_SIZE):
+        self.patterns = tuple(patterns)
+        self._search = compile_patterns(self.patterns).search
+        self.classify = lru_cache(maxsize=cache_size)(self._classify) if cache_size else self._classify
+
+    def _classify(self, user_agent):
+        return self._search(user_agent.lower()) is not None
+
+    def __call__(self, user_agent):
+        if not user_agent:
+            return False
+        return self.classify(user_agent)
+
+    def match(self, user_agent):
+        """The bot pattern found in a user agent (None for a browser)"""
+        found = self._search((user_agent or "").lower())
+        return found.group(0) if found else None
+
+    def cache_info(self):
+        """Cache hits/misses (None without a cache)"""
+        info = getattr(self.classify, "cache_info", None)
+        return info() if info else None
+
+
+is_bot = BotClassifier()
+
+
+def is_bot_linear(user_agent, patterns=BOT_USER_AGENTS):
+    """The original scan, kept as the benchmark baseline"""
+    if not user_agent:
+        return False
+    user_agent = user_agent.lower()
+    return any(bot in user_agent for bot in patterns)
+
+
+# -- benchmark ------------------------------------------------------------
+
+
+def load_corpus(path):
+    """User agents from a text file (one per line) or a JSON-lines opens file"""
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    line = json.loads(line).get("user_agent") or ""
+                except json.JSONDecodeError:
+                    continue
+            if line:
+                corpus.append(line)
+    return corpus
+
+
+def benchmark(corpus, repeat=20):
+    """
+    Time each classifier over ``repeat`` passes of the corpus
+
+    Returns:
+        ``{name: nanoseconds per classification}`` for linear, compiled and
+        cached (the cached figure includes warm-up, as in a real server)
+    """
+    uncached = BotClassifier(cache_size=0)
+    cached = BotClassifier()
+    contenders = {
+        "linear": is_bot_linear,
+        "compiled": uncached,
+        "cached": cached,
+    }
+    verdicts = {name: [check(ua) for ua in corpus] for name, check in contenders.items()}
+    if len({tuple(v) for v in verdicts.values()}) != 1:
+        raise AssertionError("classifiers disagree on the corpus")
+    cached.classify.cache_clear()  # measure from a cold cache
+
+    results = {}
+    total = len(corpus) * repeat
+    for name, check in contenders.items():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for user_agent in corpus:
+                check(user_agent)
+        results[name] = (time.perf_counter() - started) * 1e9 / total if total else 0.0
+    return results
+
+
+def main(argv=None):
+    from .server import OPENS_FILE
+
+    parser = argparse.ArgumentParser(description="Benchmark the bot user-agent classifier")
+    parser.add_argument("corpus", nargs="?", help="User agents file (default: scripts/tracking-opens.jsonl)")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the corpus (default: 20)")
+    args = parser.parse_args(argv)
+
+    path = Path(args.corpus) if args.corpus else OPENS_FILE
+    if not path.exists():
+        print(f"❌ {path} not found")
+        return 1
+    corpus = load_corpus(path)
+    if not corpus:
+        print(f"❌ No user agents in {path}")
+        return 1
+
+    bots = sum(map(is_bot, corpus))
+    print(f"🤖 {len(corpus)} user agents ({len(set(corpus))} distinct, {bots} bots), {args.repeat} passes")
+    results = benchmark(corpus, args.repeat)
+    baseline = results["linear"]
+    for name, nanoseconds in results.items():
+        print(f"   {name:<9} {nanoseconds:8.0f} ns/UA  ({baseline / nanoseconds:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
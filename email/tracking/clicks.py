@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Click tracking for share and referral links
+
+The encourage email is mostly share buttons (WhatsApp, X, email, ...) built
+from the recipient's referral code, and until now only opens were tracked.
+At render time ``LinkTable`` swaps each share link for a short redirect
+(``<site>/r/<token>``, an 11-character token) and appends the token and its
+target to ``scripts/tracking-links.jsonl``. The links of one email are
+written together and flushed before it goes out.
+
+``ClickApp`` is the pixel server plus the redirects: it holds the whole
+token -> link table in memory (loaded once, and re-read only when a token is
+missing, i.e. for links rendered after it started), answers ``/r/<token>``
+with a 302 straight away and queues a ``click`` event on the same event log
+as the opens (``scripts/tracking-opens.jsonl``), which the background writer
+appends in batches. No database is touched per click; bots and link
+previewers are redirected but not recorded. The queue processor only reads
+``open`` events, so clicks stay local.
+
+``click_through`` joins the clicks with the link table: per campaign and
+platform, how many recipients were sent the link, how many clicked and the
+click-through rate.
+
+    python -m tracking.clicks serve --port 8080     # pixel + redirects
+    python -m tracking.clicks report                # click-through per platform
+"""
+
+import argparse
+import base64
+import hashlib
+import html
+import json
+import re
+import sys
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+from campaign.events import EventLog, read_events
+from campaign.tracking import DEFAULT_SITE_URL, TrackingTokens
+
+from .bots import is_bot
+from .processor import read_new_events
+from .server import OPENS_FILE, PixelApp, serve
+
+LINKS_FILE = OPENS_FILE.with_name("tracking-links.jsonl")
+REDIRECT_PREFIX = "/r/"
+TOKEN_BYTES = 8
+
+# URL prefix -> platform, for links found in rendered emails
+SHARE_PLATFORMS = (
+    ("https://wa.me/", "whatsapp"),
+    ("https://api.whatsapp.com/", "whatsapp"),
+    ("https://twitter.com/intent/", "twitter"),
+    ("https://x.com/intent/", "twitter"),
+    ("https://www.facebook.com/sharer/", "facebook"),
+    ("https://www.linkedin.com/sharing/", "linkedin"),
+    ("mailto:", "email"),
+    ("sms:", "sms"),
+)
+HREF_RE = re.compile(r'href="([^"]+)"')
+
+REDIRECT_HEADERS = [
+    # Every click must reach the redirector to be counted
+    ("Cache-Control", "no-cache, no-store, must-revalidate"),
+    ("Content-Length", "0"),
+]
+
+
+def share_platform(url):
+    """Share platform a link points at (None for any other link)"""
+    for prefix, platform in SHARE_PLATFORMS:
+        if url.startswith(prefix):
+            return platform
+    return None
+
+
+def link_token(url, campaign, platform=None, recipient=None):
+    """
+    Token of a link: the same link for the same recipient always gets the
+    same token, so re-rendering (a resumed run) adds nothing to the table
+    """
+    key = "\0".join((campaign, platform or "", recipient or "", url)).encode("utf-8")
+    digest = hashlib.blake2b(key, digest_size=TOKEN_BYTES).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+class LinkTable:
+    """Token -> (url, campaign, platform, recipient), backed by a JSON-lines file
+
+    Args:
+        path: Links file (appended to when links are tracked)
+        site_url: Where the redirector is served
+    """
+
+    def __init__(self, path=LINKS_FILE, site_url=DEFAULT_SITE_URL):
+        self.path = Path(path)
+        self.site_url = site_url.rstrip("/")
+        self.links = {}
+        self._offset = 0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def __len__(self):
+        return len(self.links)
+
+    def reload(self):
+        """Read links appended to the file since the last load"""
+        with self._lock:
+            entries, self._offset = read_new_events(self.path, self._offset)
+            for entry in entries:
+                if entry.get("token") and entry.get("url"):
+                    self.links[entry["token"]] = (
+                        entry["url"],
+                        entry.get("campaign"),
+                        entry.get("platform"),
+                        entry.get("recipient"),
+                    )
+            return len(entries)
+
+    def get(self, token):
+        """The link for a token, re-reading the file once if it is unknown"""
+        link = self.links.get(token)
+        if link is None and self.reload():
+            link = self.links.get(token)
+        return link
+
+    def redirect_url(self, token):
+        return f"{self.site_url}{REDIRECT_PREFIX}{token}"
+
+    def track(self, links, campaign, recipient=None):
+        """
+        Tracked versions of some links
+
+        Args:
+            links: ``(url, platform)`` pairs
+            campaign: Campaign ID
+            recipient: Recipient hash (campaign.events.recipient_hash)
+
+        Returns:
+            Redirect URLs, in order. New links are written to the file in one
+            append before this returns.
+        """
+        tokens = []
+        new = []
+        with self._lock:
+            for url, platform in links:
+                token = link_token(url, campaign, platform, recipient)
+                if token not in self.links:
+                    self.links[token] = (url, campaign, platform, recipient)
+                    new.append(
+                        json.dumps(
+                            {
+                                "token": token,
+                                "url": url,
+                                "campaign": campaign,
+                                "platform": platform,
+                                "recipient": recipient,
+                            }
+                        )
+                        + "\n"
+                    )
+                tokens.append(token)
+            if new:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(new)
+        return [self.redirect_url(token) for token in tokens]
+
+    def track_urls(self, urls, campaign, recipient=None, skip=()):
+        """``{platform: url}`` with each URL (except ``skip``) made tracked"""
+        platforms = [platform for platform in urls if platform not in skip]
+        tracked = self.track([(urls[p], p) for p in platforms], campaign, recipient)
+        return {**urls, **dict(zip(platforms, tracked))}
+
+    def track_html(self, content, campaign, recipient=None):
+        """Rendered email with every share-button href made tracked"""
+        found = {}
+        for match in HREF_RE.finditer(content):
+            url = html.unescape(match.group(1))
+            platform = share_platform(url)
+            if platform is not None:
+                found.setdefault(match.group(1), (url, platform))
+        if not found:
+            return content
+        tracked = dict(zip(found, self.track(found.values(), campaign, recipient)))
+        return HREF_RE.sub(lambda m: f'href="{tracked.get(m.group(1), m.group(1))}"', content)
+
+
+class ClickApp(PixelApp):
+    """Pixel endpoint that also serves the click redirects
+
+    Args:
+        store: Event store shared with the opens (an EventLog)
+        links: LinkTable
+        prefix: Path prefix of the redirects
+    """
+
+    def __init__(self, store, links, prefix=REDIRECT_PREFIX, **kwargs):
+        super().__init__(store, **kwargs)
+        self.links = links
+        self.prefix = prefix
+
+    def click(self, token, user_agent="", country=None, region=None, record=True):
+        """(status, headers, body) for a redirect, queueing the click"""
+        link = self.links.get(token)
+        if link is None:
+            self.count("unknown_link")
+            return 404, [("Content-Length", "0")], b""
+        url, campaign, platform, recipient = link
+        if record and is_bot(user_agent):
+            self.count("bot_click")
+        elif record:
+            self.store.record(
+                "click",
+                campaign=campaign,
+                platform=platform,
+                recipient=recipient,
+                user_agent=user_agent,
+                country=country or "Unknown",
+                region=region or "Unknown",
+            )
+            self.count("clicks")
+        return 302, [("Location", url)] + REDIRECT_HEADERS, b""
+
+    def respond(self, method, path, query_string, user_agent="", country=None, region=None):
+        if path.startswith(self.prefix) and method in ("GET", "HEAD"):
+            token = path[len(self.prefix):]
+            return self.click(token, user_agent, country, region, record=method == "GET")
+        return super().respond(method, path, query_string, user_agent, country, region)
+
+
+def create_app(store_path=None, links_path=None):
+    """ClickApp recording to the opens file (default scripts/tracking-opens.jsonl)"""
+    return ClickApp(
+        EventLog(store_path or OPENS_FILE),
+        LinkTable(links_path or LINKS_FILE),
+        tokens=TrackingTokens.load(),
+    )
+
+
+def create_asgi_app(store_path=None, links_path=None):
+    return create_app(store_path, links_path).asgi
+
+
+def click_through(links, events):
+    """
+    Click-through per campaign and platform
+
+    Args:
+        links: LinkTable (who was sent which link)
+        events: Events from the opens file (only clicks are counted)
+
+    Returns:
+        Rows of campaign, platform, sent (recipients given the link),
+        clicks, clickers (distinct recipients) and rate (clickers / sent),
+        ordered by campaign and clickers
+    """
+    sent = defaultdict(set)
+    for _, campaign, platform, recipient in links.links.values():
+        sent[(campaign, platform)].add(recipient)
+    clicks = defaultdict(int)
+    clickers = defaultdict(set)
+    for event in events:
+        if event.get("event") != "click":
+            continue
+        key = (event.get("campaign"), event.get("platform"))
+        clicks[key] += 1
+        clickers[key].add(event.get("recipient"))
+
+    rows = []
+    for key in sent.keys() | clicks.keys():
+        campaign, platform = key
+        recipients = len(sent.get(key, ()))
+        unique = len(clickers.get(key, ()))
+        rows.append(
+            {
+                "campaign": campaign,
+                "platform": platform,
+                "sent": recipients,
+                "clicks": clicks.get(key, 0),
+                "clickers": unique,
+                "rate": round(unique / recipients, 4) if recipients else 0.0,
+            }
+        )
+    rows.sort(key=lambda row: (row["campaign"] or "", -row["clickers"], row["platform"] or ""))
+    return rows
+
+
+def format_click_through(rows):
+    if not rows:
+        return "📭 No tracked links"
+    lines = []
+    campaign = object()
+    for row in rows:
+        if row["campaign"] != campaign:
+            campaign = row["campaign"]
+            lines.append(f"🔗 {campaign}")
+        lines.append(
+            f"  {row['platform'] or 'other':<10} {row['clickers']:>6} of {row['sent']:<6} "
+            f"({row['rate'] * 100:.1f}%)  {row['clicks']} clicks"
+        )
+    return "\n".join(lines)
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Share-link click tracking")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Serve the tracking pixel and link redirects")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+
+    report_parser = commands.add_parser("report", help="Click-through per campaign and platform")
+    report_parser.add_argument("--json", action="store_true", help="Print the rows as JSON")
+
+    for sub in (serve_parser, report_parser):
+        sub.add_argument("--links", type=str, help="Links file (default: scripts/tracking-links.jsonl)")
+        sub.add_argument("--store", type=str, help="Opens file (default: scripts/tracking-opens.jsonl)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    store_path = Path(args.store) if args.store else OPENS_FILE
+
+    if args.command == "report":
+        links = LinkTable(args.links or LINKS_FILE)
+        events = read_events(store_path) if store_path.exists() else ()
+        rows = click_through(links, events)
+        print(json.dumps(rows, indent=2) if args.json else format_click_through(rows))
+        return 0
+
+    app = create_app(store_path, args.links)
+    print(f"📡 Tracking pixel and redirects at http://{args.host}:{args.port}")
+    print(f"🔗 {len(app.links)} links loaded from {app.links.path}")
+    try:
+        serve(app, args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.close()
+        stats = app.stats
+        print(
+            f"\n📊 {stats['clicks']} clicks, {stats['bot_click']} bot clicks, "
+            f"{stats['unknown_link']} unknown links, {stats['queued']} opens"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Streaming exports of tracking rows
+
+``view_tracking_stats.py --export`` writes rows one at a time as they come
+off the Notion stream or the local store, so memory stays constant however
+large the table is. Formats:
+
+  csv        the original export (email, campaign, open_count, ...)
+  csv.gz     the same, gzip-compressed
+  jsonl      one JSON object per row
+  jsonl.gz   the same, gzip-compressed
+
+Rows go to ``<file>.tmp`` next to the target, which is renamed into place
+only when the export completes, so a cron job (or whatever picks the file
+up) never sees a partial export. An export that is interrupted or writes no
+rows leaves nothing behind.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+FIELDNAMES = ["email", "campaign", "open_count", "first_opened", "last_opened", "country"]
+FORMATS = ("csv", "csv.gz", "jsonl", "jsonl.gz")
+
+
+def export_filename(fmt="csv", delta=False, now=None):
+    """Default name: email_tracking_export[_delta]_<timestamp>.<format>"""
+    stamp = (now or datetime.now()).strftime("%Y%m%d_%H%M%S")
+    kind = "email_tracking_delta" if delta else "email_tracking_export"
+    return f"{kind}_{stamp}.{fmt}"
+
+
+class Exporter:
+    """Atomic, streaming writer of tracking rows
+
+    Args:
+        path: Target file
+        fmt: One of FORMATS (default: taken from the path's extension, else csv)
+    """
+
+    def __init__(self, path, fmt=None):
+        self.path = Path(path)
+        self.format = fmt or self._format_from_path(self.path)
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown export format {self.format!r} (use {', '.join(FORMATS)})")
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.rows = 0
+        self._raw = None
+        self._file = None
+        self._writer = None
+
+    @staticmethod
+    def _format_from_path(path):
+        for fmt in sorted(FORMATS, key=len, reverse=True):
+            if path.name.endswith("." + fmt):
+                return fmt
+        return "csv"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._raw = open(self.tmp_path, "wb")
+        stream = self._raw
+        if self.format.endswith(".gz"):
+            # mtime=0 keeps the output byte-identical for identical rows
+            stream = gzip.GzipFile(fileobj=stream, mode="wb", mtime=0)
+        self._file = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        if self.format.startswith("csv"):
+            self._writer = csv.DictWriter(self._file, fieldnames=FIELDNAMES, extrasaction="ignore")
+            self._writer.writeheader()
+
+    def write(self, row):
+        if self._file is None:
+            # Only create the file once there is something to export
+            self._open()
+        if self._writer is not None:
+            self._writer.writerow(row)
+        else:
+            self._file.write(json.dumps({field: row.get(field) for field in FIELDNAMES}) + "\n")
+        self.rows += 1
+
+    def write_all(self, rows):
+        for row in rows:
+            self.write(row)
+        return self
+
+    def close(self):
+        """Finish the file and move it into place (nothing happens without rows)"""
+        if self._file is None:
+            return None
+        self._file.flush()
+        stream = self._file.detach()
+        if stream is not self._raw:
+            stream.close()  # the gzip trailer; leaves the raw file open
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._raw.close()
+        os.replace(self.tmp_path, self.path)
+        self._file = self._raw = None
+        return self.path
+
+    def abort(self):
+        """Discard a partial export"""
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        finally:
+            self._raw.close()
+            self._file = self._raw = None
+            self.tmp_path.unlink(missing_ok=True)
+
+
+def tee(rows, exporter):
+    """Pass rows through while writing them to an exporter"""
+    for row in rows:
+        exporter.write(row)
+        yield row
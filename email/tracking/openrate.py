@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Per-campaign open rates: sent ledgers joined with tracking data
+
+Sends and opens live in different places: who received a campaign is in its
+sent ledger (``scripts/sent-*.json``), when each email went out is in the
+run's event log (``events-<campaign>.jsonl``, keyed by recipient hash), and
+who opened it is in the Email Analytics database (kept locally by
+``view_tracking_stats.py`` in ``scripts/tracking-stats.sqlite3``).
+
+A ledger is not always one campaign's: activation and encourage both write
+``scripts/sent-emails.json``. The denominator is therefore the ledger
+addresses that the campaign's own event log records as sent. A campaign
+without an event log is refused unless ``--whole-ledger`` says its ledger
+is its own.
+
+``open_rates`` hash-joins the three on ``recipient_hash`` and reports per
+campaign:
+
+  delivered     addresses in the ledger sent by this campaign
+  opened        of those, addresses with at least one tracked open
+  open rate     opened / delivered
+  unmatched     tracked opens from addresses not in the ledger (test sends,
+                forwards, another ledger)
+  first open    distribution of the time from send to first open, for the
+                recipients whose send time is in the event log
+
+The time-to-first-open figures are computed over flat ``array('d')``
+columns (one pass to fill, one sort) rather than per-row objects, so a
+campaign with hundreds of thousands of recipients reports in well under a
+second.
+
+    python -m tracking.openrate news-philip-eades-2024=scripts/sent-news-emails.json
+"""
+
+import argparse
+import bisect
+import json
+import sys
+from array import array
+from datetime import timezone
+from pathlib import Path
+
+from campaign.events import event_log_path, read_events, recipient_hash
+from campaign.progress import format_duration
+from campaign.tracking import parse_timestamp
+
+from .store import STORE_FILE, TrackingStore
+
+PERCENTILES = (10, 25, 50, 75, 90)
+# Upper bounds (seconds) of the time-to-first-open histogram
+FIRST_OPEN_BUCKETS = (
+    ("< 1h", 3600),
+    ("1-6h", 6 * 3600),
+    ("6-24h", 24 * 3600),
+    ("1-3d", 3 * 86400),
+    ("3-7d", 7 * 86400),
+    ("> 7d", float("inf")),
+)
+
+
+def load_ledger(path):
+    """Recipient hashes of the addresses in a sent ledger (a JSON list)"""
+    with open(path, encoding="utf-8") as f:
+        return {recipient_hash(email) for email in json.load(f) if isinstance(email, str)}
+
+
+def load_send_times(path, campaign=None):
+    """
+    ``{recipient hash: epoch seconds}`` of the first successful send per
+    recipient in a campaign event log (empty if the log does not exist)
+
+    With ``campaign``, events recorded for another campaign are skipped (a
+    ``--log-file`` can be shared).
+    """
+    sent = {}
+    if not Path(path).exists():
+        return sent
+    for event in read_events(path):
+        if event.get("event") != "sent" or not event.get("recipient"):
+            continue
+        if campaign is not None and event.get("campaign", campaign) != campaign:
+            continue
+        sent.setdefault(event["recipient"], event["ts"])
+    return sent
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted sequence"""
+    if not values:
+        return None
+    rank = max(1, -(-pct * len(values) // 100))
+    return values[int(rank) - 1]
+
+
+def distribution(seconds):
+    """Percentiles, mean and histogram of an array of durations"""
+    ordered = array("d", sorted(seconds))
+    if not ordered:
+        return None
+    bounds = [bound for _, bound in FIRST_OPEN_BUCKETS]
+    counts = [0] * len(bounds)
+    start = 0
+    for i, bound in enumerate(bounds):
+        # The array is sorted, so each bucket is one bisect
+        end = bisect.bisect_left(ordered, bound, lo=start)
+        counts[i] = end - start
+        start = end
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "percentiles": {pct: percentile(ordered, pct) for pct in PERCENTILES},
+        "histogram": [(label, count) for (label, _), count in zip(FIRST_OPEN_BUCKETS, counts)],
+    }
+
+
+def open_rates(campaign, delivered, opens, send_times=None):
+    """
+    Join one campaign's sends with its opens
+
+    Args:
+        campaign: Campaign ID
+        delivered: Recipient hashes the campaign was sent to (its sent
+            ledger, limited to its own sends when the ledger is shared)
+        opens: (email, first opened ISO string) pairs from the tracking data
+        send_times: ``{recipient hash: epoch seconds}`` from the event log
+
+    Returns:
+        Dict with delivered, opened, open_rate, unmatched and first_open
+        (a ``distribution`` or None)
+    """
+    send_times = send_times or {}
+    opened = set()
+    unmatched = 0
+    delays = array("d")
+    for email, first_opened in opens:
+        key = recipient_hash(email)
+        if key not in delivered:
+            unmatched += 1
+            continue
+        if key in opened:
+            continue
+        opened.add(key)
+        sent_at = send_times.get(key)
+        first = parse_timestamp(first_opened)
+        if sent_at is None or first is None:
+            continue
+        # parse_timestamp leaves the UTC time without its offset
+        delay = first.replace(tzinfo=timezone.utc).timestamp() - sent_at
+        if delay >= 0:
+            delays.append(delay)
+    return {
+        "campaign": campaign,
+        "delivered": len(delivered),
+        "opened": len(opened),
+        "open_rate": round(len(opened) / len(delivered), 4) if delivered else 0.0,
+        "unmatched": unmatched,
+        "first_open": distribution(delays),
+    }
+
+
+def format_report(report):
+    lines = [
+        f"📬 {report['campaign']}",
+        f"  Delivered: {report['delivered']}",
+        f"  Opened: {report['opened']} ({report['open_rate'] * 100:.1f}%)",
+    ]
+    if report["unmatched"]:
+        lines.append(f"  Opens from addresses not in the ledger: {report['unmatched']}")
+    first_open = report["first_open"]
+    if first_open is None:
+        lines.append("  Time to first open: no send times (event log missing)")
+        return "\n".join(lines)
+    percentiles = ", ".join(
+        f"p{pct} {format_duration(value)}" for pct, value in first_open["percentiles"].items()
+    )
+    lines.append(f"  Time to first open ({first_open['count']} recipients): {percentiles}")
+    for label, count in first_open["histogram"]:
+        share = count / first_open["count"] * 100
+        lines.append(f"    {label:>6}: {count} ({share:.1f}%)")
+    return "\n".join(lines)
+
+
+def _campaign_ledger(text):
+    campaign, sep, path = text.partition("=")
+    if not sep or not campaign or not path:
+        raise argparse.ArgumentTypeError(f"expected CAMPAIGN=LEDGER, got {text!r}")
+    return campaign, Path(path)
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Per-campaign open rates from the sent ledgers")
+    parser.add_argument(
+        "campaigns",
+        nargs="+",
+        type=_campaign_ledger,
+        metavar="CAMPAIGN=LEDGER",
+        help="Campaign ID and its sent ledger, e.g. encourage=scripts/sent-emails.json",
+    )
+    parser.add_argument(
+        "--store", type=str, help="Local tracking database (default: scripts/tracking-stats.sqlite3)"
+    )
+    parser.add_argument(
+        "--whole-ledger",
+        action="store_true",
+        help="Count every ledger address as delivered for campaigns without an event log "
+        "(only correct when no other campaign writes to the ledger)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    store_path = Path(args.store) if args.store else STORE_FILE
+    if not store_path.exists():
+        print(f"❌ {store_path} not found: run view_tracking_stats.py first to sync it")
+        return 1
+
+    sends = []
+    for campaign, ledger in args.campaigns:
+        log = event_log_path(ledger, campaign)
+        send_times = load_send_times(log, campaign)
+        delivered = load_ledger(ledger)
+        if send_times:
+            # Only this campaign's sends: the ledger may be shared
+            delivered &= send_times.keys()
+        elif not args.whole_ledger:
+            print(
+                f"❌ {campaign}: no sends recorded in {log}, so its share of {ledger} is "
+                "unknown (use --whole-ledger if only this campaign writes to it)"
+            )
+            return 2
+        sends.append((campaign, delivered, send_times))
+
+    reports = []
+    with TrackingStore(store_path) as store:
+        for campaign, delivered, send_times in sends:
+            reports.append(open_rates(campaign, delivered, store.first_opens(campaign), send_times))
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print("\n\n".join(format_report(report) for report in reports))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
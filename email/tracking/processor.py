@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Tracking queue processor: coalesced opens to Notion
+
+Stage two of EMAIL_TRACKING_PRD.md. The pixel server (``tracking.server``)
+only appends opens to ``scripts/tracking-opens.jsonl``; this processor
+drains that queue on a window and writes the Email Analytics database that
+``view_tracking_stats.py`` reads, one row per (email, campaign) with
+``Open Count``, ``First Opened`` and ``Last Opened``.
+
+All opens of the same (email, campaign) read in one pass are merged into a
+single upsert (count added, earliest/latest timestamps, latest location), so
+a newsletter opened five times from three devices costs one Notion call
+instead of five query+update pairs. Upserts run on a small thread pool that
+shares one token bucket, keeping the processor under Notion's ~3 requests/s.
+
+State lives in ``scripts/tracking-processor.json``:
+
+  offset  bytes of the opens file already processed (reset if the file is
+          truncated or rotated)
+  pages   Notion page id and open count per (email, campaign); rows in the
+          cache are updated without querying first, which assumes the
+          processor is the only writer of Open Count
+  retry   aggregates whose upsert failed, merged into the next pass
+  unresolved
+          signed opens whose recipient is in no sent ledger yet, retried
+          each pass until they are older than the pixel's 30 days
+
+Opens from signed pixel URLs carry a recipient hash instead of an address;
+they are matched back to addresses through the sent ledgers
+(``scripts/sent-*.json``), which are re-read when a hash is not found. An
+open can arrive before its ledger is written (a run still in progress, or
+an outbox spool delivered later), so unmatched opens are held back rather
+than dropped.
+
+    python -m tracking.processor --once          # drain the queue and exit
+    python -m tracking.processor --window 60     # drain every minute
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from campaign.events import recipient_hash
+from campaign.lazy import LazyAttribute, lazy_import
+from campaign.storage import load_json_file, save_json_file
+from campaign.throttle import TokenBucket
+
+from .bots import is_bot
+from .server import OPENS_FILE
+
+dotenv = lazy_import("dotenv")
+NotionClient = LazyAttribute("notion_client", "Client")
+
+STATE_FILE = OPENS_FILE.with_name("tracking-processor.json")
+SENT_LEDGERS = "sent-*.json"
+WINDOW_SECONDS = 60
+WORKERS = 4
+# Notion allows an average of three requests per second per integration
+REQUESTS_PER_SECOND = 3
+RETRIES = 3
+RETRY_DELAY_SECONDS = 1.0
+# Unresolved signed opens are kept as long as the pixel server accepts opens
+UNRESOLVED_MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+
+
+def iso_timestamp(ts):
+    """Epoch seconds as the UTC ISO string api/track-email.js writes"""
+    moment = datetime.fromtimestamp(ts, timezone.utc)
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _text(content):
+    return {"rich_text": [{"text": {"content": content}}]}
+
+
+class OpenAggregate:
+    """All opens of one (email, campaign) seen in a pass"""
+
+    __slots__ = ("email", "campaign", "count", "first_ts", "last_ts", "country", "region")
+
+    def __init__(self, email, campaign, count, first_ts, last_ts, country="Unknown", region="Unknown"):
+        self.email = email
+        self.campaign = campaign
+        self.count = count
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+        self.country = country
+        self.region = region
+
+    @classmethod
+    def from_event(cls, event):
+        return cls(
+            event["email"],
+            event["campaign"],
+            1,
+            event["ts"],
+            event["ts"],
+            event.get("country", "Unknown"),
+            event.get("region", "Unknown"),
+        )
+
+    @property
+    def key(self):
+        return f"{self.email}|{self.campaign}"
+
+    def merge(self, other):
+        self.count += other.count
+        self.first_ts = min(self.first_ts, other.first_ts)
+        if other.last_ts >= self.last_ts:
+            # Location follows the most recent open, as in api/track-email.js
+            self.last_ts = other.last_ts
+            self.country = other.country
+            self.region = other.region
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class RecipientDirectory:
+    """Recipient hash -> address, from the sent ledgers
+
+    Args:
+        paths: Ledger files (JSON lists of addresses), or a callable
+            returning them so new ledgers are picked up
+    """
+
+    def __init__(self, paths=None):
+        self.paths = paths if paths is not None else lambda: sorted(OPENS_FILE.parent.glob(SENT_LEDGERS))
+        self._stamps = None
+        self._emails = {}
+
+    def _ledgers(self):
+        return self.paths() if callable(self.paths) else self.paths
+
+    def _stamp(self):
+        stamps = {}
+        for path in self._ledgers():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stamps[str(path)] = (stat.st_size, stat.st_mtime_ns)
+        return stamps
+
+    def refresh(self):
+        """Re-read the ledgers if any changed; True if they did"""
+        stamps = self._stamp()
+        if stamps == self._stamps:
+            return False
+        emails = {}
+        for path in stamps:
+            ledger = load_json_file(path)
+            for email in ledger if isinstance(ledger, list) else ():
+                if isinstance(email, str):
+                    emails[recipient_hash(email)] = email.strip().lower()
+        self._emails = emails
+        self._stamps = stamps
+        return True
+
+    def get(self, recipient):
+        email = self._emails.get(recipient)
+        if email is None and self.refresh():
+            email = self._emails.get(recipient)
+        return email
+
+
+def coalesce(events, into=None, recipients=None, unresolved=None):
+    """
+    Merge open events per (email, campaign)
+
+    Args:
+        events: Open event dicts from the opens file (bot user agents are
+            skipped)
+        into: Existing ``{key: OpenAggregate}`` to merge into (retries)
+        recipients: RecipientDirectory resolving signed opens (which carry
+            a recipient hash); without one they are skipped
+        unresolved: List collecting the signed opens ``recipients`` could
+            not resolve (skipped if not given)
+
+    Returns:
+        ``{key: OpenAggregate}``
+    """
+    aggregates = {} if into is None else into
+    for event in events:
+        if event.get("event") != "open" or not event.get("campaign"):
+            continue
+        if is_bot(event.get("user_agent")):
+            # Spooled before the bot list caught up with this user agent
+            continue
+        if not event.get("email"):
+            email = recipients.get(event.get("recipient")) if recipients and event.get("recipient") else None
+            if email is None:
+                if unresolved is not None and recipients and event.get("recipient"):
+                    unresolved.append(event)
+                continue
+            event = dict(event, email=email)
+        aggregate = OpenAggregate.from_event(event)
+        existing = aggregates.get(aggregate.key)
+        if existing is None:
+            aggregates[aggregate.key] = aggregate
+        else:
+            existing.merge(aggregate)
+    return aggregates
+
+
+def read_new_events(path, offset):
+    """
+    Events appended to a JSON-lines file since ``offset``
+
+    Only complete lines are read, so an open the server is still writing is
+    picked up by the next pass.
+
+    Returns:
+        (events, new offset)
+    """
+    path = Path(path)
+    if not path.exists():
+        return [], 0
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() < offset:
+            # Truncated or rotated: start from the beginning of the new file
+            offset = 0
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    events = []
+    for line in data[:end].splitlines():
+        try:
+            events.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return events, offset + end
+
+
+def _retryable(error):
+    code = getattr(error, "code", None)
+    if getattr(code, "value", code) == "rate_limited":
+        return True
+    status = getattr(error, "status", None)
+    return isinstance(status, int) and status >= 500
+
+
+class NotionUpserter:
+    """Writes aggregates to the Email Analytics database
+
+    Args:
+        client: notion_client.Client
+        database_id: NOTION_EMAIL_ANALYTICS_DB_ID
+        pages: ``{key: {"id": page id, "count": open count}}`` cache, updated
+            in place
+        limiter: TokenBucket every API call takes a token from
+    """
+
+    def __init__(self, client, database_id, pages=None, limiter=None, retries=RETRIES):
+        self.client = client
+        self.database_id = database_id
+        self.pages = {} if pages is None else pages
+        self.limiter = limiter or TokenBucket(REQUESTS_PER_SECOND * 60, burst=REQUESTS_PER_SECOND)
+        self.retries = retries
+
+    def _call(self, method, **kwargs):
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                return method(**kwargs)
+            except Exception as e:
+                if attempt == self.retries or not _retryable(e):
+                    raise
+                time.sleep(RETRY_DELAY_SECONDS * 2**attempt)
+
+    def _find(self, aggregate):
+        response = self._call(
+            self.client.databases.query,
+            database_id=self.database_id,
+            filter={
+                "and": [
+                    {"property": "Email", "title": {"equals": aggregate.email}},
+                    {"property": "Campaign ID", "rich_text": {"equals": aggregate.campaign}},
+                ]
+            },
+            page_size=1,
+        )
+        if not response["results"]:
+            return None
+        page = response["results"][0]
+        count = page["properties"].get("Open Count", {}).get("number") or 0
+        return {"id": page["id"], "count": count}
+
+    def upsert(self, aggregate):
+        """
+        Add an aggregate's opens to its row, creating the row if needed
+
+        Returns:
+            "created" or "updated"
+        """
+        page = self.pages.get(aggregate.key) or self._find(aggregate)
+        last = {"date": {"start": iso_timestamp(aggregate.last_ts)}}
+        location = {"Country": _text(aggregate.country), "Region": _text(aggregate.region)}
+        if page is None:
+            created = self._call(
+                self.client.pages.create,
+                parent={"database_id": self.database_id},
+                properties={
+                    "Email": {"title": [{"text": {"content": aggregate.email}}]},
+                    "Campaign ID": _text(aggregate.campaign),
+                    "Open Count": {"number": aggregate.count},
+                    "First Opened": {"date": {"start": iso_timestamp(aggregate.first_ts)}},
+                    "Last Opened": last,
+                    **location,
+                },
+            )
+            self.pages[aggregate.key] = {"id": created["id"], "count": aggregate.count}
+            return "created"
+
+        count = page["count"] + aggregate.count
+        try:
+            self._call(
+                self.client.pages.update,
+                page_id=page["id"],
+                properties={"Open Count": {"number": count}, "Last Opened": last, **location},
+            )
+        except Exception as e:
+            code = getattr(e, "code", None)
+            if getattr(code, "value", code) != "object_not_found" or aggregate.key not in self.pages:
+                raise
+            # The cached row was deleted in Notion: look it up again
+            del self.pages[aggregate.key]
+            return self.upsert(aggregate)
+        self.pages[aggregate.key] = {"id": page["id"], "count": count}
+        return "updated"
+
+
+class QueueProcessor:
+    """Drains the opens file into Notion, one upsert per (email, campaign) per pass
+
+    Args:
+        upserter: NotionUpserter (or anything with ``upsert(aggregate)`` and
+            a ``pages`` dict)
+        opens_file: JSON-lines file written by the pixel server
+        state_file: Offset, page cache and retry queue
+        workers: Concurrent upserts
+        recipients: RecipientDirectory for signed opens (default: the sent
+            ledgers next to the opens file)
+    """
+
+    def __init__(self, upserter, opens_file=OPENS_FILE, state_file=STATE_FILE, workers=WORKERS,
+                 recipients=None):
+        self.upserter = upserter
+        self.opens_file = Path(opens_file)
+        self.state_file = Path(state_file)
+        self.workers = max(1, workers)
+        self.recipients = recipients or RecipientDirectory(
+            lambda: sorted(self.opens_file.parent.glob(SENT_LEDGERS))
+        )
+        state = load_json_file(self.state_file)
+        self.offset = state.get("offset", 0)
+        self.retry = [OpenAggregate.from_dict(data) for data in state.get("retry", [])]
+        self.unresolved = state.get("unresolved", [])
+        self.upserter.pages.update(state.get("pages", {}))
+
+    def save_state(self):
+        save_json_file(
+            self.state_file,
+            {
+                "offset": self.offset,
+                "pages": self.upserter.pages,
+                "retry": [aggregate.to_dict() for aggregate in self.retry],
+                "unresolved": self.unresolved,
+            },
+        )
+
+    def _upsert(self, aggregate):
+        try:
+            return self.upserter.upsert(aggregate), None
+        except Exception as e:
+            return "failed", e
+
+    def process_once(self):
+        """
+        Process the opens queued since the last pass
+
+        Returns:
+            Dict of counts: events read, groups upserted, created, updated,
+            failed, unresolved (signed opens held back because their
+            recipient is in no sent ledger) and expired (unresolved opens
+            given up on)
+        """
+        events, offset = read_new_events(self.opens_file, self.offset)
+        unresolved = []
+        aggregates = coalesce(
+            self.unresolved + events,
+            into={aggregate.key: aggregate for aggregate in self.retry},
+            recipients=self.recipients,
+            unresolved=unresolved,
+        )
+        stats = {"events": len(events), "groups": len(aggregates), "created": 0, "updated": 0, "failed": 0}
+        cutoff = time.time() - UNRESOLVED_MAX_AGE_SECONDS
+        held = [event for event in unresolved if event.get("ts", 0) >= cutoff]
+        stats["unresolved"] = len(held)
+        stats["expired"] = len(unresolved) - len(held)
+
+        retry = []
+        if aggregates:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = pool.map(self._upsert, aggregates.values())
+                for aggregate, (outcome, error) in zip(aggregates.values(), results):
+                    stats[outcome] += 1
+                    if error is not None:
+                        print(f"⚠️ Failed to record opens for {aggregate.key}: {error}")
+                        retry.append(aggregate)
+
+        # Failed groups and unresolved opens are kept in the state file, so
+        # the offset can advance
+        self.offset = offset
+        self.retry = retry
+        self.unresolved = held
+        self.save_state()
+        return stats
+
+    def run(self, window=WINDOW_SECONDS, passes=None):
+        """Process the queue every ``window`` seconds (forever unless ``passes``)"""
+        done = 0
+        while passes is None or done < passes:
+            started = time.monotonic()
+            stats = self.process_once()
+            done += 1
+            if stats["events"] or stats["failed"] or stats["expired"]:
+                print(format_stats(stats))
+            if passes is None or done < passes:
+                time.sleep(max(0.0, window - (time.monotonic() - started)))
+
+
+def format_stats(stats):
+    text = (
+        f"📬 {stats['events']} opens -> {stats['groups']} upserts "
+        f"({stats['created']} created, {stats['updated']} updated, {stats['failed']} failed)"
+    )
+    if stats.get("unresolved") or stats.get("expired"):
+        # Signed opens only reach Notion once a sent ledger names their recipient
+        text += (
+            f"\n🔏 {stats['unresolved']} signed opens waiting for a sent ledger entry, "
+            f"{stats['expired']} expired unresolved"
+        )
+    return text
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Push queued email opens to Notion")
+    parser.add_argument("--once", action="store_true", help="Process the queue once and exit")
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=WINDOW_SECONDS,
+        help=f"Seconds of opens coalesced per pass (default: {WINDOW_SECONDS})",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=WORKERS, help=f"Concurrent Notion upserts (default: {WORKERS})"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=REQUESTS_PER_SECOND,
+        help=f"Notion requests per second (default: {REQUESTS_PER_SECOND})",
+    )
+    parser.add_argument("--opens", type=str, help="Opens file (default: scripts/tracking-opens.jsonl)")
+    parser.add_argument("--state", type=str, help="State file (default: scripts/tracking-processor.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    dotenv.load_dotenv()
+    notion_token = os.getenv("NOTION_TOKEN")
+    analytics_db_id = os.getenv("NOTION_EMAIL_ANALYTICS_DB_ID")
+    if not notion_token or not analytics_db_id:
+        print("❌ Missing NOTION_TOKEN or NOTION_EMAIL_ANALYTICS_DB_ID in .env")
+        return 1
+
+    limiter = TokenBucket(args.rate * 60, burst=max(1, int(args.rate)))
+    upserter = NotionUpserter(NotionClient(auth=notion_token), analytics_db_id, limiter=limiter)
+    processor = QueueProcessor(
+        upserter, args.opens or OPENS_FILE, args.state or STATE_FILE, workers=args.workers
+    )
+    if args.once:
+        print(format_stats(processor.process_once()))
+        return 0
+
+    print(f"📬 Processing {processor.opens_file} every {args.window:g}s (Ctrl+C to stop)")
+    try:
+        processor.run(args.window)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Tracking pixel server
+
+Serves the open-tracking pixel embedded by the campaigns
+(``/api/track-email?e=<obfuscated email>&c=<campaign>&t=<sent ms>``, or a
+signed ``?k=<token>`` from ``campaign.tracking.TrackingTokens``) without
+the serverless lifecycle problem described in EMAIL_TRACKING_PRD.md: the
+1x1 GIF goes back immediately and the open is only put on an in-process
+queue. The queue is drained by a background thread that appends the opens to
+a local JSON-lines store in batches (``campaign.events.EventLog``), for the
+queue processor to push to Notion later.
+
+Requests are filtered the same way as api/track-email.js: missing
+parameters, bot user agents (``tracking.bots``), timestamps older than 30
+days, values that do not decode to an address and tokens whose signature
+does not verify are answered with the pixel but not recorded. Signed opens
+are recorded by recipient hash rather than address; the queue processor
+resolves them against the sent ledgers. With ``--signed-only`` the old
+unsigned URLs are refused too, so opens cannot be forged.
+
+``PixelApp`` is both a WSGI app and (via ``app.asgi``) an ASGI app:
+
+    python -m tracking.server --port 8080                   # stdlib, threaded
+    gunicorn 'tracking.server:create_app()'                 # WSGI
+    uvicorn --factory tracking.server:create_asgi_app       # ASGI
+"""
+
+import argparse
+import base64
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import unquote
+
+from campaign.events import EventLog
+from campaign.tracking import TOKEN_PARAM, TrackingTokens, deobfuscate_email
+
+from .bots import is_bot
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+OPENS_FILE = PROJECT_ROOT / "scripts" / "tracking-opens.jsonl"
+
+# 1x1 transparent GIF, identical to api/track-email.js (42 bytes, not the 43
+# its comment says)
+PIXEL_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+# Opens of emails sent longer ago than this are ignored
+MAX_AGE_MS = 30 * 24 * 60 * 60 * 1000
+PIXEL_PATHS = ("/api/track-email", "/track-email")
+TRACKED_PARAMS = ("e", "c", "t", TOKEN_PARAM)
+
+PIXEL_HEADERS = [
+    ("Content-Type", "image/gif"),
+    ("Content-Length", str(len(PIXEL_GIF))),
+    ("Cache-Control", "no-cache, no-store, must-revalidate"),
+    ("Pragma", "no-cache"),
+    ("Expires", "0"),
+    ("Access-Control-Allow-Origin", "*"),
+]
+CORS_HEADERS = [
+    ("Access-Control-Allow-Origin", "*"),
+    ("Access-Control-Allow-Methods", "GET, OPTIONS"),
+    ("Content-Length", "0"),
+]
+EMPTY_HEADERS = [("Content-Length", "0")]
+
+STATUS_TEXT = {200: "200 OK", 302: "302 Found", 404: "404 Not Found", 405: "405 Method Not Allowed"}
+
+
+def parse_query(query_string):
+    """The e, c, t and k parameters of a pixel query string (first value wins)"""
+    params = {}
+    for pair in query_string.split("&"):
+        key, _, value = pair.partition("=")
+        if key in TRACKED_PARAMS and key not in params:
+            params[key] = unquote(value)
+    return params
+
+
+def _expired(sent_ms, now_ms):
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    return now_ms - sent_ms > MAX_AGE_MS
+
+
+def decode_token(token, user_agent="", now_ms=None, tokens=None):
+    """decode_open for a signed token: one HMAC, no lookup"""
+    if is_bot(user_agent):
+        return None, "bot"
+    decoded = tokens.decode(token) if tokens is not None else None
+    if decoded is None:
+        return None, "invalid"
+    recipient, campaign, sent = decoded
+    sent_ms = sent * 1000
+    if _expired(sent_ms, now_ms):
+        return None, "expired"
+    return {"recipient": recipient, "campaign": campaign, "user_agent": user_agent, "sent_ms": sent_ms}, None
+
+
+def decode_open(params, user_agent="", now_ms=None, tokens=None, signed_only=False):
+    """
+    Open event fields for a pixel request
+
+    Args:
+        params: Parsed query parameters
+        user_agent: Request user agent
+        now_ms: Current time (default: now)
+        tokens: TrackingTokens verifying ``k`` (signed tokens are rejected
+            as invalid without one)
+        signed_only: Refuse the unsigned ``e``/``c``/``t`` form
+
+    Returns:
+        (fields, None) for a trackable open, or (None, reason) where reason
+        is "missing", "bot", "expired", "invalid" or "unsigned"
+    """
+    if params.get(TOKEN_PARAM):
+        return decode_token(params[TOKEN_PARAM], user_agent, now_ms, tokens)
+    encoded, campaign = params.get("e"), params.get("c")
+    if not encoded or not campaign:
+        return None, "missing"
+    if is_bot(user_agent):
+        return None, "bot"
+    if signed_only:
+        return None, "unsigned"
+
+    sent_ms = None
+    if params.get("t"):
+        try:
+            sent_ms = int(params["t"])
+        except ValueError:
+            return None, "expired"
+        if _expired(sent_ms, now_ms):
+            return None, "expired"
+
+    email = deobfuscate_email(encoded)
+    if email is None:
+        return None, "invalid"
+    fields = {"email": email.lower(), "campaign": campaign, "user_agent": user_agent}
+    if sent_ms is not None:
+        fields["sent_ms"] = sent_ms
+    return fields, None
+
+
+class PixelApp:
+    """WSGI/ASGI pixel endpoint recording opens to a store
+
+    Args:
+        store: Object with ``record(event, **fields)`` (an EventLog) and
+            optionally ``close()``
+        paths: Request paths that serve the pixel
+        tokens: TrackingTokens for signed pixel URLs
+        signed_only: Record signed opens only
+
+    ``stats`` counts requests by outcome. The threaded server and ASGI
+    workers handle requests concurrently, so update it through ``count()``.
+    """
+
+    def __init__(self, store, paths=PIXEL_PATHS, tokens=None, signed_only=False):
+        self.store = store
+        self.paths = frozenset(paths)
+        self.tokens = tokens
+        self.signed_only = signed_only
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def count(self, outcome):
+        """Add one to ``stats[outcome]``, safely across worker threads"""
+        with self._stats_lock:
+            self.stats[outcome] += 1
+
+    def track(self, query_string, user_agent="", country=None, region=None):
+        """Queue the open for a pixel request, if it should be tracked"""
+        self.count("hits")
+        fields, reason = decode_open(
+            parse_query(query_string), user_agent, tokens=self.tokens, signed_only=self.signed_only
+        )
+        if fields is None:
+            self.count(reason)
+            return False
+        fields["country"] = country or "Unknown"
+        fields["region"] = region or "Unknown"
+        self.store.record("open", **fields)
+        self.count("queued")
+        return True
+
+    def respond(self, method, path, query_string, user_agent="", country=None, region=None):
+        """(status, headers, body) for a request"""
+        if method == "OPTIONS":
+            return 200, CORS_HEADERS, b""
+        if path not in self.paths:
+            return 404, EMPTY_HEADERS, b""
+        if method not in ("GET", "HEAD"):
+            return 405, EMPTY_HEADERS, b""
+        if method == "GET":
+            self.track(query_string, user_agent, country, region)
+        return 200, PIXEL_HEADERS, PIXEL_GIF if method == "GET" else b""
+
+    # -- WSGI ---------------------------------------------------------------
+
+    def __call__(self, environ, start_response):
+        status, headers, body = self.respond(
+            environ.get("REQUEST_METHOD", "GET"),
+            environ.get("PATH_INFO", ""),
+            environ.get("QUERY_STRING", ""),
+            environ.get("HTTP_USER_AGENT", ""),
+            environ.get("HTTP_X_VERCEL_IP_COUNTRY"),
+            environ.get("HTTP_X_VERCEL_IP_COUNTRY_REGION"),
+        )
+        start_response(STATUS_TEXT[status], headers)
+        return [body]
+
+    # -- ASGI ---------------------------------------------------------------
+
+    async def asgi(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    self.close()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        headers = {}
+        for name, value in scope.get("headers", ()):
+            if name in (b"user-agent", b"x-vercel-ip-country", b"x-vercel-ip-country-region"):
+                headers[name] = value.decode("latin-1")
+        status, response_headers, body = self.respond(
+            scope["method"],
+            scope["path"],
+            scope.get("query_string", b"").decode("latin-1"),
+            headers.get(b"user-agent", ""),
+            headers.get(b"x-vercel-ip-country"),
+            headers.get(b"x-vercel-ip-country-region"),
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in response_headers],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def close(self):
+        close = getattr(self.store, "close", None)
+        if close:
+            close()
+
+
+def create_app(store_path=None, signed_only=False):
+    """
+    PixelApp appending opens to ``store_path`` (default
+    scripts/tracking-opens.jsonl), verifying signed URLs if
+    ``TRACKING_SECRET`` is set
+    """
+    tokens = TrackingTokens.load()
+    if signed_only and tokens is None:
+        raise ValueError("signed-only tracking needs TRACKING_SECRET")
+    return PixelApp(EventLog(store_path or OPENS_FILE), tokens=tokens, signed_only=signed_only)
+
+
+def create_asgi_app(store_path=None, signed_only=False):
+    return create_app(store_path, signed_only).asgi
+
+
+def serve(app, host="127.0.0.1", port=8080):
+    """Serve a WSGI app on a threaded stdlib server until interrupted"""
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+    class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    with make_server(host, port, app, ThreadingWSGIServer, QuietHandler) as server:
+        server.serve_forever()
+
+
+def parse_arguments(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Serve the email open-tracking pixel")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument("--store", type=str, help="Opens file (default: scripts/tracking-opens.jsonl)")
+    parser.add_argument(
+        "--signed-only", action="store_true", help="Ignore unsigned pixel URLs (needs TRACKING_SECRET)"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    try:
+        app = create_app(args.store, args.signed_only)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"📡 Tracking pixel at http://{args.host}:{args.port}{PIXEL_PATHS[0]}")
+    print(f"📝 Opens appended to {app.store.path}")
+    if app.tokens is not None:
+        print(f"🔏 Verifying signed URLs ({len(app.tokens.campaigns)} campaigns registered)")
+    try:
+        serve(app, args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        app.close()
+        stats = app.stats
+        print(
+            f"\n📊 {stats['hits']} hits, {stats['queued']} opens recorded, "
+            f"{stats['bot']} bots, {stats['expired'] + stats['invalid'] + stats['missing'] + stats['unsigned']} ignored"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+Local SQLite copy of the Email Analytics database
+
+``view_tracking_stats.py`` used to page through the whole Notion database
+on every run. It now keeps the rows in ``scripts/tracking-stats.sqlite3``
+and only asks Notion for pages edited since the newest ``last_edited_time``
+it has stored. The report and the CSV export are then served from SQLite:
+
+  opens            one row per Notion page (email, campaign, open count,
+                   first/last opened, country), with covering indexes for
+                   the campaign, recent-opens and top-recipient queries
+  campaign_rollup  rows, distinct recipients and opens per campaign
+  daily_rollup     first opens and last opens per day and campaign
+
+Rollups are recomputed for the campaigns touched by a sync only, inside the
+same transaction as the rows, so they never disagree with ``opens``.
+
+Every write stamps its rows with a new ``version``; ``--export
+--since-last-export`` exports the rows whose version is newer than the one
+recorded by the previous export.
+"""
+
+import sqlite3
+from pathlib import Path
+
+from campaign.tracking import parse_timestamp
+
+STORE_FILE = Path(__file__).parent.parent.parent / "scripts" / "tracking-stats.sqlite3"
+
+# Campaign name used in reports for rows without a Campaign ID
+UNKNOWN_CAMPAIGN = "Unknown"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS opens (
+    page_id         TEXT PRIMARY KEY,
+    email           TEXT NOT NULL,
+    campaign        TEXT NOT NULL,
+    campaign_key    TEXT NOT NULL,
+    open_count      INTEGER NOT NULL,
+    first_opened    TEXT,
+    last_opened     TEXT,
+    first_opened_at TEXT,
+    last_opened_at  TEXT,
+    country         TEXT NOT NULL,
+    edited          TEXT,
+    version         INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS opens_by_campaign ON opens (campaign_key, email, open_count);
+CREATE INDEX IF NOT EXISTS opens_by_last_opened ON opens (last_opened_at);
+CREATE INDEX IF NOT EXISTS opens_by_count ON opens (open_count);
+CREATE INDEX IF NOT EXISTS opens_by_version ON opens (version);
+CREATE TABLE IF NOT EXISTS campaign_rollup (
+    campaign   TEXT PRIMARY KEY,
+    rows       INTEGER NOT NULL,
+    recipients INTEGER NOT NULL,
+    opens      INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    day         TEXT NOT NULL,
+    campaign    TEXT NOT NULL,
+    first_opens INTEGER NOT NULL,
+    last_opens  INTEGER NOT NULL,
+    PRIMARY KEY (day, campaign)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+ROW_FIELDS = ("email", "campaign", "open_count", "first_opened", "last_opened", "country")
+
+
+def campaign_key(campaign):
+    return campaign or UNKNOWN_CAMPAIGN
+
+
+def _isoformat(moment):
+    return moment.isoformat() if moment is not None else None
+
+
+class TrackingStore:
+    """Tracking rows and their rollups in a local SQLite database
+
+    Args:
+        path: Database file (created if missing); ":memory:" for tests
+    """
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path))
+        self.db.row_factory = sqlite3.Row
+        columns = {row["name"] for row in self.db.execute("PRAGMA table_info(opens)")}
+        if columns and "version" not in columns:
+            # Stores created before exports tracked versions
+            self.db.execute("ALTER TABLE opens ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    # -- sync state ---------------------------------------------------------
+
+    def _meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    @property
+    def last_edited(self):
+        """Newest Notion ``last_edited_time`` stored (None before the first sync)"""
+        return self._meta("last_edited")
+
+    @property
+    def synced_at(self):
+        return self._meta("synced_at")
+
+    @property
+    def version(self):
+        """Version stamped on the most recent write"""
+        return int(self._meta("version") or 0)
+
+    @property
+    def exported_version(self):
+        """Version covered by the last --since-last-export export (0 if none)"""
+        return int(self._meta("exported_version") or 0)
+
+    def mark_exported(self, version):
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('exported_version', ?)", (str(version),)
+            )
+
+    def clear(self):
+        """Drop every row and rollup (before a full resync)"""
+        with self.db:
+            for table in ("opens", "campaign_rollup", "daily_rollup", "meta"):
+                self.db.execute(f"DELETE FROM {table}")
+
+    # -- writing ------------------------------------------------------------
+
+    def upsert(self, records, synced_at=None):
+        """
+        Insert or replace rows and refresh the rollups they affect
+
+        Args:
+            records: (page_id, last_edited_time, row) tuples, in the order
+                Notion returned them (ascending last_edited_time)
+            synced_at: Time of the sync, stored for the report header
+
+        Returns:
+            Number of rows written
+        """
+        records = list(records)
+        if not records:
+            return 0
+        touched = set()
+        with self.db:
+            version = self.version + 1
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(version),))
+            for page_id, edited, row in records:
+                previous = self.db.execute(
+                    "SELECT campaign_key FROM opens WHERE page_id = ?", (page_id,)
+                ).fetchone()
+                if previous:
+                    # A row moved to another campaign leaves the old rollup stale too
+                    touched.add(previous["campaign_key"])
+                key = campaign_key(row["campaign"])
+                touched.add(key)
+                self.db.execute(
+                    # An upsert rather than REPLACE keeps the rowid, and with it
+                    # the storage order the report breaks ties by
+                    """
+                    INSERT INTO opens VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (page_id) DO UPDATE SET
+                        email = excluded.email,
+                        campaign = excluded.campaign,
+                        campaign_key = excluded.campaign_key,
+                        open_count = excluded.open_count,
+                        first_opened = excluded.first_opened,
+                        last_opened = excluded.last_opened,
+                        first_opened_at = excluded.first_opened_at,
+                        last_opened_at = excluded.last_opened_at,
+                        country = excluded.country,
+                        edited = excluded.edited,
+                        version = excluded.version
+                    """,
+                    (
+                        page_id,
+                        row["email"],
+                        row["campaign"] or "",
+                        key,
+                        row["open_count"] or 0,
+                        row["first_opened"],
+                        row["last_opened"],
+                        _isoformat(parse_timestamp(row["first_opened"])),
+                        _isoformat(parse_timestamp(row["last_opened"])),
+                        row["country"] or "Unknown",
+                        edited,
+                        version,
+                    ),
+                )
+            self._refresh_rollups(touched)
+            newest = max((edited for _, edited, _ in records if edited), default=None)
+            if newest and (self.last_edited is None or newest > self.last_edited):
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('last_edited', ?)", (newest,))
+            if synced_at:
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('synced_at', ?)", (synced_at,))
+        return len(records)
+
+    def mark_synced(self, synced_at):
+        """Record the time of a completed sync"""
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('synced_at', ?)", (synced_at,))
+
+    def _refresh_rollups(self, campaigns):
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS touched (campaign TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM touched")
+        self.db.executemany("INSERT INTO touched VALUES (?)", [(c,) for c in campaigns])
+        self.db.execute("DELETE FROM campaign_rollup WHERE campaign IN touched")
+        self.db.execute(
+            """
+            INSERT INTO campaign_rollup
+            SELECT campaign_key, count(*), count(DISTINCT email), sum(open_count)
+            FROM opens WHERE campaign_key IN touched
+            GROUP BY campaign_key
+            """
+        )
+        self.db.execute("DELETE FROM daily_rollup WHERE campaign IN touched")
+        self.db.execute(
+            """
+            INSERT INTO daily_rollup
+            SELECT day, campaign_key, sum(first), sum(last) FROM (
+                SELECT substr(first_opened_at, 1, 10) AS day, campaign_key, 1 AS first, 0 AS last
+                FROM opens WHERE campaign_key IN touched AND first_opened_at IS NOT NULL
+                UNION ALL
+                SELECT substr(last_opened_at, 1, 10), campaign_key, 0, 1
+                FROM opens WHERE campaign_key IN touched AND last_opened_at IS NOT NULL
+            )
+            GROUP BY day, campaign_key
+            """
+        )
+
+    # -- reading ------------------------------------------------------------
+
+    def totals(self):
+        """(rows, total opens, distinct recipients)"""
+        row = self.db.execute(
+            "SELECT count(*), coalesce(sum(open_count), 0), count(DISTINCT email) FROM opens"
+        ).fetchone()
+        return tuple(row)
+
+    def campaigns(self):
+        """(campaign, recipients, opens) per campaign, by name"""
+        return [
+            tuple(row)
+            for row in self.db.execute(
+                "SELECT campaign, recipients, opens FROM campaign_rollup ORDER BY campaign"
+            )
+        ]
+
+    def countries(self):
+        """(country, rows), most rows first (ties in storage order)"""
+        return [
+            tuple(row)
+            for row in self.db.execute(
+                """
+                SELECT country, count(*) AS n FROM opens
+                GROUP BY country ORDER BY n DESC, min(rowid)
+                """
+            )
+        ]
+
+    def recent_count(self, since):
+        return self.db.execute(
+            "SELECT count(*) FROM opens WHERE last_opened_at > ?", (since.isoformat(),)
+        ).fetchone()[0]
+
+    def recent(self, since, limit):
+        """Rows last opened after ``since``, newest first"""
+        return [
+            self._row(row)
+            for row in self.db.execute(
+                """
+                SELECT * FROM opens WHERE last_opened_at > ?
+                ORDER BY last_opened_at DESC, rowid LIMIT ?
+                """,
+                (since.isoformat(), limit),
+            )
+        ]
+
+    def top(self, limit):
+        """Rows with the most opens (ties in storage order)"""
+        return [
+            self._row(row)
+            for row in self.db.execute(
+                "SELECT * FROM opens ORDER BY open_count DESC, rowid LIMIT ?", (limit,)
+            )
+        ]
+
+    def daily(self, days):
+        """(day, first opens, last opens) for the latest ``days`` days with activity"""
+        return [
+            tuple(row)
+            for row in self.db.execute(
+                """
+                SELECT day, sum(first_opens), sum(last_opens) FROM daily_rollup
+                GROUP BY day ORDER BY day DESC LIMIT ?
+                """,
+                (days,),
+            )
+        ]
+
+    def first_opens(self, campaign):
+        """(email, first opened) for every row of a campaign"""
+        for row in self.db.execute(
+            "SELECT email, first_opened FROM opens WHERE campaign_key = ? ORDER BY rowid",
+            (campaign_key(campaign),),
+        ):
+            yield row["email"], row["first_opened"]
+
+    def rows(self, since_version=0):
+        """Stored rows written after ``since_version`` (all by default), in storage order"""
+        for row in self.db.execute(
+            "SELECT * FROM opens WHERE version > ? ORDER BY rowid", (since_version,)
+        ):
+            yield self._row(row)
+
+    @staticmethod
+    def _row(row):
+        return {field: row[field] for field in ROW_FIELDS}
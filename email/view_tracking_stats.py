@@ -3,26 +3,56 @@
 View Email Tracking Statistics
 
 This script fetches and displays email tracking statistics from your Notion database.
+Rows are kept in a local SQLite database (tracking/store.py) that each run
+brings up to date with only the pages edited since the last sync; the report
+and --export are then served locally. --offline skips the sync and --live
+streams everything from Notion as before. Exports stream to a temporary file
+renamed into place when complete (tracking/export.py), in CSV or JSON lines,
+optionally gzipped, and --since-last-export writes only the rows changed
+since the previous delta export.
 """
 
+import heapq
 import os
 import sys
 from datetime import datetime, timedelta
-from collections import defaultdict
-import dotenv
+from collections import Counter, defaultdict
+from pathlib import Path
 
-# Load environment variables
-dotenv.load_dotenv()
+from campaign.lazy import LazyAttribute, lazy_import
+from campaign.tracking import parse_timestamp
 
+# Imported on first use so --help and error paths start instantly
+dotenv = lazy_import("dotenv")
 try:
-    from notion_client import Client as NotionClient
+    NotionClient = LazyAttribute("notion_client", "Client")
 except ImportError:
     print("❌ Please install notion-client: pip install notion-client")
     sys.exit(1)
 
 
-def fetch_tracking_data():
-    """Fetch all email tracking data from Notion"""
+def _rich_text(props, name, default=""):
+    rich_text = props.get(name, {}).get("rich_text") or [{}]
+    return rich_text[0].get("text", {}).get("content", default)
+
+
+def page_to_row(page):
+    """Tracking row for an Email Analytics page"""
+    props = page["properties"]
+    # Email is a title property in this database
+    email_title = props.get("Email", {}).get("title", [])
+    return {
+        "email": email_title[0].get("text", {}).get("content", "") if email_title else "",
+        "campaign": _rich_text(props, "Campaign ID"),
+        "open_count": props.get("Open Count", {}).get("number") or 0,
+        "first_opened": (props.get("First Opened", {}).get("date") or {}).get("start"),
+        "last_opened": (props.get("Last Opened", {}).get("date") or {}).get("start"),
+        "country": _rich_text(props, "Country", "Unknown"),
+    }
+
+
+def connect_notion():
+    """(Notion client, analytics database id) from the environment"""
     notion_token = os.getenv("NOTION_TOKEN")
     analytics_db_id = os.getenv("NOTION_EMAIL_ANALYTICS_DB_ID")
     
@@ -30,154 +60,358 @@ def fetch_tracking_data():
         print("❌ Missing NOTION_TOKEN or NOTION_EMAIL_ANALYTICS_DB_ID in .env")
         sys.exit(1)
     
-    notion = NotionClient(auth=notion_token)
-    
-    print("📊 Fetching email tracking data...")
-    
-    all_data = []
+    return NotionClient(auth=notion_token), analytics_db_id
+
+
+def query_pages(notion, database_id, **query):
+    """
+    Yield the pages of a database query as each batch of 100 arrives
+
+    A failed request is reported and re-raised, so a consumer never takes a
+    truncated stream for the whole database
+    """
     has_more = True
     start_cursor = None
     
     while has_more:
         try:
             response = notion.databases.query(
-                database_id=analytics_db_id,
+                database_id=database_id,
                 start_cursor=start_cursor,
-                page_size=100
+                page_size=100,
+                **query
             )
-            
-            for page in response["results"]:
-                props = page["properties"]
-                
-                # Email is a title property in this database
-                email_title = props.get("Email", {}).get("title", [])
-                email = email_title[0].get("text", {}).get("content", "") if email_title else ""
-                
-                data = {
-                    "email": email,
-                    "campaign": props.get("Campaign ID", {}).get("rich_text", [{}])[0].get("text", {}).get("content", ""),
-                    "open_count": props.get("Open Count", {}).get("number", 0),
-                    "first_opened": props.get("First Opened", {}).get("date", {}).get("start"),
-                    "last_opened": props.get("Last Opened", {}).get("date", {}).get("start"),
-                    "country": props.get("Country", {}).get("rich_text", [{}])[0].get("text", {}).get("content", "Unknown"),
-                }
-                
-                if data["email"]:  # Only add if email exists
-                    all_data.append(data)
-            
-            has_more = response.get("has_more", False)
-            start_cursor = response.get("next_cursor")
-            
         except Exception as e:
             print(f"❌ Error fetching data: {e}")
-            return []
+            raise
+        
+        yield from response["results"]
+        
+        has_more = response.get("has_more", False)
+        start_cursor = response.get("next_cursor")
+
+
+def stream_tracking_data():
+    """Yield tracking rows from Notion page by page, as they arrive"""
+    notion, analytics_db_id = connect_notion()
     
-    return all_data
+    print("📊 Fetching email tracking data...")
+    
+    for page in query_pages(notion, analytics_db_id):
+        row = page_to_row(page)
+        if row["email"]:  # Only add if email exists
+            yield row
 
 
-def analyze_tracking_data(data):
-    """Analyze and display tracking statistics"""
-    if not data:
-        print("📭 No tracking data found")
-        return
-    
-    print(f"\n✅ Found {len(data)} tracked email opens\n")
-    
-    # Overall statistics
-    print("📈 Overall Statistics")
-    print("=" * 50)
-    
-    total_opens = sum(d["open_count"] for d in data)
-    unique_emails = len(set(d["email"] for d in data))
-    
-    print(f"Total opens: {total_opens}")
-    print(f"Unique recipients: {unique_emails}")
-    print(f"Average opens per recipient: {total_opens/unique_emails:.1f}")
-    
-    # Campaign statistics
-    print("\n📊 Campaign Statistics")
-    print("=" * 50)
-    
-    campaigns = defaultdict(lambda: {"recipients": set(), "opens": 0})
-    
-    for d in data:
-        campaign = d["campaign"] or "Unknown"
-        campaigns[campaign]["recipients"].add(d["email"])
-        campaigns[campaign]["opens"] += d["open_count"]
-    
-    for campaign, stats in sorted(campaigns.items()):
-        recipients = len(stats["recipients"])
-        opens = stats["opens"]
-        print(f"\nCampaign: {campaign}")
-        print(f"  Recipients: {recipients}")
-        print(f"  Total opens: {opens}")
-        print(f"  Avg opens/recipient: {opens/recipients:.1f}")
-    
-    # Geographic distribution
-    print("\n🌍 Geographic Distribution")
-    print("=" * 50)
-    
-    countries = defaultdict(int)
-    for d in data:
-        countries[d["country"]] += 1
-    
-    for country, count in sorted(countries.items(), key=lambda x: x[1], reverse=True):
-        percentage = (count / len(data)) * 100
-        print(f"{country}: {count} ({percentage:.1f}%)")
-    
-    # Recent activity
-    print("\n⏰ Recent Activity (Last 7 Days)")
-    print("=" * 50)
-    
-    seven_days_ago = datetime.now() - timedelta(days=7)
-    recent_opens = []
-    
-    for d in data:
-        if d["last_opened"]:
-            last_opened = datetime.fromisoformat(d["last_opened"].replace("Z", "+00:00"))
-            if last_opened.replace(tzinfo=None) > seven_days_ago:
-                recent_opens.append(d)
-    
-    if recent_opens:
-        print(f"Recent opens: {len(recent_opens)}")
+def fetch_tracking_data():
+    """Fetch all email tracking data from Notion"""
+    return list(stream_tracking_data())
+
+
+class TrackingStats:
+    """Report rollups maintained incrementally over a stream of tracking rows
+
+    Every row is visited once: totals, per-campaign and per-country counts
+    are updated in place, and the most recent opens and most engaged
+    recipients are kept in heaps bounded to the number shown. Only the
+    distinct recipient addresses (for the unique counts) grow with the data.
+    """
+
+    def __init__(self, now=None, top_n=10, recent_n=5, recent_days=7):
+        self.top_n = top_n
+        self.recent_n = recent_n
+        self.recent_since = (now or datetime.now()) - timedelta(days=recent_days)
+        self.recent_days = recent_days
+        self.rows = 0
+        self.total_opens = 0
+        self.recent_count = 0
+        self.emails = set()
+        self.campaigns = defaultdict(lambda: {"recipients": set(), "opens": 0})
+        self.countries = Counter()
+        # (key, -sequence, row) min-heaps: the root is the entry to evict, and
+        # among equal keys the earliest row wins, as a stable sort would
+        self._recent = []
+        self._top = []
+
+    def add(self, row):
+        sequence = -self.rows
+        self.rows += 1
+        opens = row["open_count"] or 0
+        self.total_opens += opens
+        self.emails.add(row["email"])
+        campaign = self.campaigns[row["campaign"] or "Unknown"]
+        campaign["recipients"].add(row["email"])
+        campaign["opens"] += opens
+        self.countries[row["country"]] += 1
+
+        last_opened = parse_timestamp(row["last_opened"])
+        if last_opened is not None and last_opened > self.recent_since:
+            self.recent_count += 1
+            self._push(self._recent, self.recent_n, (last_opened, sequence, row))
+        self._push(self._top, self.top_n, (opens, sequence, row))
+
+    @staticmethod
+    def _push(heap, size, entry):
+        if len(heap) < size:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    def consume(self, rows, progress=False):
+        """Add every row of an iterable, optionally printing a running count"""
+        for row in rows:
+            self.add(row)
+            if progress and self.rows % 100 == 0:
+                print(f"\r📥 {self.rows} rows, {self.total_opens} opens so far...", end="", flush=True)
+        if progress and self.rows >= 100:
+            print()
+        return self
+
+    @property
+    def unique_recipients(self):
+        return len(self.emails)
+
+    def campaign_rows(self):
+        """(campaign, recipients, opens) per campaign, by name"""
+        return [
+            (campaign, len(stats["recipients"]), stats["opens"])
+            for campaign, stats in sorted(self.campaigns.items())
+        ]
+
+    def country_rows(self):
+        return self.countries.most_common()
+
+    def recent_opens(self):
+        """(opened, row) for the most recent opens, newest first"""
+        return [(opened, row) for opened, _, row in sorted(self._recent, key=lambda e: e[:2], reverse=True)]
+
+    def top_recipients(self):
+        return [row for _, _, row in sorted(self._top, key=lambda e: e[:2], reverse=True)]
+
+    def print_report(self):
+        if not self.rows:
+            print("📭 No tracking data found")
+            return
+        
+        print(f"\n✅ Found {self.rows} tracked email opens\n")
+        
+        # Overall statistics
+        print("📈 Overall Statistics")
+        print("=" * 50)
+        
+        unique_emails = self.unique_recipients
+        print(f"Total opens: {self.total_opens}")
+        print(f"Unique recipients: {unique_emails}")
+        print(f"Average opens per recipient: {self.total_opens/unique_emails:.1f}")
+        
+        # Campaign statistics
+        print("\n📊 Campaign Statistics")
+        print("=" * 50)
+        
+        for campaign, recipients, opens in self.campaign_rows():
+            print(f"\nCampaign: {campaign}")
+            print(f"  Recipients: {recipients}")
+            print(f"  Total opens: {opens}")
+            print(f"  Avg opens/recipient: {opens/recipients:.1f}")
         
-        # Show last 5 opens
-        print("\nLast 5 email opens:")
-        sorted_opens = sorted(recent_opens, 
-                            key=lambda x: x["last_opened"], 
-                            reverse=True)[:5]
+        # Geographic distribution
+        print("\n🌍 Geographic Distribution")
+        print("=" * 50)
         
-        for d in sorted_opens:
-            opened = datetime.fromisoformat(d["last_opened"].replace("Z", "+00:00"))
-            print(f"  - {d['email']} ({d['campaign']}) - {opened.strftime('%Y-%m-%d %H:%M')}")
+        for country, count in self.country_rows():
+            percentage = (count / self.rows) * 100
+            print(f"{country}: {count} ({percentage:.1f}%)")
+        
+        # Recent activity
+        print(f"\n⏰ Recent Activity (Last {self.recent_days} Days)")
+        print("=" * 50)
+        
+        if self.recent_count:
+            print(f"Recent opens: {self.recent_count}")
+            
+            print(f"\nLast {self.recent_n} email opens:")
+            for opened, d in self.recent_opens():
+                print(f"  - {d['email']} ({d['campaign']}) - {opened.strftime('%Y-%m-%d %H:%M')}")
+        else:
+            print(f"No opens in the last {self.recent_days} days")
+        
+        # Top engaged users
+        print(f"\n🏆 Top {self.top_n} Most Engaged Recipients")
+        print("=" * 50)
+        
+        for i, d in enumerate(self.top_recipients(), 1):
+            print(f"{i}. {d['email']} - {d['open_count']} opens ({d['campaign']})")
+
+
+class StoredStats(TrackingStats):
+    """The same report, answered by queries on the local TrackingStore"""
+
+    def __init__(self, store, now=None, top_n=10, recent_n=5, recent_days=7, days=14):
+        super().__init__(now, top_n, recent_n, recent_days)
+        self.store = store
+        self.days = days
+        self.rows, self.total_opens, self._unique = store.totals()
+        self.recent_count = store.recent_count(self.recent_since)
+
+    def add(self, row):
+        raise TypeError("StoredStats is read from the store; sync rows into it instead")
+
+    @property
+    def unique_recipients(self):
+        return self._unique
+
+    def campaign_rows(self):
+        return self.store.campaigns()
+
+    def country_rows(self):
+        return self.store.countries()
+
+    def recent_opens(self):
+        return [
+            (parse_timestamp(row["last_opened"]), row)
+            for row in self.store.recent(self.recent_since, self.recent_n)
+        ]
+
+    def top_recipients(self):
+        return self.store.top(self.top_n)
+
+    def print_report(self):
+        super().print_report()
+        daily = self.store.daily(self.days)
+        if not daily:
+            return
+        
+        print(f"\n📅 Daily Activity (Last {len(daily)} Active Days)")
+        print("=" * 50)
+        
+        for day, first_opens, last_opens in daily:
+            print(f"{day}: {first_opens} first opens, {last_opens} most recent opens")
+
+
+def sync_store(store, full=False):
+    """
+    Bring the local store up to date with Notion
+
+    Only pages edited since the newest ``last_edited_time`` already stored
+    are fetched (the boundary is inclusive, and re-writing a row is
+    harmless). ``full`` clears the store first, which also drops rows that
+    were deleted in Notion.
+
+    A failed fetch raises. The batches already written stay (pages arrive
+    oldest edit first, so they are a consistent prefix and the next sync
+    resumes after them), but the sync time is only recorded once every
+    page has been fetched.
+
+    Returns:
+        Number of pages written
+    """
+    notion, analytics_db_id = connect_notion()
+    if full:
+        store.clear()
+    
+    query = {"sorts": [{"timestamp": "last_edited_time", "direction": "ascending"}]}
+    if store.last_edited:
+        query["filter"] = {
+            "timestamp": "last_edited_time",
+            "last_edited_time": {"on_or_after": store.last_edited},
+        }
+        print(f"📊 Syncing pages edited since {store.last_edited}...")
     else:
-        print("No opens in the last 7 days")
-    
-    # Top engaged users
-    print("\n🏆 Top 10 Most Engaged Recipients")
-    print("=" * 50)
-    
-    sorted_by_opens = sorted(data, key=lambda x: x["open_count"], reverse=True)[:10]
-    
-    for i, d in enumerate(sorted_by_opens, 1):
-        print(f"{i}. {d['email']} - {d['open_count']} opens ({d['campaign']})")
+        print("📊 Fetching email tracking data...")
+    
+    synced_at = datetime.now().isoformat(timespec="seconds")
+    written = 0
+    batch = []
+    for page in query_pages(notion, analytics_db_id, **query):
+        row = page_to_row(page)
+        if row["email"]:
+            batch.append((page["id"], page.get("last_edited_time"), row))
+        if len(batch) == 100:
+            # Committed per batch: pages arrive oldest edit first, so an
+            # interrupted sync resumes where it stopped
+            written += store.upsert(batch)
+            batch = []
+    written += store.upsert(batch)
+    store.mark_synced(synced_at)
+    return written
 
 
-def export_csv(data):
-    """Export tracking data to CSV"""
-    import csv
-    
-    filename = f"email_tracking_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    
-    with open(filename, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            "email", "campaign", "open_count", 
-            "first_opened", "last_opened", "country"
-        ])
-        writer.writeheader()
-        writer.writerows(data)
-    
-    print(f"\n💾 Data exported to: {filename}")
+def analyze_tracking_data(data):
+    """Analyze and display tracking statistics (data may be any iterable of rows)"""
+    return TrackingStats().consume(data).print_report()
+
+
+def make_exporter(args, delta=False):
+    """Exporter for --export/--output/--format (None when not exporting)"""
+    if not args.export:
+        return None
+    # Imported here so runs without --export never load gzip/csv
+    from tracking.export import Exporter, export_filename
+    
+    fmt = args.format
+    path = Path(args.output) if args.output else Path(".")
+    if path.is_dir() or (args.output or "").endswith(os.sep):
+        path = path / export_filename(fmt or "csv", delta)
+    return Exporter(path, fmt)
+
+
+def report_export(exporter):
+    if exporter.rows:
+        print(f"\n💾 {exporter.rows} rows exported to: {exporter.path}")
+    else:
+        print("\n💾 Nothing to export")
+
+
+def export_csv(data, path=None, fmt=None):
+    """Export tracking data (any iterable of rows) to a file, one row at a time"""
+    from tracking.export import Exporter, export_filename
+    
+    with Exporter(path or export_filename(fmt or "csv"), fmt) as exporter:
+        exporter.write_all(data)
+    report_export(exporter)
+    return exporter
+
+
+def report_live(args):
+    """Fetch, aggregate and export in one pass over the Notion stream"""
+    rows = stream_tracking_data()
+    exporter = make_exporter(args)
+    if exporter is None:
+        return TrackingStats().consume(rows, progress=True)
+    
+    from tracking.export import tee
+    
+    # An interrupted fetch discards the partial file
+    with exporter:
+        stats = TrackingStats().consume(tee(rows, exporter), progress=True)
+    report_export(exporter)
+    return stats
+
+
+def report_local(args):
+    """Sync the local store (unless --offline) and report from it"""
+    # Imported here so --help and --live never load sqlite3
+    from tracking.store import STORE_FILE, TrackingStore
+    
+    store = TrackingStore(args.store or STORE_FILE)
+    if not args.offline:
+        written = sync_store(store, full=args.full_sync)
+        print(f"💾 {written} rows updated in {store.path}")
+    elif store.synced_at:
+        print(f"💾 Using {store.path} (last synced {store.synced_at})")
+    
+    stats = StoredStats(store)
+    exporter = make_exporter(args, delta=args.since_last_export)
+    if exporter is not None:
+        since = store.exported_version if args.since_last_export else 0
+        version = store.version
+        with exporter:
+            exporter.write_all(store.rows(since))
+        # Only a delta export that was moved into place advances the mark
+        if args.since_last_export:
+            store.mark_exported(version)
+        report_export(exporter)
+    return stats
 
 
 def main():
@@ -186,23 +420,35 @@ def main():
     
     parser = argparse.ArgumentParser(description="View email tracking statistics")
     parser.add_argument("--export", action="store_true", 
-                       help="Export data to CSV")
+                       help="Export data to CSV (or --format)")
+    parser.add_argument("--format", choices=["csv", "csv.gz", "jsonl", "jsonl.gz"],
+                       help="Export format (default: from --output's extension, else csv)")
+    parser.add_argument("--output", type=str,
+                       help="Export file or directory (default: current directory)")
+    parser.add_argument("--since-last-export", action="store_true",
+                       help="Export only rows changed since the previous --since-last-export run")
+    parser.add_argument("--store", type=str,
+                       help="Local tracking database (default: scripts/tracking-stats.sqlite3)")
+    parser.add_argument("--offline", action="store_true",
+                       help="Report from the local database without syncing from Notion")
+    parser.add_argument("--full-sync", action="store_true",
+                       help="Refetch every row instead of only rows edited since the last sync")
+    parser.add_argument("--live", action="store_true",
+                       help="Stream every row from Notion without using the local database")
     
     args = parser.parse_args()
+    args.export = args.export or bool(args.format or args.output or args.since_last_export)
+    if args.live and args.since_last_export:
+        parser.error("--since-last-export needs the local database; drop --live")
+    dotenv.load_dotenv()
     
     print("📧 Email Tracking Statistics")
     print("============================\n")
     
-    # Fetch data
-    data = fetch_tracking_data()
+    stats = report_live(args) if args.live else report_local(args)
     
-    if data:
-        # Analyze and display
-        analyze_tracking_data(data)
-        
-        # Export if requested
-        if args.export:
-            export_csv(data)
+    if stats.rows:
+        stats.print_report()
     else:
         print("No tracking data available")
         print("\nMake sure:")
@@ -210,6 +456,5 @@ def main():
         print("2. You have sent tracked emails")
         print("3. Recipients have opened the emails")
 
-
 if __name__ == "__main__":
     main()
\ No newline at end of file